@@ -0,0 +1,307 @@
+"""End-to-end latency benchmark of the prompt pipeline.
+
+Drives the real application objects, as main() builds them, against the
+local mock provider:
+
+    Chat.process_prompt -> QTimer -> Controller -> Model.get_user_prompt_slot
+    -> PromptWorker -> client -> Chat.get_response_message_slot -> setHtml
+
+and times every stage of each round trip, so that Gila's own overhead is
+reported apart from the time spent waiting for the provider. Run it from
+the root of the repository:
+
+    python benchmarks/prompt_pipeline.py --iterations 50 --output bench.json
+    python benchmarks/prompt_pipeline.py --output new.json --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6 import __version__ as PYSIDE_VERSION
+from PySide6.QtCore import QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication
+
+from gila.ai.event_loop import EVENT_LOOP
+from gila.ai.mock_server import MockProviderServer
+from gila.ai.transport import TRANSPORT
+
+
+# Stages in pipeline order, with what they measure
+STAGES = {
+    "prompt_render": "process_prompt: escaping the prompt and the setHtml call showing it",
+    "timer_delay": "QTimer delay before the prompt is sent to the controller",
+    "dispatch": "controller, model and PromptWorker until the client starts the request",
+    "network": "client.submit_prompt_async, mostly time spent waiting for the provider",
+    "delivery": "queued signals bringing the response back to the GUI thread",
+    "markdown": "Markdown to HTML conversion of the response",
+    "bleach": "sanitization of the response HTML",
+    "set_html": "generate_chat_html call with the response",
+    "page_load": "from the setHtml call to loadFinished, the full reload of the page",
+    "total": "from process_prompt to the page showing the response",
+    "gila_overhead": "total minus network",
+}
+
+SAMPLE_RESPONSE = """## Result
+
+Here is a short answer with **bold** text, *emphasis* and `inline code`.
+
+1. First item
+2. Second item with a [link](https://example.com)
+3. Third item
+
+```python
+def fibonacci(n):
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
+```
+
+| Model | Latency | Tokens |
+|-------|---------|--------|
+| A     | 120 ms  | 512    |
+| B     | 340 ms  | 1024   |
+
+"""
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of values."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    """Return count, mean, p50, p95, min and max in milliseconds of every stage."""
+    stages = {}
+    for stage in STAGES:
+        values = [sample[stage] * 1000 for sample in samples if stage in sample]
+        if not values:
+            continue
+        stages[stage] = {
+            "count": len(values),
+            "mean_ms": round(sum(values) / len(values), 3),
+            "p50_ms": round(percentile(values, 0.50), 3),
+            "p95_ms": round(percentile(values, 0.95), 3),
+            "min_ms": round(min(values), 3),
+            "max_ms": round(max(values), 3),
+        }
+    return stages
+
+
+class PipelineProbe:
+    """Time the stages of a round trip by wrapping the methods of the
+    application objects that delimit them.
+
+    Wrappers are set on the instances, so they are seen by every caller that
+    looks the method up on self, and by nothing else.
+    """
+
+    def __init__(self, view, model):
+        self.chat = view.chat
+        self.model = model
+        self.marks = {}
+        self.durations = {}
+        self._loop = None
+        self._wrap_timed(self.chat, "_convert_markdown_to_html", "markdown")
+        self._wrap_timed(self.chat, "_sanitize_response_html", "bleach")
+        self._wrap_timed(self.chat, "generate_chat_html", "set_html")
+        self._wrap_marked(self.chat, "send_delayed_prompt_signal", "timer_fired")
+        self.model.response_message_to_controller.connect(lambda _: self._mark("delivered"))
+        self.chat.log_widget.loadFinished.connect(self._load_finished)
+
+    def run_round_trip(self, prompt, timeout=60):
+        """Send prompt through the chat and return the duration of every stage."""
+        self.marks = {}
+        self.durations = {}
+        self._wrap_client()
+        self._loop = QEventLoop()
+        QTimer.singleShot(int(timeout * 1000), self._loop.quit)
+        self._mark("start")
+        self.chat.process_prompt(prompt)
+        self._mark("processed")
+        self._loop.exec()
+        self._loop = None
+        if "loaded" not in self.marks:
+            raise TimeoutError(f"No response shown within {timeout} seconds.")
+        marks = self.marks
+        sample = {
+            "prompt_render": marks["processed"] - marks["start"],
+            "timer_delay": marks["timer_fired"] - marks["processed"],
+            "dispatch": marks["network_start"] - marks["timer_fired"],
+            "network": marks["network_end"] - marks["network_start"],
+            "delivery": marks["delivered"] - marks["network_end"],
+            "markdown": self.durations["markdown"],
+            "bleach": self.durations["bleach"],
+            "set_html": self.durations["set_html"],
+            "page_load": marks["loaded"] - marks["set_html_end"],
+            "total": marks["loaded"] - marks["start"],
+        }
+        sample["gila_overhead"] = sample["total"] - sample["network"]
+        return sample
+
+    def _mark(self, name):
+        self.marks[name] = time.perf_counter()
+
+    def _load_finished(self, ok):
+        # Only the reload showing the response ends the round trip, the one
+        # showing the prompt may finish later or be aborted by it
+        marks = self.marks
+        if ok and self._loop is not None and marks.get("set_html_end", 0) > marks.get("markdown_end", float("inf")):
+            self._mark("loaded")
+            self._loop.quit()
+
+    def _wrap_timed(self, obj, name, stage):
+        method = getattr(obj, name)
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                ended = time.perf_counter()
+                self.durations[stage] = ended - started
+                self.marks[f"{stage}_end"] = ended
+        setattr(obj, name, timed)
+
+    def _wrap_marked(self, obj, name, mark):
+        method = getattr(obj, name)
+
+        def marked(*args, **kwargs):
+            self._mark(mark)
+            return method(*args, **kwargs)
+        setattr(obj, name, marked)
+
+    def _wrap_client(self):
+        """Time the client of the chat, which the worker looks up on the
+        manager at every prompt."""
+        client = self.model.manager.client
+        if getattr(client, "_benchmark_wrapped", False):
+            return
+        submit = client.submit_prompt_async
+
+        async def timed_submit(*args, **kwargs):
+            self._mark("network_start")
+            try:
+                return await submit(*args, **kwargs)
+            finally:
+                self._mark("network_end")
+        client.submit_prompt_async = timed_submit
+        client._benchmark_wrapped = True
+
+
+def build_application(args):
+    """Build the application like main() does, with a chat ready to send
+    prompts to the mock provider."""
+    from gila.ai.manager import AIManager
+    from gila.core.controller import Controller
+    from gila.core.model import Model
+    from gila.ui.view import View
+
+    manager = AIManager()
+    view = View()
+    view.chat.prewarm()
+    model = Model(manager)
+    controller = Controller(model, view)
+    manager.session = manager.create_session(args.model, temperature=0.5, max_tokens=args.response_tokens * 2)
+    manager.stream_responses = args.stream
+    view.sidebar.current_settings.current_llm = args.model
+    view.show_chatlog_and_prompt_line()
+    view.show()
+    return view, model, controller
+
+
+def get_git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, previous_path):
+    """Print the change of p50 and p95 of every stage against a previous run."""
+    with open(previous_path, "r", encoding="utf-8") as f:
+        previous = json.load(f)["stages"]
+    print(f"\n{'stage':<15}{'p50 ms':>12}{'delta':>10}{'p95 ms':>12}{'delta':>10}")
+    for stage, stats in results["stages"].items():
+        old = previous.get(stage)
+        deltas = [
+            f"{(stats[key] - old[key]) / old[key] * 100:+.1f}%" if old and old[key] else "n/a"
+            for key in ("p50_ms", "p95_ms")
+        ]
+        print(f"{stage:<15}{stats['p50_ms']:>12.2f}{deltas[0]:>10}{stats['p95_ms']:>12.2f}{deltas[1]:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3, help="round trips run before measuring")
+    parser.add_argument("--model", default="GPT-4o mini", help="readable name of the mocked model")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before the mock answers")
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--response-tokens", type=int, default=400)
+    parser.add_argument("--stream", action="store_true", help="stream the responses")
+    parser.add_argument("--output", default="bench_output.json", help="where to write the JSON results")
+    parser.add_argument("--compare", default=None, help="results of a previous run to compare with")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    app.aboutToQuit.connect(TRANSPORT.close)
+    app.aboutToQuit.connect(EVENT_LOOP.stop)
+    server = MockProviderServer(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+        response_text=SAMPLE_RESPONSE * (args.response_tokens // 60 + 1),
+    ).start()
+    os.environ["GILA_BASE_URL"] = server.base_url
+    os.environ.setdefault("OPENAI_API_KEY", "mock-key")
+    os.environ.setdefault("ANTHROPIC_API_KEY", "mock-key")
+    os.environ.setdefault("GOOGLE_API_KEY", "mock-key")
+    os.environ.setdefault("COHERE_API_KEY", "mock-key")
+
+    view, model, controller = build_application(args)
+    probe = PipelineProbe(view, model)
+    samples = []
+    for iteration in range(args.warmup + args.iterations):
+        sample = probe.run_round_trip(f"Benchmark prompt number {iteration}, please answer in Markdown.")
+        if iteration >= args.warmup:
+            samples.append(sample)
+            print(f"[{len(samples)}/{args.iterations}] total {sample['total'] * 1000:.1f} ms, "
+                  f"overhead {sample['gila_overhead'] * 1000:.1f} ms", file=sys.stderr)
+
+    results = {
+        "meta": {
+            "revision": get_git_revision(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pyside": PYSIDE_VERSION,
+            "platform": platform.platform(),
+            "config": vars(args),
+        },
+        "stage_descriptions": STAGES,
+        "stages": summarize(samples),
+        "samples": samples,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+
+    print(f"\n{'stage':<15}{'p50 ms':>12}{'p95 ms':>12}")
+    for stage, stats in results["stages"].items():
+        print(f"{stage:<15}{stats['p50_ms']:>12.2f}{stats['p95_ms']:>12.2f}")
+    if args.compare:
+        compare(results, args.compare)
+    server.stop()
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Import-time budget of the start of the app.
+
+Imports, in a fresh interpreter with the import trace installed, the
+modules that gila/__main__.py imports before the window is built, then
+checks that:
+
+- the total import time stays within the budget;
+- none of the modules that should only load on first use was imported.
+
+Run it from the root of the repository; the exit status is 1 if the
+budget is exceeded or a deferred module was imported:
+
+    python benchmarks/startup_imports.py --budget-ms 1500
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+# Modules that must not be imported before they're used
+DEFERRED_MODULES = [
+    "bleach",
+    "bs4",
+    "docx",
+    "dotenv",
+    "markdown",
+    "requests",
+    "gila.ai.clients.anthropic",
+    "gila.ai.clients.arli",
+    "gila.ai.clients.cohere",
+    "gila.ai.clients.deepseek",
+    "gila.ai.clients.google",
+    "gila.ai.clients.groq",
+    "gila.ai.clients.mistral",
+    "gila.ai.clients.openai",
+]
+
+# Imports of gila/__main__.py, run in the child interpreter
+CHILD_SCRIPT = """
+import json
+import sys
+
+from gila.core.import_trace import IMPORT_TRACER
+
+IMPORT_TRACER.install()
+from PySide6.QtWidgets import QApplication
+from gila.core.model import Model
+from gila.ui.view import View
+from gila.core.controller import Controller
+from gila.ai.event_loop import EVENT_LOOP
+from gila.ai.manager import AIManager
+from gila.ai.transport import TRANSPORT
+IMPORT_TRACER.uninstall()
+
+print(json.dumps({
+    "total_ms": IMPORT_TRACER.get_total() * 1000,
+    "modules": sorted(sys.modules),
+    "report": IMPORT_TRACER.get_report(),
+}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=1500, help="maximum total import time")
+    parser.add_argument("--runs", type=int, default=3, help="the fastest run is compared to the budget")
+    args = parser.parse_args()
+
+    results = []
+    for _ in range(args.runs):
+        output = subprocess.check_output([sys.executable, "-c", CHILD_SCRIPT], cwd=ROOT, text=True)
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    fastest = min(results, key=lambda result: result["total_ms"])
+    print(fastest["report"])
+
+    failed = False
+    if fastest["total_ms"] > args.budget_ms:
+        print(f"\nImports took {fastest['total_ms']:.1f} ms, over the budget of {args.budget_ms:.0f} ms.")
+        failed = True
+    if imported := [name for name in DEFERRED_MODULES if name in fastest["modules"]]:
+        print(f"\nImported before first use: {', '.join(imported)}")
+        failed = True
+    if not failed:
+        print(f"\nImports took {fastest['total_ms']:.1f} ms, within the budget of {args.budget_ms:.0f} ms.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
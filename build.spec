@@ -2,6 +2,7 @@
 
 import os
 from PyInstaller.building.build_main import Splash
+from PyInstaller.utils.hooks import collect_submodules
 
 # =====================================================
 # Collect asset files
@@ -23,7 +24,8 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=collect_assets('storage/assets'),
-    hiddenimports=[],
+    # Provider modules are imported by name when a model is first used
+    hiddenimports=collect_submodules('gila.ai.clients'),
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -1,4 +1,119 @@
-from gila.__main__ import main
+import argparse
+import sys
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="gila", description="Gila, without arguments starts the GUI.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    run_parser = subparsers.add_parser("run", help="send the prompts of a JSONL file without the GUI")
+    run_parser.add_argument("input", help="JSONL file, one {\"prompt\": ...} object per line")
+    run_parser.add_argument("-o", "--output", required=True, help="JSONL file the results are appended to")
+    run_parser.add_argument("-m", "--model", default="GPT-4o mini", help="readable model name, as in the GUI")
+    run_parser.add_argument("-c", "--concurrency", type=int, default=4, help="concurrent requests per provider")
+    run_parser.add_argument("-t", "--temperature", type=float, default=1.0)
+    run_parser.add_argument("--max-tokens", type=int, default=1024)
+    run_parser.add_argument("--system-message", default=None)
+
+    batch_parser = subparsers.add_parser("batch", help="send the prompts of a JSONL file through a batch API")
+    batch_subparsers = batch_parser.add_subparsers(dest="batch_command", required=True)
+    submit_parser = batch_subparsers.add_parser("submit", help="create a job and submit it")
+    submit_parser.add_argument("input", help="JSONL file, one {\"prompt\": ...} object per line")
+    submit_parser.add_argument("-m", "--model", default="GPT-4o mini", help="readable model name, as in the GUI")
+    submit_parser.add_argument("-t", "--temperature", type=float, default=1.0)
+    submit_parser.add_argument("--max-tokens", type=int, default=1024)
+    submit_parser.add_argument("--system-message", default=None)
+    submit_parser.add_argument("--no-wait", action="store_true", help="exit once submitted, see batch wait")
+    wait_parser = batch_subparsers.add_parser("wait", help="wait for a submitted job and merge its results")
+    wait_parser.add_argument("job_id")
+    cancel_parser = batch_subparsers.add_parser("cancel", help="stop a submitted job")
+    cancel_parser.add_argument("job_id")
+    batch_subparsers.add_parser("list", help="list the saved jobs")
+    for subparser in (submit_parser, wait_parser, cancel_parser):
+        subparser.add_argument("--poll-interval", type=float, default=10, help="seconds before the first check")
+    args, unknown = parser.parse_known_args(argv)
+    # Unknown arguments are left to Qt when the GUI starts
+    if args.command in ("run", "batch") and unknown:
+        parser.error(f"unrecognized arguments: {' '.join(unknown)}")
+    return args
+
+
+def run(args):
+    """Run the headless runner on the client layer's event loop."""
+    from gila.ai.event_loop import EVENT_LOOP
+    from gila.ai.runner import HeadlessRunner
+    from gila.ai.transport import TRANSPORT
+
+    runner = HeadlessRunner(
+        args.model,
+        concurrency=args.concurrency,
+        temperature=args.temperature,
+        max_tokens=args.max_tokens,
+        system_message=args.system_message,
+    )
+    try:
+        succeeded, failed = EVENT_LOOP.run(runner.run_async(args.input, args.output))
+    finally:
+        TRANSPORT.close()
+        EVENT_LOOP.stop()
+    print(f"{succeeded} succeeded, {failed} failed.", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def batch(args):
+    """Submit, wait for, cancel or list batch jobs, stored in
+    storage/batches."""
+    from gila.ai.batches import BatchError, BatchManager
+    from gila.ai.event_loop import EVENT_LOOP
+    from gila.ai.manager import AIManager
+    from gila.ai.runner import HeadlessRunner
+    from gila.ai.transport import TRANSPORT
+
+    manager = BatchManager(poll_interval=getattr(args, "poll_interval", 10))
+    if args.batch_command == "list":
+        for job in manager.list_jobs():
+            print(f"{job.job_id}  {job.status:<11}  {job.model_name}")
+        return 0
+
+    def on_update(job):
+        print(f"{job.job_id}: {job.status} {job.request_counts}", file=sys.stderr)
+
+    try:
+        if args.batch_command == "submit":
+            client = AIManager.create_client(args.model, args.temperature, args.max_tokens, args.system_message)
+            if client is None:
+                print(f"Unknown model: {args.model}", file=sys.stderr)
+                return 1
+            rows = HeadlessRunner(args.model).read_rows(args.input)
+            job = manager.create_job(client, rows)
+            EVENT_LOOP.run(manager.submit_async(job, client))
+            print(f"Job {job.job_id} submitted.", file=sys.stderr)
+            if args.no_wait:
+                return 0
+        else:
+            job = manager.load_job(args.job_id)
+            client = AIManager.create_client(job.model_name, 1.0, 1024)
+            if args.batch_command == "cancel":
+                EVENT_LOOP.run(manager.cancel_async(job, client))
+                on_update(job)
+                return 0
+        results_path = EVENT_LOOP.run(manager.wait_async(job, client, on_update))
+    except BatchError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        TRANSPORT.close()
+        EVENT_LOOP.stop()
+    print(results_path)
+    return 0 if job.status == "completed" else 1
+
 
 if __name__ == '__main__':
+    args = parse_args(sys.argv[1:])
+    if args.command == "run":
+        sys.exit(run(args))
+    if args.command == "batch":
+        sys.exit(batch(args))
+    # The GUI is imported only when needed, so the runner works without a display
+    from gila.__main__ import main
     main()
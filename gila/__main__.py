@@ -1,15 +1,31 @@
 import sys
+import time
 
-from PySide6.QtWidgets import QApplication
-
-from gila.core.model import Model
-from gila.ui.view import View
-from gila.core.controller import Controller
-from gila.ai.manager import AIManager
+from gila.core.import_trace import IMPORT_TRACER, is_import_trace_enabled
+from gila.core.startup_profiler import STARTUP_PROFILER, get_startup_trace_path
 
 
 def main():
-    app = QApplication(sys.argv)
+    if trace_path := get_startup_trace_path():
+        STARTUP_PROFILER.start(trace_path)
+    if is_import_trace_enabled():
+        IMPORT_TRACER.install()
+    # The app is imported here, so that the import trace can see it
+    with STARTUP_PROFILER.span("imports"):
+        from PySide6.QtWidgets import QApplication
+
+        from gila.core.model import Model
+        from gila.ui.view import View
+        from gila.core.controller import Controller
+        from gila.ai.event_loop import EVENT_LOOP
+        from gila.ai.manager import AIManager
+        from gila.ai.transport import TRANSPORT
+
+    with STARTUP_PROFILER.span("QApplication()"):
+        app = QApplication(sys.argv)
+    # Close pooled connections, then stop the network event loop
+    app.aboutToQuit.connect(TRANSPORT.close)
+    app.aboutToQuit.connect(EVENT_LOOP.stop)
 
     if getattr(sys, 'frozen', False):
         try:
@@ -18,17 +34,31 @@ def main():
             pass
 
 
-    manager = AIManager()
-    view = View()
-    model = Model(manager)
-    controller = Controller(model, view)
-    view.show()
+    with STARTUP_PROFILER.span("AIManager()"):
+        manager = AIManager()
+    with STARTUP_PROFILER.span("View()"):
+        view = View()
+    # Start the web engine now, it keeps loading while the rest is built
+    with STARTUP_PROFILER.span("Chat.prewarm"):
+        view.chat.prewarm()
+    with STARTUP_PROFILER.span("Model()"):
+        model = Model(manager)
+    with STARTUP_PROFILER.span("Controller()"):
+        controller = Controller(model, view)
+    if STARTUP_PROFILER.is_started:
+        STARTUP_PROFILER.watch_first_paint(view)
+    with STARTUP_PROFILER.span("View.show"):
+        view.show()
 
     try:
         pyi_splash.close()
     except NameError:
         pass
 
+    if IMPORT_TRACER.is_installed:
+        elapsed = time.perf_counter() - IMPORT_TRACER.installed_at
+        IMPORT_TRACER.write_report(f"Window shown {elapsed * 1000:.1f} ms after the start.")
+
     sys.exit(app.exec())
 
 if __name__ == "__main__":
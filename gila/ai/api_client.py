@@ -1,26 +1,46 @@
+import asyncio
+import json
 import os
-import requests
-import random
-import string
 from abc import ABC, abstractmethod
 
-from dotenv import load_dotenv
+import httpx
+
+from .connectivity import CONNECTIVITY
+from .context import CONTEXT_WINDOW
+from .credentials import CREDENTIALS
+from .event_loop import EVENT_LOOP
+from .rate_limiter import RATE_LIMITER
+from .response_cache import RESPONSE_CACHE
+from .streaming import aiter_sse_events
+from .transport import TRANSPORT
 
 
 class APIClient(ABC):
+    # Clients that can deliver the response incrementally set this to True
+    supports_streaming = False
+    # Seconds allowed to open the connection and to wait for the next bytes
+    # of the response, providers with slower models override them
+    connect_timeout = 10
+    read_timeout = 120
 
     def __init__(self, llm=None):
         self.llm = llm
         self.llm_name = None
+        self.company = None
         self.temperature = None
         self.max_tokens = None
         self.system_message = None
         self.chat_history = []
+        # Indices of chat_history messages always sent, whatever their age
+        self.pinned_messages = set()
+        # Index before which old turns are no longer sent, see _get_context_messages
+        self.context_start = 0
+        # Size of the model's context window in tokens, None if unknown
+        self.context_window = None
+        # Summary of chat_history[:summarized_until], see RollingSummarizer
+        self.chat_summary = None
+        self.summarized_until = 0
         self.api_key = None
-        self.chat_id = None
-        self.chat_date = None
-        self.chat_custom_name = None
-        self.is_loaded = False
         self.last_response_info = None
         # For DALL-E 2 and 3
         self.image_size = None
@@ -33,9 +53,10 @@ class APIClient(ABC):
         """Check for the presence of an API key in the .env file for the
         specified company.
 
-        Loads the environment variables from the .env file and retrieves the API
-        key associated with the given company name. If an API key is found, it
-        assigns the key to the instance variable and returns a boolean value.
+        Retrieves the API key associated with the given company name from the
+        credential store, which keeps the .env file in memory. If an API key
+        is found, it assigns the key to the instance variable and returns a
+        boolean value.
 
         Parameters:
             company_name (str): The name of the company for which to check the API key.
@@ -43,8 +64,7 @@ class APIClient(ABC):
         Returns:
             bool: True if an API key is found and retrieved, False otherwise.
         """
-        load_dotenv()
-        if key := os.getenv(f"{company_name}_API_KEY"):
+        if key := CREDENTIALS.get(company_name):
             self.api_key = key
             return True
         return False
@@ -57,21 +77,76 @@ class APIClient(ABC):
         """Return chat history"""
         return self.chat_history
 
-    def generate_chat_id(self):
-        """Generate a unique chat ID consisting of random alphanumeric characters.
+    def pin_message(self, index):
+        """Always send the message at index of the chat history, and the
+        rest of its turn, even when older turns are dropped."""
+        self.pinned_messages.add(index)
 
-        Creates a chat ID by randomly selecting 10 characters from the set of
-        ASCII letters and digits. The generated ID is assigned to the instance's
-        chat_id.
-        """
-        self.chat_id = ''.join(random.choices(string.ascii_letters + string.digits, k=10))
+    def unpin_message(self, index):
+        """Let the message at index be dropped again like any other."""
+        self.pinned_messages.discard(index)
+
+    def _get_context_messages(self):
+        """Return the part of the chat history to send to the model.
+
+        If the chat has a rolling summary, the turns it covers are replaced by
+        it, except for pinned ones. If the size of the model's context window
+        is known, the oldest turns are dropped when the estimated prompt
+        wouldn't fit in it together with the completion tokens; the system
+        message and pinned messages are always kept. The history itself is
+        never modified.
 
-    def _send_request(self, endpoint, headers, data):
+        Returns:
+            list: The messages to put in the request.
+        """
+        history, pinned = self._get_summarized_history()
+        if not self.context_window:
+            return history
+        reserved_tokens = self.max_tokens or 0
+        # Clients that send the system message outside the history
+        if self.system_message and not self._set_system_message():
+            reserved_tokens += CONTEXT_WINDOW.count_text_tokens(self.system_message)
+        messages, self.context_start = CONTEXT_WINDOW.fit(
+            history,
+            self.context_window - reserved_tokens,
+            pinned,
+            self.context_start,
+        )
+        return messages
+
+    def _get_summarized_history(self):
+        """Return the chat history with the summarized turns replaced by the
+        summary, and the indices of the pinned messages in it.
+
+        The summary is sent as a user message acknowledged by the assistant,
+        right after the system messages, so that the roles keep alternating
+        for every provider.
+        """
+        if not self.chat_summary or not self.summarized_until:
+            return self.chat_history, self.pinned_messages
+        system_end = CONTEXT_WINDOW.get_system_end(self.chat_history)
+        history = self.chat_history[:system_end]
+        history.append(self._format_user_message(f"Summary of the conversation so far:\n{self.chat_summary}"))
+        history.append(self._format_ai_message("Understood, I'll keep it in mind."))
+        pinned = set()
+        for begin, end in CONTEXT_WINDOW.split_turns(self.chat_history[:self.summarized_until], system_end):
+            if CONTEXT_WINDOW.is_pinned((begin, end), self.pinned_messages):
+                pinned.update(range(len(history), len(history) + end - begin))
+                history.extend(self.chat_history[begin:end])
+        offset = len(history) - self.summarized_until
+        pinned.update(index + offset for index in self.pinned_messages if index >= self.summarized_until)
+        history.extend(self.chat_history[self.summarized_until:])
+        return history, pinned
+
+    async def _send_request(self, endpoint, headers, data):
         """Send a POST request to the specified endpoint with the given headers
         and data.
 
         Constructs and sends a POST request to the provided endpoint and includes
-        the specified headers and data in JSON format.
+        the specified headers and data in JSON format. The request goes through
+        the shared transport, which reuses a kept-alive connection to the
+        provider's host when one is available, waits for the provider's rate
+        limits and retries rate limited or overloaded requests.
         If the request is successful, it returns the JSON response. If an error
         occurs during the request, it catches the exception and returns a
         dictionary containing the error message.
@@ -86,11 +161,110 @@ class APIClient(ABC):
             dict: The JSON response from the server or an error message.
         """
         try:
-            response = requests.post(f"{endpoint}", headers=headers, json=data)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
-            return {"error": str(e)}
+            response = await TRANSPORT.post(
+                f"{endpoint}", headers=headers, json=data,
+                timeout=self._get_timeout(), rate_limit=self._get_rate_limiter()
+            )
+        except httpx.HTTPError as e:
+            self._report_connectivity(endpoint, e)
+            return {"error": self._get_transport_error_message(e)}
+        self._report_connectivity(endpoint)
+        if response.is_error:
+            return {"error": self._get_error_message(response)}
+        return response.json()
+
+    async def _send_stream_request(self, endpoint, headers, data):
+        """Send a streaming POST request and yield the server-sent events of
+        the response as they arrive.
+
+        Unlike _send_request, errors are raised instead of returned, because
+        they can also happen after part of the response has been delivered.
+
+        Parameters:
+            endpoint (str): The URL of the endpoint to send the request to.
+            headers (dict): A dictionary of HTTP headers to include in the request.
+            data (dict): The data to be sent in the body of the request,
+                         serialized as JSON.
+
+        Yields:
+            ServerSentEvent: Each event of the stream, with its name and data.
+
+        Raises:
+            Exception: If the request fails or the server returns an error status.
+        """
+        try:
+            async with TRANSPORT.stream(
+                f"{endpoint}", headers=headers, json=data,
+                timeout=self._get_timeout(), rate_limit=self._get_rate_limiter()
+            ) as response:
+                self._report_connectivity(endpoint)
+                if response.is_error:
+                    await response.aread()
+                    raise Exception(self._get_error_message(response))
+                async for event in aiter_sse_events(response.aiter_lines()):
+                    yield event
+        except httpx.HTTPError as e:
+            self._report_connectivity(endpoint, e)
+            raise Exception(self._get_transport_error_message(e)) from e
+
+    def _get_timeout(self):
+        """Return the timeouts of this client's requests.
+
+        The read timeout is the longest wait between two pieces of the
+        response, so it also bounds a stalled stream.
+        """
+        return httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+
+    def _report_connectivity(self, endpoint, error=None):
+        """Tell the connectivity monitor whether the provider answered.
+
+        Only failures to connect mean that the host is unreachable: timeouts
+        and protocol errors happen after the connection has been made.
+        """
+        reachable = not isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout))
+        CONNECTIVITY.report(endpoint, reachable)
+
+    def _get_rate_limiter(self):
+        """Return the rate limiter shared by the clients of this company."""
+        return RATE_LIMITER.get(self.company) if self.company else None
+
+    def _get_error_message(self, response):
+        """Return a readable message for a request that failed with an error
+        status.
+
+        Providers describe the error in the body of the response, which is
+        more useful to the user than the bare status code.
+
+        Parameters:
+            response (httpx.Response): The failed response, already read.
+
+        Returns:
+            str: The provider's error message if there is one, otherwise the
+                 HTTP status line.
+        """
+        try:
+            error = response.json()["error"]
+            return str(error["message"] if isinstance(error, dict) else error)
+        except (ValueError, KeyError, TypeError):
+            return f"{response.status_code} Error: {response.reason_phrase} for url: {response.url}"
+
+    def _get_transport_error_message(self, error):
+        """Return a readable message for a request that got no response.
+
+        Connection failures are prefixed with "Connection" so that the model
+        can report them as connectivity problems.
+
+        Parameters:
+            error (httpx.HTTPError): The exception raised by the transport.
+
+        Returns:
+            str: The error message.
+        """
+        if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout)):
+            return f"Connection error: {error}"
+        if isinstance(error, httpx.TimeoutException):
+            return f"The request timed out after {self.read_timeout} seconds without a response."
+        return str(error) or error.__class__.__name__
 
     def _get_request_params(self):
         """Retrieve the parameters for a request, including the endpoint,
@@ -136,8 +310,8 @@ class APIClient(ABC):
         """Create and return the default request data.
 
         Constructs a dictionary of data to be sent in the body of the request.
-        By default, it includes the model name, chat history, temperature, and
-        maximum tokens.
+        By default, it includes the model name, the part of the chat history
+        that fits in the context window, temperature, and maximum tokens.
 
         Returns:
             dict: A dictionary containing the default request data with the keys:
@@ -149,7 +323,7 @@ class APIClient(ABC):
         """
         return {
             "model": self.llm,
-            "messages": self.chat_history,
+            "messages": self._get_context_messages(),
             "temperature": self.temperature,
             "max_tokens": self.max_tokens
         }
@@ -159,6 +333,111 @@ class APIClient(ABC):
         """Method to implement to return the correct endpoint"""
         pass
 
+    def _get_base_url(self, default):
+        """Return the scheme and host of the provider's API.
+
+        The GILA_<COMPANY>_BASE_URL environment variable, or GILA_BASE_URL
+        for every company at once, replaces the default, e.g. to send the
+        requests to the local mock server.
+
+        Parameters:
+            default (str): The base URL of the real API.
+
+        Returns:
+            str: The base URL to use, without a trailing slash.
+        """
+        base_url = os.getenv(f"GILA_{self.company}_BASE_URL") or os.getenv("GILA_BASE_URL") or default
+        return base_url.rstrip("/")
+
+    def _build_stream_request_params(self, params):
+        """Turn the request parameters of a regular request into the ones of a
+        streaming request.
+
+        By default, it enables the OpenAI-compatible "stream" flag and asks
+        for token usage to be sent in the last chunk of the stream. This can
+        be overridden by providers that enable streaming differently.
+
+        Parameters:
+            params (dict): The parameters returned by _get_request_params.
+
+        Returns:
+            dict: The parameters to use for the streaming request.
+        """
+        data = dict(params["data"])
+        data["stream"] = True
+        data["stream_options"] = {"include_usage": True}
+        return {**params, "data": data}
+
+    def _parse_stream_event(self, event, usage):
+        """Extract the text delta carried by a streaming event.
+
+        Parses an OpenAI-compatible chat completion chunk and returns the
+        content of its first choice. If the chunk contains token usage (only
+        the last one does), it is stored in the usage dictionary. This method
+        can be overridden to parse other wire formats.
+
+        Parameters:
+            event (ServerSentEvent): The event received from the stream.
+            usage (dict): Dictionary collecting the usage reported by the stream.
+
+        Returns:
+            str: The text delta, or an empty string if the event carries none.
+
+        Raises:
+            Exception: If the event reports an error.
+        """
+        if event.data == "[DONE]":
+            return ""
+        chunk = json.loads(event.data)
+        if error := chunk.get("error"):
+            raise Exception(error.get("message", error) if isinstance(error, dict) else error)
+        if chunk.get("usage"):
+            usage.update(chunk["usage"])
+        choices = chunk.get("choices") or []
+        if not choices:
+            return ""
+        return choices[0].get("delta", {}).get("content") or ""
+
+    def _extract_stream_response_data(self, ai_response, usage):
+        """Build the AI response and response information at the end of a
+        stream.
+
+        By default, it wraps the collected text and usage in the shape of a
+        regular chat completion so that _extract_response_data can be reused.
+
+        Parameters:
+            ai_response (str): The concatenation of all text deltas.
+            usage (dict): The usage collected by _parse_stream_event.
+
+        Returns:
+            tuple: A tuple containing the AI response and the response info,
+                   like _extract_response_data.
+        """
+        response = {
+            "choices": [{"message": {"content": ai_response}}],
+            "usage": usage,
+        }
+        return self._extract_response_data(response)
+
+    async def _submit_streaming(self, params, on_delta):
+        """Send a streaming request and forward each text delta to on_delta.
+
+        Parameters:
+            params (dict): The parameters returned by _get_request_params.
+            on_delta (callable): Function called with each text delta.
+
+        Returns:
+            tuple: A tuple containing the full AI response and the response info.
+        """
+        chunks = []
+        usage = {}
+        stream_params = self._build_stream_request_params(params)
+        async for event in self._send_stream_request(**stream_params):
+            if delta := self._parse_stream_event(event, usage):
+                chunks.append(delta)
+                on_delta(delta)
+        return self._extract_stream_response_data("".join(chunks), usage)
+
     def _extract_response_data(self, response):
         """Extract the AI response and response information from the API response.
 
@@ -187,11 +466,9 @@ class APIClient(ABC):
         return ai_response, response_info
 
     def validate_api_key(self, api_key):
-        """Validate the provided API key by sending a test request.
+        """Validate the provided API key, blocking until the result is known.
 
-        Constructs a request with the given API key to check if it is valid.
-        It sends a test message to the API and evaluates the response: if the
-        response contains an error, the method returns False.
+        Synchronous wrapper that runs validate_api_key_async on the event loop.
 
         Parameters:
             api_key (str): The API key to validate.
@@ -199,20 +476,87 @@ class APIClient(ABC):
         Returns:
             bool: True if the API key is valid, False otherwise.
         """
-        endpoint = self._get_endpoint()
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}"
-        }
-        data = {
-            "model": self.llm,
-            "messages": [{"role": "user", "content": "test"}],
-            "max_tokens": 5,
-        }
-        response = self._send_request(endpoint=endpoint, headers=headers, data=data)
-        return False if "error" in response else True
+        return EVENT_LOOP.run(self.validate_api_key_async(api_key))
+
+    async def validate_api_key_async(self, api_key):
+        """Validate the provided API key.
+
+        Parameters:
+            api_key (str): The API key to validate.
+
+        Returns:
+            bool: True if the API key is valid, False otherwise.
+        """
+        return await self.check_api_key_async(api_key) is True
+
+    async def check_api_key_async(self, api_key):
+        """Check the provided API key with a request that costs no tokens.
+
+        Sends the request built by _build_validation_request, a listing of
+        the provider's models, and evaluates its status: a successful
+        response means that the key is valid, an authentication error that
+        it's not. Any other outcome, like a network error or an error of the
+        provider's server, says nothing about the key.
+
+        Parameters:
+            api_key (str): The API key to check.
+
+        Returns:
+            bool or None: True if the API key is valid, False if it was
+                          rejected, None if it couldn't be verified.
+        """
+        endpoint, headers = self._build_validation_request(api_key)
+        try:
+            response = await TRANSPORT.request(
+                "GET", endpoint, headers=headers,
+                timeout=self._get_timeout(), rate_limit=self._get_rate_limiter()
+            )
+        except httpx.HTTPError as e:
+            self._report_connectivity(endpoint, e)
+            return None
+        self._report_connectivity(endpoint)
+        if response.is_success:
+            return True
+        if response.status_code in (400, 401, 403):
+            return False
+        return None
+
+    def _build_validation_request(self, api_key):
+        """Return the endpoint and headers of the request that checks an API
+        key.
+
+        By default, it's the model listing of an OpenAI-compatible API, found
+        next to the chat completions endpoint. This can be overridden by
+        providers that list their models elsewhere or authenticate differently.
+
+        Parameters:
+            api_key (str): The API key to check.
+
+        Returns:
+            tuple: The endpoint (str) and the headers (dict) of the request.
+        """
+        endpoint = self._get_endpoint().removesuffix("/chat/completions") + "/models"
+        return endpoint, {"Authorization": f"Bearer {api_key}"}
+
+    def submit_prompt(self, prompt, on_delta=None):
+        """Submit a user prompt and block until the whole response is received.
+
+        Synchronous wrapper that runs submit_prompt_async on the event loop,
+        kept for callers living outside of it. on_delta, if given, is called
+        from the event loop thread.
 
-    def submit_prompt(self, prompt):
+        Parameters:
+            prompt (str): The user's prompt to be submitted to the AI.
+            on_delta (callable, optional): Function called with each text
+                                           delta of a streamed response.
+
+        Returns:
+            tuple: The same (success, ai_response, response_info) tuple
+                   returned by submit_prompt_async.
+        """
+        return EVENT_LOOP.run(self.submit_prompt_async(prompt, on_delta))
+
+    async def submit_prompt_async(self, prompt, on_delta=None):
         """Handle the submission of a user prompt to the AI model.
 
         Appends the formatted user message to the chat history, retrieves the
@@ -220,8 +564,23 @@ class APIClient(ABC):
         contains an error, it raises an exception. If the request is successful,
         extracts the AI response and updates the chat history with the AI's message.
 
+        If on_delta is given and the client supports streaming, the response
+        is streamed and every text delta is passed to on_delta as soon as it
+        arrives; the return value is the same as for a regular request.
+
+        Deterministic requests are answered from the response cache, when it
+        is enabled and has a matching entry; the response info of a cached
+        answer has a "Cached" item.
+
+        The AI message is added to the history the user message was added to,
+        even if the chat has been reset in the meantime. If the task is
+        cancelled, the unanswered user message is removed and the cancellation
+        is propagated.
+
         Parameters:
             prompt (str): The user's prompt to be submitted to the AI.
+            on_delta (callable, optional): Function called with each text
+                                           delta of a streamed response.
 
         Returns:
             tuple: A tuple containing:
@@ -232,22 +591,40 @@ class APIClient(ABC):
                 - response_info (dict or None): Information about the response
                                                 if successful, or None if failed.
         """
-        self.chat_history.append(self._format_user_message(prompt))
+        chat_history = self.chat_history
+        user_message = self._format_user_message(prompt)
+        chat_history.append(user_message)
 
         # Get request parameters (allows overrides for specific clients)
         params = self._get_request_params()
+        cache_key = RESPONSE_CACHE.get_key(params)
+        cached = RESPONSE_CACHE.get(cache_key) if cache_key else None
 
         try:
-            response = self._send_request(**params)
-            error_message = response.get("error")
-            if error_message:
-                raise Exception(error_message)
-
-            ai_response, response_info = self._extract_response_data(response)
+            if cached:
+                ai_response, response_info = cached[0], {**cached[1], "Cached": True}
+            elif on_delta is not None and self.supports_streaming:
+                ai_response, response_info = await self._submit_streaming(params, on_delta)
+            else:
+                response = await self._send_request(**params)
+                error_message = response.get("error")
+                if error_message:
+                    raise Exception(error_message)
+                ai_response, response_info = self._extract_response_data(response)
+
+            if not cached:
+                if cache_key:
+                    RESPONSE_CACHE.put(cache_key, ai_response, response_info)
+                if rate_limiter := self._get_rate_limiter():
+                    rate_limiter.record_usage(response_info)
             self.last_response_info = response_info
-            self.chat_history.append(self._format_ai_message(ai_response))
+            chat_history.append(self._format_ai_message(ai_response))
 
             return True, ai_response, response_info
+        except asyncio.CancelledError:
+            if chat_history and chat_history[-1] is user_message:
+                chat_history.pop()
+            raise
         except Exception as e:
             return False, str(e), None
 
@@ -290,23 +667,14 @@ class APIClient(ABC):
 
         Sets the chat history to the output of the _set_system_message method,
         which includes the system message that defines the behavior and context
-        for the AI assistant.
-        """
-        self.chat_history = self._set_system_message()
-
-    def reset_chat(self):
-        """Reset the chat state when a chat is interrupted.
-
-        Called by the controller whenever a chat is interrupted, either by
-        loading a saved chat or starting a new one. In the case of loading, 
-        the manager's restore_chat_from_id_slot will set the loaded state to True. 
-        Initializes the chat history with the system message, clears the custom
-        chat name, sets the loaded state to False, and generates a new chat ID.
+        for the AI assistant. Pinned messages and trimmed turns of the previous
+        history are forgotten.
         """
         self.chat_history = self._set_system_message()
-        self.chat_custom_name = None
-        self.is_loaded = False
-        self.generate_chat_id()
+        self.pinned_messages = set()
+        self.context_start = 0
+        self.chat_summary = None
+        self.summarized_until = 0
 
     def _set_system_message(self):
         """Include an optional message that sets the behavior and context for
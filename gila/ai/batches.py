@@ -0,0 +1,440 @@
+import asyncio
+import json
+import os
+import random
+import string
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from urllib.parse import urlsplit
+
+import httpx
+
+from .clients.anthropic import AnthropicClient
+from .clients.openai import ImageGenClient, OpenAIClient
+from .transport import TRANSPORT
+
+
+class BatchError(Exception):
+    """Raised when a provider rejects a batch request."""
+
+
+class BatchJob:
+    """State of a batch job, saved to disk after every change.
+
+    Statuses are the same for every provider: "created", "submitted",
+    "in_progress", then one of the final statuses "completed", "failed",
+    "expired" or "cancelled".
+    """
+
+    FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+    def __init__(self, job_id, model_name, company, directory):
+        self.job_id = job_id
+        self.model_name = model_name
+        self.company = company
+        self.directory = directory
+        self.status = "created"
+        self.provider_batch_id = None
+        # OpenAI only: ids of the uploaded input and of the result files
+        self.input_file_id = None
+        self.output_file_id = None
+        self.error_file_id = None
+        # Anthropic only: where the results can be downloaded from
+        self.results_url = None
+        self.request_counts = {}
+        self.error = None
+        self.created = time.time()
+        self.updated = self.created
+
+    @property
+    def input_path(self):
+        return os.path.join(self.directory, "input.jsonl")
+
+    @property
+    def results_path(self):
+        return os.path.join(self.directory, "results.jsonl")
+
+    def is_finished(self):
+        return self.status in self.FINAL_STATUSES
+
+    def to_dict(self):
+        data = dict(vars(self))
+        del data["directory"]
+        return data
+
+    @classmethod
+    def from_dict(cls, data, directory):
+        job = cls(data["job_id"], data["model_name"], data["company"], directory)
+        for key, value in data.items():
+            setattr(job, key, value)
+        return job
+
+
+class BatchProvider(ABC):
+    """Wire format of a provider's batch API.
+
+    Requests are built by a configured client, exactly as it would send them
+    one by one, so a batch answers like the interactive chat would. Every
+    request is identified by a custom_id, which the results refer to.
+    """
+
+    def __init__(self, client, base_url=None):
+        """
+        Parameters:
+            client (APIClient): Client configured with the model, the
+                                parameters and the API key of the batch.
+            base_url (str, optional): Scheme and host of the API, taken from
+                                      the client's endpoint if not given.
+        """
+        self.client = client
+        if base_url is None:
+            parts = urlsplit(client._get_endpoint())
+            base_url = f"{parts.scheme}://{parts.netloc}"
+        self.base_url = base_url.rstrip("/")
+
+    def build_request_body(self, prompt):
+        """Return the body the client would send for a chat made of prompt."""
+        self.client.set_chat_history()
+        self.client.chat_history.append(self.client._format_user_message(prompt))
+        return self.client._get_request_params()["data"]
+
+    @abstractmethod
+    def build_line(self, custom_id, body):
+        """Return a request of the batch, as the provider expects it."""
+        pass
+
+    @abstractmethod
+    async def submit(self, job, lines):
+        """Create the batch on the provider's side and record its ids on job."""
+        pass
+
+    @abstractmethod
+    async def poll(self, job):
+        """Update job with the state of the batch reported by the provider."""
+        pass
+
+    @abstractmethod
+    async def cancel(self, job):
+        """Ask the provider to stop processing the batch."""
+        pass
+
+    @abstractmethod
+    async def fetch_results(self, job):
+        """Return the (no_errors, response, response_info) triples of the
+        batch, keyed by custom_id."""
+        pass
+
+    def _get_headers(self):
+        return self.client._get_request_params()["headers"]
+
+    async def _request(self, method, path_or_url, **kwargs):
+        """Send a request to the batch API and return the response, raising
+        BatchError if it failed."""
+        url = path_or_url if "://" in path_or_url else f"{self.base_url}{path_or_url}"
+        headers = kwargs.pop("headers", None) or self._get_headers()
+        try:
+            response = await TRANSPORT.request(
+                method, url, headers=headers, timeout=self.client._get_timeout(), **kwargs
+            )
+        except httpx.HTTPError as e:
+            raise BatchError(self.client._get_transport_error_message(e)) from e
+        if response.is_error:
+            raise BatchError(self.client._get_error_message(response))
+        return response
+
+    def _parse_jsonl(self, text):
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    def _extract(self, body):
+        try:
+            ai_response, response_info = self.client._extract_response_data(body)
+        except (KeyError, IndexError, TypeError) as e:
+            return False, f"Unexpected response: {e}", None
+        return True, ai_response, response_info
+
+
+class OpenAIBatchProvider(BatchProvider):
+    """OpenAI Batch API: the requests are uploaded as a JSONL file, and the
+    results are downloaded as JSONL files too."""
+
+    STATUSES = {
+        "validating": "submitted",
+        "in_progress": "in_progress",
+        "finalizing": "in_progress",
+        "cancelling": "in_progress",
+        "completed": "completed",
+        "failed": "failed",
+        "expired": "expired",
+        "cancelled": "cancelled",
+    }
+
+    def _get_path(self):
+        return urlsplit(self.client._get_endpoint()).path
+
+    def build_line(self, custom_id, body):
+        return {"custom_id": custom_id, "method": "POST", "url": self._get_path(), "body": body}
+
+    async def submit(self, job, lines):
+        # The upload is multipart, httpx sets its own content type
+        headers = {"Authorization": f"Bearer {self.client.api_key}"}
+        content = "".join(json.dumps(line) + "\n" for line in lines).encode("utf-8")
+        response = await self._request(
+            "POST", "/v1/files", headers=headers,
+            data={"purpose": "batch"}, files={"file": ("batch.jsonl", content, "application/jsonl")},
+        )
+        job.input_file_id = response.json()["id"]
+        response = await self._request(
+            "POST", "/v1/batches",
+            json={"input_file_id": job.input_file_id, "endpoint": self._get_path(), "completion_window": "24h"},
+        )
+        self._update(job, response.json())
+
+    async def poll(self, job):
+        response = await self._request("GET", f"/v1/batches/{job.provider_batch_id}")
+        self._update(job, response.json())
+
+    async def cancel(self, job):
+        response = await self._request("POST", f"/v1/batches/{job.provider_batch_id}/cancel")
+        self._update(job, response.json())
+
+    def _update(self, job, batch):
+        job.provider_batch_id = batch["id"]
+        job.status = self.STATUSES.get(batch.get("status"), job.status)
+        job.output_file_id = batch.get("output_file_id")
+        job.error_file_id = batch.get("error_file_id")
+        job.request_counts = batch.get("request_counts") or {}
+        if errors := (batch.get("errors") or {}).get("data"):
+            job.error = "; ".join(error.get("message", "") for error in errors)
+
+    async def fetch_results(self, job):
+        results = {}
+        for file_id in (job.output_file_id, job.error_file_id):
+            if not file_id:
+                continue
+            response = await self._request("GET", f"/v1/files/{file_id}/content")
+            for line in self._parse_jsonl(response.text):
+                results[line["custom_id"]] = self._parse_result(line)
+        return results
+
+    def _parse_result(self, line):
+        if error := line.get("error"):
+            return False, error.get("message", str(error)), None
+        response = line.get("response") or {}
+        body = response.get("body") or {}
+        if response.get("status_code", 200) >= 400:
+            error = body.get("error")
+            return False, str(error["message"] if isinstance(error, dict) else error), None
+        return self._extract(body)
+
+
+class AnthropicBatchProvider(BatchProvider):
+    """Anthropic Message Batches API: the requests are sent in the body of
+    the creation request, and the results are downloaded as JSONL."""
+
+    def build_line(self, custom_id, body):
+        return {"custom_id": custom_id, "params": body}
+
+    async def submit(self, job, lines):
+        response = await self._request("POST", "/v1/messages/batches", json={"requests": lines})
+        self._update(job, response.json())
+
+    async def poll(self, job):
+        response = await self._request("GET", f"/v1/messages/batches/{job.provider_batch_id}")
+        self._update(job, response.json())
+
+    async def cancel(self, job):
+        response = await self._request("POST", f"/v1/messages/batches/{job.provider_batch_id}/cancel")
+        self._update(job, response.json())
+
+    def _update(self, job, batch):
+        job.provider_batch_id = batch["id"]
+        job.request_counts = batch.get("request_counts") or {}
+        job.results_url = batch.get("results_url")
+        if batch.get("processing_status") != "ended":
+            job.status = "in_progress"
+        elif batch.get("cancel_initiated_at"):
+            job.status = "cancelled"
+        else:
+            job.status = "completed"
+
+    async def fetch_results(self, job):
+        if not job.results_url:
+            return {}
+        response = await self._request("GET", job.results_url)
+        return {line["custom_id"]: self._parse_result(line) for line in self._parse_jsonl(response.text)}
+
+    def _parse_result(self, line):
+        result = line.get("result") or {}
+        result_type = result.get("type")
+        if result_type == "succeeded":
+            return self._extract(result["message"])
+        if result_type == "errored":
+            error = result.get("error") or {}
+            return False, (error.get("error") or error).get("message", "Request failed."), None
+        return False, f"Request {result_type}.", None
+
+
+class BatchManager:
+    """Run large sets of prompts through the providers' batch APIs.
+
+    Batches are processed asynchronously by the provider, within a day and at
+    half the price of the same requests sent one by one. Every job lives in a
+    directory of its own, with its state in job.json, the rows to process in
+    input.jsonl and, once finished, the merged results in results.jsonl, in
+    the same order as the input. Since the state is saved after every change,
+    a job can be polled again after the application has been closed.
+    """
+
+    PROVIDERS = ((AnthropicClient, AnthropicBatchProvider), (OpenAIClient, OpenAIBatchProvider))
+
+    def __init__(self, directory="storage/batches", poll_interval=10, max_poll_interval=300, base_urls=None):
+        """
+        Parameters:
+            directory (str): Where the jobs are stored.
+            poll_interval (float): Seconds before the first status check.
+            max_poll_interval (float): Longest wait between two checks, the
+                                       wait grows by half after each one.
+            base_urls (dict, optional): Scheme and host to use instead of the
+                                        real API, keyed by company.
+        """
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.base_urls = base_urls or {}
+
+    def get_provider(self, client):
+        """Return the batch provider of client, raising BatchError if its
+        company has no batch API supported by Gila."""
+        if not isinstance(client, ImageGenClient):
+            for client_class, provider_class in self.PROVIDERS:
+                if isinstance(client, client_class):
+                    return provider_class(client, self.base_urls.get(client.company))
+        raise BatchError(f"Batches are not supported for {client.llm_name}.")
+
+    def create_job(self, client, rows):
+        """Prepare a job for rows and save it, without sending anything.
+
+        Parameters:
+            client (APIClient): Client configured for the job, see
+                                AIManager.create_client.
+            rows (list): Dictionaries with a "prompt" key and optionally an
+                         "id", which is copied to the results.
+
+        Returns:
+            BatchJob: The new job.
+        """
+        provider = self.get_provider(client)
+        job_id = "".join(random.choices(string.ascii_letters + string.digits, k=10))
+        job = BatchJob(job_id, client.llm_name, client.company, os.path.join(self.directory, job_id))
+        os.makedirs(job.directory, exist_ok=True)
+        lines = []
+        for index, row in enumerate(rows):
+            custom_id = f"row-{index}"
+            line = provider.build_line(custom_id, provider.build_request_body(row["prompt"]))
+            lines.append({"row": row, "request": line})
+        self._write_atomic(job.input_path, "".join(json.dumps(line) + "\n" for line in lines))
+        self.save_job(job)
+        return job
+
+    def load_job(self, job_id):
+        """Return the saved job with id job_id."""
+        directory = os.path.join(self.directory, job_id)
+        with open(os.path.join(directory, "job.json"), "r", encoding="utf-8") as f:
+            return BatchJob.from_dict(json.load(f), directory)
+
+    def list_jobs(self):
+        """Return every saved job, the most recent first."""
+        jobs = []
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                try:
+                    jobs.append(self.load_job(entry.name))
+                except (OSError, ValueError, KeyError):
+                    continue
+        return sorted(jobs, key=lambda job: job.created, reverse=True)
+
+    def save_job(self, job):
+        job.updated = time.time()
+        self._write_atomic(os.path.join(job.directory, "job.json"), json.dumps(job.to_dict(), indent=4))
+
+    async def submit_async(self, job, client):
+        """Send the job's requests to the provider."""
+        provider = self.get_provider(client)
+        lines = [line["request"] for line in self._read_input(job)]
+        try:
+            await provider.submit(job, lines)
+        except BatchError as e:
+            job.status, job.error = "failed", str(e)
+            raise
+        finally:
+            self.save_job(job)
+
+    async def cancel_async(self, job, client):
+        """Ask the provider to stop the job; finished requests are kept."""
+        await self.get_provider(client).cancel(job)
+        self.save_job(job)
+
+    async def wait_async(self, job, client, on_update=None):
+        """Poll the job until it is finished, then merge its results.
+
+        Checks start every poll_interval seconds and get rarer, up to
+        max_poll_interval, since large batches take hours. Errors while
+        polling are retried by the transport, and then at the next check.
+
+        Parameters:
+            job (BatchJob): A submitted job.
+            client (APIClient): Client configured for the job's company.
+            on_update (callable, optional): Function called with the job
+                                            after every check.
+
+        Returns:
+            str: The path of the results file.
+        """
+        provider = self.get_provider(client)
+        interval = self.poll_interval
+        while not job.is_finished():
+            await asyncio.sleep(interval)
+            try:
+                await provider.poll(job)
+            except BatchError as e:
+                print(f"Batch {job.job_id} not polled: {e}")
+            self.save_job(job)
+            if on_update is not None:
+                on_update(job)
+            interval = min(self.max_poll_interval, interval * 1.5)
+        results = await provider.fetch_results(job)
+        self._write_results(job, results)
+        return job.results_path
+
+    async def run_async(self, client, rows, on_update=None):
+        """Create, submit and wait for a job, returning it once finished."""
+        job = self.create_job(client, rows)
+        await self.submit_async(job, client)
+        await self.wait_async(job, client, on_update)
+        return job
+
+    def _write_results(self, job, results):
+        """Write one line per input row, in the input order, with the
+        response or the reason why there is none."""
+        lines = []
+        for line in self._read_input(job):
+            custom_id = line["request"]["custom_id"]
+            no_errors, response, response_info = results.get(
+                custom_id, (False, f"No result, the batch is {job.status}.", None)
+            )
+            lines.append({**line["row"], "ok": no_errors, "response": response, "response_info": response_info})
+        self._write_atomic(job.results_path, "".join(json.dumps(line) + "\n" for line in lines))
+
+    def _read_input(self, job):
+        with open(job.input_path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    @staticmethod
+    def _write_atomic(path, text):
+        """Write text to path through a temporary file, so that an
+        interrupted write never leaves a partial job behind."""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
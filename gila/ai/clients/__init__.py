@@ -1,8 +1,24 @@
-from .anthropic import AnthropicClient
-from .arli import ArliClient
-from .cohere import CohereClient
-from .deepseek import DeepSeekClient
-from .google import GoogleClient
-from .groq import GroqClient
-from .mistral import MistralClient
-from .openai import GPTClient, OClient, ImageGenClient
\ No newline at end of file
+import importlib
+
+
+# Provider modules are imported the first time one of their clients is used
+_CLIENT_MODULES = {
+    "AnthropicClient": "anthropic",
+    "ArliClient": "arli",
+    "CohereClient": "cohere",
+    "DeepSeekClient": "deepseek",
+    "GoogleClient": "google",
+    "GroqClient": "groq",
+    "MistralClient": "mistral",
+    "GPTClient": "openai",
+    "OClient": "openai",
+    "ImageGenClient": "openai",
+}
+
+__all__ = list(_CLIENT_MODULES)
+
+
+def __getattr__(name):
+    if module_name := _CLIENT_MODULES.get(name):
+        return getattr(importlib.import_module(f".{module_name}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
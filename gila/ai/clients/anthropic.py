@@ -1,14 +1,21 @@
+import json
+
 from ..api_client import APIClient
 
 
 class AnthropicClient(APIClient):
+    supports_streaming = True
+    # Marks a block as the end of a prefix that Anthropic keeps cached for
+    # a few minutes, so later requests starting with it are billed and
+    # processed as cache reads
+    CACHE_CONTROL = {"type": "ephemeral"}
 
     def __init__(self, llm):
         super().__init__(llm)
         self.company = "ANTHROPIC"
 
     def _get_endpoint(self):
-        return "https://api.anthropic.com/v1/messages"
+        return f"{self._get_base_url('https://api.anthropic.com')}/v1/messages"
 
     def _set_system_message(self):
         """System prompt must be set as a top-level system parameter,
@@ -16,14 +23,38 @@ class AnthropicClient(APIClient):
         return []
 
     def _build_default_request_data(self):
-        """Creates request data adding <system> paraneter."""
-        return {
+        """Creates request data adding <system> paraneter.
+
+        The system prompt and the history up to the last message are marked
+        as cacheable: each turn moves the history breakpoint forward, so the
+        next request reads everything but the newest messages from the cache.
+        Prefixes shorter than the model's minimum are simply not cached.
+        """
+        request_data = {
             "model": self.llm,
-            "messages": self.chat_history,
+            "messages": self._build_cached_messages(),
             "temperature": self.temperature,
             "max_tokens": self.max_tokens,
-            "system": self.system_message,
         }
+        if self.system_message:
+            request_data["system"] = [
+                {"type": "text", "text": self.system_message, "cache_control": self.CACHE_CONTROL}
+            ]
+        return request_data
+
+    def _build_cached_messages(self):
+        """Return a copy of the messages to send whose last one carries a
+        cache breakpoint, leaving the stored history untouched."""
+        messages = list(self._get_context_messages())
+        if not messages:
+            return messages
+        last_message = messages[-1]
+        content = last_message["content"]
+        if isinstance(content, str):
+            content = [{"type": "text", "text": content}]
+        content = [*content[:-1], {**content[-1], "cache_control": self.CACHE_CONTROL}]
+        messages[-1] = {**last_message, "content": content}
+        return messages
 
     def _get_request_params(self):
         endpoint = self._get_endpoint()
@@ -39,11 +70,55 @@ class AnthropicClient(APIClient):
             "data": data,
         }
 
+    def _build_validation_request(self, api_key):
+        endpoint = f"{self._get_base_url('https://api.anthropic.com')}/v1/models?limit=1"
+        headers = {
+            "anthropic-version": "2023-06-01",
+            "x-api-key": f"{api_key}"
+        }
+        return endpoint, headers
+
     def _extract_response_data(self, response):
+        """Prompt tokens only count the part of the prompt that wasn't read
+        from or written to the cache, which is reported separately"""
         ai_response = response["content"][0]["text"]
+        usage = response.get("usage", {})
         response_info = {
-            "Prompt tokens": response.get("usage", {}).get("tokens", {}).get("input_tokens", 0),
-            "Completion tokens": response.get("usage", {}).get("tokens", {}).get("output_tokens", 0),
-            "Total tokens": None
+            "Prompt tokens": usage.get("input_tokens", 0),
+            "Completion tokens": usage.get("output_tokens", 0),
+            "Total tokens": None,
+            "Cache creation tokens": usage.get("cache_creation_input_tokens") or 0,
+            "Cache read tokens": usage.get("cache_read_input_tokens") or 0,
         }
         return ai_response, response_info
+
+    def _build_stream_request_params(self, params):
+        """Messages API streams when <stream> is set, usage is always included"""
+        data = dict(params["data"])
+        data["stream"] = True
+        return {**params, "data": data}
+
+    def _parse_stream_event(self, event, usage):
+        """Parse Messages API events: input tokens arrive with message_start,
+        text with content_block_delta and the final output tokens with
+        message_delta"""
+        payload = json.loads(event.data)
+        event_type = payload.get("type")
+        if event_type == "error":
+            raise Exception(payload.get("error", {}).get("message", event.data))
+        if event_type == "message_start":
+            usage.update(payload.get("message", {}).get("usage", {}))
+        elif event_type == "message_delta":
+            usage.update(payload.get("usage", {}))
+        elif event_type == "content_block_delta":
+            delta = payload.get("delta", {})
+            if delta.get("type") == "text_delta":
+                return delta.get("text", "")
+        return ""
+
+    def _extract_stream_response_data(self, ai_response, usage):
+        response = {
+            "content": [{"text": ai_response}],
+            "usage": usage,
+        }
+        return self._extract_response_data(response)
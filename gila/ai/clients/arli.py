@@ -2,10 +2,11 @@ from ..api_client import APIClient
 
 
 class ArliClient(APIClient):
+    supports_streaming = True
 
     def __init__(self, llm):
         super().__init__(llm)
         self.company = "ARLI"
 
     def _get_endpoint(self):
-        return "https://api.arliai.com/v1/chat/completions"
+        return f"{self._get_base_url('https://api.arliai.com')}/v1/chat/completions"
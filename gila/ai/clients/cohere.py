@@ -1,14 +1,21 @@
+import json
+
 from ..api_client import APIClient
 
 
 class CohereClient(APIClient):
+    supports_streaming = True
 
     def __init__(self, llm):
         super().__init__(llm)
         self.company = "COHERE"
 
     def _get_endpoint(self):
-        return "https://api.cohere.com/v2/chat"
+        return f"{self._get_base_url('https://api.cohere.com')}/v2/chat"
+
+    def _build_validation_request(self, api_key):
+        endpoint = f"{self._get_base_url('https://api.cohere.com')}/v1/models?page_size=1"
+        return endpoint, {"Authorization": f"Bearer {api_key}"}
 
     def _extract_response_data(self, response):
         ai_response = response["message"]["content"][0]["text"]
@@ -18,3 +25,36 @@ class CohereClient(APIClient):
             "Total tokens": None
         }
         return ai_response, response_info
+
+    def _build_stream_request_params(self, params):
+        """Chat v2 streams when <stream> is set, usage comes with message-end"""
+        data = dict(params["data"])
+        data["stream"] = True
+        return {**params, "data": data}
+
+    # Reasons a stream ends because of a failure instead of an answer
+    STREAM_ERROR_REASONS = ("ERROR", "TIMEOUT")
+
+    def _parse_stream_event(self, event, usage):
+        """Parse Chat v2 events: text arrives with content-delta and the usage
+        with the terminal message-end event, which also tells whether the
+        generation failed"""
+        payload = json.loads(event.data)
+        event_type = payload.get("type")
+        if event_type == "error" or (event_type is None and "message" in payload):
+            raise Exception(payload.get("message") or payload.get("error") or event.data)
+        if event_type == "content-delta":
+            return payload.get("delta", {}).get("message", {}).get("content", {}).get("text", "")
+        if event_type == "message-end":
+            delta = payload.get("delta", {})
+            if (finish_reason := delta.get("finish_reason")) in self.STREAM_ERROR_REASONS:
+                raise Exception(delta.get("error") or f"The response stopped with {finish_reason}.")
+            usage.update(delta.get("usage", {}))
+        return ""
+
+    def _extract_stream_response_data(self, ai_response, usage):
+        response = {
+            "message": {"content": [{"text": ai_response}]},
+            "usage": usage,
+        }
+        return self._extract_response_data(response)
@@ -1,7 +1,10 @@
+import json
+
 from ..api_client import APIClient
 
 
 class GoogleClient(APIClient):
+    supports_streaming = True
 
     def __init__(self, llm):
         super().__init__(llm)
@@ -15,7 +18,7 @@ class GoogleClient(APIClient):
             "system_instruction":
                 {"parts": {
                     "text": self.system_message if self.system_message else ""}},
-            "contents": self.chat_history,
+            "contents": self._get_context_messages(),
             "generationConfig": {
                 "temperature": self.temperature,
                 "maxOutputTokens": self.max_tokens,
@@ -28,7 +31,7 @@ class GoogleClient(APIClient):
         }
 
     def _get_endpoint(self):
-        return "https://generativelanguage.googleapis.com/v1beta/models"
+        return f"{self._get_base_url('https://generativelanguage.googleapis.com')}/v1beta/models"
 
     def _set_system_message(self):
         return []
@@ -48,16 +51,34 @@ class GoogleClient(APIClient):
         }
         return ai_response, response_info
 
-    def validate_api_key(self, api_key):
-        base_endpoint = self._get_endpoint()
-        endpoint= f"{base_endpoint}/{self.llm}:generateContent?key={api_key}"
-        headers = {
-            "Content-Type": "application/json",
-        }
-        data = {
-            "contents": [{
-                "parts":[{"text": "test"}]
-            }]
+    def _build_stream_request_params(self, params):
+        """Streaming uses a different method of the same model endpoint,
+        alt=sse makes it return server-sent events instead of a JSON array"""
+        endpoint = params["endpoint"].replace(
+            ":generateContent?", ":streamGenerateContent?alt=sse&"
+        )
+        return {**params, "endpoint": endpoint}
+
+    def _parse_stream_event(self, event, usage):
+        """Every event is a partial GenerateContentResponse, the last one
+        carries the final usageMetadata"""
+        chunk = json.loads(event.data)
+        if error := chunk.get("error"):
+            raise Exception(error.get("message", error))
+        if chunk.get("usageMetadata"):
+            usage.update(chunk["usageMetadata"])
+        candidates = chunk.get("candidates") or []
+        if not candidates:
+            return ""
+        parts = candidates[0].get("content", {}).get("parts", [])
+        return "".join(part.get("text", "") for part in parts)
+
+    def _extract_stream_response_data(self, ai_response, usage):
+        response = {
+            "candidates": [{"content": {"parts": [{"text": ai_response}]}}],
+            "usageMetadata": usage,
         }
-        response = self._send_request(headers=headers, endpoint=endpoint, data=data)
-        return False if "error" in response else True
+        return self._extract_response_data(response)
+
+    def _build_validation_request(self, api_key):
+        return f"{self._get_endpoint()}?key={api_key}&pageSize=1", {}
@@ -1,23 +1,23 @@
-import requests
+import json
 
 from ..api_client import APIClient
 
 
 class GroqClient(APIClient):
+    supports_streaming = True
 
     def __init__(self, llm):
         super().__init__(llm)
         self.company = "GROQ"
 
     def _get_endpoint(self):
-        return "https://api.groq.com/openai/v1/chat/completions"
+        return f"{self._get_base_url('https://api.groq.com')}/openai/v1/chat/completions"
 
-    def _send_request(self, endpoint, headers, data):
-        """Override base method to show more specific errors"""
-        try:
-            response = requests.post(f"{endpoint}", headers=headers, json=data)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
-            response_error = response.json()["error"]["message"]
-            return {"error": str(response_error)}
+    def _parse_stream_event(self, event, usage):
+        """Groq reports the usage of a stream in the x_groq field of the last
+        chunk"""
+        if event.data != "[DONE]":
+            chunk = json.loads(event.data)
+            if groq_usage := chunk.get("x_groq", {}).get("usage"):
+                usage.update(groq_usage)
+        return super()._parse_stream_event(event, usage)
@@ -2,11 +2,18 @@ from ..api_client import APIClient
 
 
 class MistralClient(APIClient):
+    supports_streaming = True
 
     def __init__(self, llm):
         super().__init__(llm)
         self.company = "MISTRAL"
 
     def _get_endpoint(self):
-        return "https://api.mistral.ai/v1/chat/completions"
+        return f"{self._get_base_url('https://api.mistral.ai')}/v1/chat/completions"
 
+    def _build_stream_request_params(self, params):
+        """Mistral doesn't accept stream_options: usage is always sent in the
+        last chunk of the stream"""
+        data = dict(params["data"])
+        data["stream"] = True
+        return {**params, "data": data}
@@ -1,26 +1,15 @@
-import requests
-
 from ..api_client import APIClient
 
 
 class OpenAIClient(APIClient):
+    supports_streaming = True
 
     def __init__(self, llm):
         super().__init__(llm)
         self.company = "OPENAI"
 
     def _get_endpoint(self):
-        return "https://api.openai.com/v1/chat/completions"
-
-    def _send_request(self, endpoint, headers, data):
-        """Override base method to show more specific errors"""
-        try:
-            response = requests.post(f"{endpoint}", headers=headers, json=data)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
-            response_error = response.json()["error"]["message"]
-            return {"error": str(response_error)}
+        return f"{self._get_base_url('https://api.openai.com')}/v1/chat/completions"
 
 
 class GPTClient(OpenAIClient):
@@ -34,6 +23,8 @@ class GPTClient(OpenAIClient):
 
 
 class OClient(OpenAIClient):
+    # Reasoning models can think for minutes before the first token
+    read_timeout = 600
 
     def __init__(self, llm):
         super().__init__(llm)
@@ -47,7 +38,7 @@ class OClient(OpenAIClient):
         """
         request_data = {
             "model": self.llm,
-            "messages": self.chat_history,
+            "messages": self._get_context_messages(),
             "max_completion_tokens": self.max_completion_tokens
         }
 
@@ -64,11 +55,18 @@ class OClient(OpenAIClient):
 
 
 class ImageGenClient(OpenAIClient):
+    supports_streaming = False
+    read_timeout = 180
+
     def __init__(self, llm):
         super().__init__(llm)
 
     def _get_endpoint(self):
-        return "https://api.openai.com/v1/images/generations"
+        return f"{self._get_base_url('https://api.openai.com')}/v1/images/generations"
+
+    def _build_validation_request(self, api_key):
+        endpoint = f"{self._get_base_url('https://api.openai.com')}/v1/models"
+        return endpoint, {"Authorization": f"Bearer {api_key}"}
 
     def _get_request_params(self, prompt):
         endpoint = self._get_endpoint()
@@ -87,10 +85,11 @@ class ImageGenClient(OpenAIClient):
             "data": data,
         }
     
-    def submit_prompt(self, prompt):
+    async def submit_prompt_async(self, prompt, on_delta=None):
+        """Image generation has no incremental output, so on_delta is ignored"""
         params = self._get_request_params(prompt)
         try:
-            response = self._send_request(**params)
+            response = await self._send_request(**params)
             error_message = response.get("error")
             if error_message:
                 raise Exception(error_message)
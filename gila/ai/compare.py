@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+
+class CompareSession:
+    """Send the same prompt to several models at once.
+
+    Every model is served by a client instance of its own, so each one keeps
+    its own copy of the conversation while the comparison goes on and the
+    client of the current chat is never touched. Prompts are submitted
+    concurrently on the event loop: a round lasts as long as the slowest
+    model, not the sum of all of them.
+    """
+
+    def __init__(self, clients):
+        """
+        Parameters:
+            clients (dict): Client instances keyed by the readable model name,
+                            already configured and with their history set.
+        """
+        self.clients = clients
+
+    def get_model_names(self):
+        """Return the names of the compared models, in insertion order."""
+        return list(self.clients.keys())
+
+    async def submit_prompt_async(self, prompt, on_result):
+        """Submit prompt to every model and report each result as it arrives.
+
+        Parameters:
+            prompt (str): The user's prompt.
+            on_result (callable): Function called with the model name, the
+                                  success flag, the response or the error
+                                  message, the response info and the latency
+                                  in seconds of each model.
+
+        Returns:
+            float: The wall time of the whole round, in seconds.
+        """
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            self._submit_to_model(model_name, client, prompt, on_result)
+            for model_name, client in self.clients.items()
+        ))
+        return time.perf_counter() - started
+
+    async def _submit_to_model(self, model_name, client, prompt, on_result):
+        """Submit prompt to a single model and pass its result to on_result."""
+        if client.api_key is None:
+            on_result(model_name, False, f"Missing {client.company} API key.", {}, 0.0)
+            return
+        started = time.perf_counter()
+        no_errors, response_message, response_info = await client.submit_prompt_async(prompt)
+        latency = time.perf_counter() - started
+        if not no_errors:
+            # Keep the history consistent with what the model has answered
+            client.chat_history.pop()
+        on_result(model_name, no_errors, response_message, response_info or {}, latency)
@@ -0,0 +1,109 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+from .event_loop import EVENT_LOOP
+from .transport import TRANSPORT
+
+
+class HostState:
+    """Last known reachability of a host."""
+
+    def __init__(self, reachable, checked_at, latency=None):
+        self.reachable = reachable
+        self.checked_at = checked_at
+        self.latency = latency
+
+
+class ConnectivityMonitor:
+    """Cached reachability of the providers' hosts, checked in the background.
+
+    Reading the state never blocks: is_reachable returns what is known and,
+    if it's older than ttl seconds, schedules a new probe on EVENT_LOOP. A
+    probe is a HEAD request to the root of the provider's API, since any
+    response, even an error status, proves that the host can be reached.
+    The probe also leaves a kept-alive connection in the transport's pool,
+    ready for the first prompt.
+
+    Clients report the outcome of their own requests too, so the state is
+    kept up to date by regular use without extra traffic.
+    """
+
+    def __init__(self, ttl=30, probe_timeout=3):
+        self.ttl = ttl
+        self.probe_timeout = probe_timeout
+        self._states = {}
+        self._probing = set()
+        self._lock = threading.Lock()
+
+    def is_reachable(self, url):
+        """Return whether the host of url was reachable at the last check.
+
+        Hosts that have never been checked are assumed reachable: an actual
+        failure will be reported by the request itself.
+
+        Parameters:
+            url (str): Any URL of the provider's API.
+
+        Returns:
+            bool: The last known state.
+        """
+        host = self._get_host(url)
+        state = self._states.get(host)
+        if state is None or time.monotonic() - state.checked_at > self.ttl:
+            self.refresh(url)
+        return state is None or state.reachable
+
+    def get_state(self, url):
+        """Return the HostState of url's host, or None if it was never checked."""
+        return self._states.get(self._get_host(url))
+
+    def refresh(self, url):
+        """Probe the host of url in the background, unless a probe is
+        already running."""
+        host = self._get_host(url)
+        with self._lock:
+            if host in self._probing:
+                return
+            self._probing.add(host)
+        EVENT_LOOP.submit(self._probe(host))
+
+    def report(self, url, reachable):
+        """Record the outcome of a request sent to url.
+
+        Parameters:
+            url (str): The URL the request was sent to.
+            reachable (bool): False if the host couldn't be connected to.
+        """
+        self._states[self._get_host(url)] = HostState(reachable, time.monotonic())
+
+    async def check(self, url):
+        """Probe the host of url now and return whether it's reachable."""
+        host = self._get_host(url)
+        with self._lock:
+            self._probing.add(host)
+        await self._probe(host)
+        return self._states[host].reachable
+
+    async def _probe(self, host):
+        started = time.monotonic()
+        try:
+            await TRANSPORT.request("HEAD", f"{host}/", timeout=httpx.Timeout(self.probe_timeout), max_retries=0)
+            reachable = True
+        except httpx.HTTPError:
+            reachable = False
+        finally:
+            with self._lock:
+                self._probing.discard(host)
+        now = time.monotonic()
+        self._states[host] = HostState(reachable, now, now - started if reachable else None)
+
+    @staticmethod
+    def _get_host(url):
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+
+CONNECTIVITY = ConnectivityMonitor()
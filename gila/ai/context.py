@@ -0,0 +1,112 @@
+from .tokenizer import Tokenizer
+
+
+def get_message_text(message):
+    """Return the text of a message, whatever the provider's message format."""
+    content = message.get("content", message.get("parts"))
+    if isinstance(content, list):
+        return " ".join(block.get("text", "") for block in content if isinstance(block, dict))
+    return content if isinstance(content, str) else ""
+
+
+class ContextWindow:
+    """Choose which messages of a chat history are sent to the model, so that
+    the prompt fits in the model's context window.
+
+    The history is split in turns, each starting with a user message. Leading
+    system messages, pinned turns and the last turn are always sent; when the
+    estimated prompt is larger than the budget, the oldest remaining turns
+    are dropped.
+
+    Trimming frees more room than strictly needed, down to TRIM_TARGET of
+    the budget, and the point where the sent history starts only moves
+    forward. Following turns then send the same prefix until the budget is
+    full again, instead of dropping a turn every time, which keeps the cost
+    of counting tokens bounded and the prefix cacheable by providers.
+    """
+
+    # Estimated tokens added by the message structure itself
+    MESSAGE_OVERHEAD = 4
+    TRIM_TARGET = 0.75
+    SYSTEM_ROLES = ("system", "developer")
+
+    def __init__(self, tokenizer=None):
+        self.tokenizer = tokenizer or Tokenizer()
+
+    def count_text_tokens(self, text):
+        """Return the estimated number of tokens of text."""
+        return self.tokenizer.get_num_of_tokens(text) if text else 0
+
+    def count_message_tokens(self, message):
+        """Return the estimated number of tokens of a message."""
+        return self.count_text_tokens(get_message_text(message)) + self.MESSAGE_OVERHEAD
+
+    def fit(self, messages, max_tokens, pinned=(), start=0):
+        """Return the messages to send within max_tokens.
+
+        Parameters:
+            messages (list): The whole chat history.
+            max_tokens (int): Estimated tokens available for the prompt.
+            pinned (set): Indices of messages that must always be sent,
+                          together with the rest of their turn.
+            start (int): Index before which unpinned turns have already been
+                         dropped by a previous call.
+
+        Returns:
+            tuple: A tuple containing:
+                - messages (list): The messages to send, in their order.
+                - start (int): The start to pass to the next call.
+        """
+        system_end = self.get_system_end(messages)
+        turns = [
+            turn for turn in self.split_turns(messages, system_end)
+            if turn[0] >= start or self.is_pinned(turn, pinned)
+        ]
+        turn_tokens = {
+            turn: sum(self.count_message_tokens(message) for message in messages[turn[0]:turn[1]])
+            for turn in turns
+        }
+        total = sum(self.count_message_tokens(message) for message in messages[:system_end])
+        total += sum(turn_tokens.values())
+
+        if total > max_tokens:
+            target = max_tokens * self.TRIM_TARGET
+            for turn in turns[:-1]:
+                if self.is_pinned(turn, pinned):
+                    continue
+                turns.remove(turn)
+                total -= turn_tokens[turn]
+                start = turn[1]
+                if total <= target:
+                    break
+
+        kept = messages[:system_end]
+        for begin, end in turns:
+            kept.extend(messages[begin:end])
+        return kept, start
+
+    def get_system_end(self, messages):
+        """Return the index of the first message that isn't a system message."""
+        system_end = 0
+        while system_end < len(messages) and messages[system_end].get("role") in self.SYSTEM_ROLES:
+            system_end += 1
+        return system_end
+
+    def split_turns(self, messages, begin):
+        """Return the (begin, end) index ranges of the turns of messages,
+        starting from index begin."""
+        turns = []
+        for index in range(begin, len(messages)):
+            if index == begin or messages[index].get("role") == "user":
+                turns.append([index, index + 1])
+            else:
+                turns[-1][1] = index + 1
+        return [tuple(turn) for turn in turns]
+
+    @staticmethod
+    def is_pinned(turn, pinned):
+        """Return True if a message of the (begin, end) turn is pinned."""
+        return any(turn[0] <= index < turn[1] for index in pinned)
+
+
+CONTEXT_WINDOW = ContextWindow()
@@ -0,0 +1,122 @@
+import io
+import os
+import tempfile
+import threading
+
+
+class CredentialStore:
+    """API keys of the companies, read from the .env file into memory.
+
+    The file is parsed the first time a key is needed and again only when
+    its modification time or size changes, so a lookup is a dictionary read
+    and a stat call. Keys are saved by rewriting the whole file to a
+    temporary one that then replaces it, so the file never holds duplicates
+    and is never left half written. Only the line of the saved key changes:
+    comments, blank lines and the other variables are kept as they are.
+
+    As with load_dotenv, a <COMPANY>_API_KEY environment variable takes
+    precedence over the file.
+    """
+
+    SUFFIX = "_API_KEY"
+
+    def __init__(self, path=".env"):
+        self.path = path
+        self._values = {}
+        # (name, text) of every entry of the file, name is None for comments
+        self._entries = []
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def get(self, company):
+        """Return the API key of company, or None if there isn't one.
+
+        Parameters:
+            company (str): The name of the company, in uppercase.
+
+        Returns:
+            str or None: The API key.
+        """
+        name = f"{company}{self.SUFFIX}"
+        if key := os.environ.get(name):
+            return key
+        with self._lock:
+            self._reload_if_changed()
+            return self._values.get(name) or None
+
+    def set(self, company, api_key):
+        """Store the API key of company, replacing the previous one.
+
+        Parameters:
+            company (str): The name of the company, in uppercase.
+            api_key (str): The API key to store.
+        """
+        with self._lock:
+            self._reload_if_changed()
+            self._write(f"{company}{self.SUFFIX}", api_key)
+
+    def _reload_if_changed(self):
+        signature = self._get_signature()
+        if signature == self._signature:
+            return
+        text = ""
+        if signature is not None:
+            with open(self.path, "r", encoding="utf-8") as file:
+                text = file.read()
+        self._parse(text)
+        self._signature = signature
+
+    def _parse(self, text):
+        from dotenv import dotenv_values
+        from dotenv.parser import parse_stream
+
+        self._values = {
+            name: value for name, value in dotenv_values(stream=io.StringIO(text)).items() if value is not None
+        }
+        self._entries = [(binding.key, binding.original.string) for binding in parse_stream(io.StringIO(text))]
+
+    def _write(self, name, value):
+        """Replace the entry of name with value, or append it, and write the
+        file."""
+        line = f"{name}={self._quote(value)}\n"
+        parts = []
+        for key, text in self._entries:
+            if key != name:
+                parts.append(text)
+            elif line is not None:
+                # Blank lines parsed with the entry are kept, duplicates dropped
+                parts.append(text[:len(text) - len(text.lstrip())] + line)
+                line = None
+        if line is not None:
+            if parts and not parts[-1].endswith("\n"):
+                parts.append("\n")
+            parts.append(line)
+        text = "".join(parts)
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".env.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                file.write(text)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        self._parse(text)
+        self._signature = self._get_signature()
+
+    @staticmethod
+    def _quote(value):
+        """Return value in single quotes, with backslashes and quotes escaped
+        as python-dotenv expects."""
+        return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+    def _get_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+
+CREDENTIALS = CredentialStore()
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+
+
+class EventLoopThread:
+    """Asyncio event loop running in a background thread, alongside the Qt
+    event loop.
+
+    Every network coroutine of the client layer runs on this single loop, so
+    any number of concurrent requests costs coroutines instead of OS threads.
+    Code running in other threads hands coroutines over with submit, or waits
+    for their result with run. The loop is started on first use.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self):
+        """Return the running loop, starting its thread if needed."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._run_loop, args=(self._loop,), name="gila-event-loop", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def _run_loop(self, loop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+        loop.close()
+
+    def submit(self, coro):
+        """Schedule a coroutine on the loop without waiting for it.
+
+        Parameters:
+            coro (coroutine): The coroutine to run.
+
+        Returns:
+            concurrent.futures.Future: A future resolved with the coroutine's
+            result. Cancelling it cancels the coroutine.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the loop and block until it returns.
+
+        This is how the synchronous API of the clients is built on top of the
+        asynchronous one. It must not be called from the loop thread itself.
+
+        Parameters:
+            coro (coroutine): The coroutine to run.
+            timeout (float, optional): Seconds to wait before giving up.
+
+        Returns:
+            Any: The value returned by the coroutine.
+
+        Raises:
+            RuntimeError: If called from inside the event loop thread.
+        """
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("EventLoopThread.run can't be called from the event loop thread.")
+        return self.submit(coro).result(timeout)
+
+    def stop(self):
+        """Cancel the pending tasks and stop the loop.
+
+        Connected to QApplication.aboutToQuit, after the transport is closed.
+        """
+        with self._lock:
+            loop, self._loop = self._loop, None
+            thread, self._thread = self._thread, None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(self._cancel_tasks_and_stop, loop)
+        thread.join(timeout=5)
+
+    @staticmethod
+    def _cancel_tasks_and_stop(loop):
+        for task in asyncio.all_tasks(loop):
+            task.cancel()
+        loop.stop()
+
+
+EVENT_LOOP = EventLoopThread()
@@ -0,0 +1,83 @@
+import asyncio
+import hashlib
+import threading
+import time
+
+
+class KeyValidator:
+    """Check API keys concurrently and remember the results for a while.
+
+    Keys are checked with APIClient.check_api_key_async, which lists the
+    provider's models instead of sending a completion, so a check costs no
+    tokens. Only definite results are cached, for ttl seconds: a key that
+    couldn't be verified is checked again next time. Keys are identified in
+    the cache by their hash, never stored.
+    """
+
+    # Statuses passed to the callback of validate_all_async
+    VALID = "valid"
+    INVALID = "invalid"
+    UNVERIFIED = "unverified"
+    MISSING = "missing"
+
+    def __init__(self, ttl=600):
+        self.ttl = ttl
+        self._results = {}
+        self._lock = threading.Lock()
+
+    async def validate_async(self, client, api_key):
+        """Check api_key with client, unless a recent result is cached.
+
+        Parameters:
+            client (APIClient): A client of the company the key belongs to.
+            api_key (str): The API key to check.
+
+        Returns:
+            bool or None: True if the key is valid, False if it was rejected,
+                          None if it couldn't be verified.
+        """
+        cache_key = self._get_cache_key(client.company, api_key)
+        with self._lock:
+            cached = self._results.get(cache_key)
+        if cached is not None and time.monotonic() - cached[1] < self.ttl:
+            return cached[0]
+        result = await client.check_api_key_async(api_key)
+        if result is not None:
+            with self._lock:
+                self._results[cache_key] = (result, time.monotonic())
+        return result
+
+    async def validate_all_async(self, keys, on_result):
+        """Check the keys of several companies at once.
+
+        on_result is called as soon as each result is known, from the event
+        loop thread, with the name of the company and its status.
+
+        Parameters:
+            keys (dict): Company names mapped to a (client, api_key) tuple,
+                         api_key is None if the company has no key.
+            on_result (callable): Function called with (company, status).
+        """
+        async def validate(company, client, api_key):
+            if not api_key:
+                on_result(company, self.MISSING)
+                return
+            result = await self.validate_async(client, api_key)
+            on_result(company, {True: self.VALID, False: self.INVALID}.get(result, self.UNVERIFIED))
+
+        await asyncio.gather(*(
+            validate(company, client, api_key) for company, (client, api_key) in keys.items()
+        ))
+
+    def invalidate(self, company):
+        """Forget the cached results of every key of company."""
+        with self._lock:
+            for cache_key in [k for k in self._results if k[0] == company]:
+                del self._results[cache_key]
+
+    @staticmethod
+    def _get_cache_key(company, api_key):
+        return company, hashlib.sha256(api_key.encode()).hexdigest()
+
+
+KEY_VALIDATOR = KeyValidator()
@@ -1,106 +1,48 @@
 import os
 import json
 import pickle
-import requests
-import sys
 from datetime import datetime
 
 from PySide6.QtCore import QObject, Slot, Signal
 
-from .clients import (
-    AnthropicClient,
-    ArliClient,
-    CohereClient,
-    DeepSeekClient,
-    GoogleClient,
-    GroqClient,
-    MistralClient,
-    GPTClient,
-    OClient,
-    ImageGenClient
-)
-
-
-CLASS_MAP = {
-    "GPTClient": GPTClient,
-    "OClient": OClient,
-    "GoogleClient": GoogleClient,
-    "GroqClient": GroqClient,
-    "AnthropicClient": AnthropicClient,
-    "ArliClient": ArliClient,
-    "CohereClient": CohereClient,
-    "DeepSeekClient": DeepSeekClient,
-    "MistralClient": MistralClient,
-    "ImageGenClient": ImageGenClient
-}
-
-COMPANIES = {
-    "ANTHROPIC": AnthropicClient("claude-3-5-sonnet-latest"),
-    "ARLI": ArliClient("Llama-3.3-70B-Instruct"),
-    "COHERE": CohereClient("command"),
-    "DEEPSEEK": DeepSeekClient("deepseek-chat"),
-    "GOOGLE": GoogleClient("gemini-2.0-flash"),
-    "GROQ": GroqClient("gemma2-9b-it"),
-    "MISTRAL": MistralClient("mistral-small-latest"),
-    "OPENAI": GPTClient("gpt-4o-mini"),
-}
-
-def load_available_models_from_json():
-    """Load model data from the JSON file and recreate client instances.
-
-    The JSON file must have the following structure for each model:
-
-        {
-            "Readable Model Name": {
-                "limits": [max_tokens, max_temperature],
-                "client": {
-                    "class": "ClassName",
-                    "model": ["model-name"]
-                }
-            },
-            ...
-        }
-
-    Returns:
-        dict: A dictionary where the keys are the model names and the values
-        are the corresponding client instances. If the JSON file is not found,
-        an empty dictionary is returned.
-    """
-    try:
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.abspath(".")
-    relative_path = "storage/assets/json/models.json"
-    file_path = os.path.join(base_path, relative_path)
-
-    with open(file_path, 'r') as file:
-        models_data = json.load(file)
-
-    available_models = {}
-    for model_name, data in models_data.items():
-        if client_data := data.get("client"):
-            class_name = client_data.get("class")
-            params = client_data.get("model", [])
-            if client_class := CLASS_MAP.get(class_name):
-                available_models[model_name] = client_class(*params)
-            else:
-                print(f"Class {class_name} not found for {model_name}.")
-        else:
-            print(f"Data not found for model {model_name}.")
-    return available_models
-
-
-AVAILABLE_MODELS = load_available_models_from_json()
+from ..core.startup_profiler import STARTUP_PROFILER
+from .compare import CompareSession
+from .connectivity import CONNECTIVITY
+from .credentials import CREDENTIALS
+from .event_loop import EVENT_LOOP
+from .key_validator import KEY_VALIDATOR
+from .registry import AVAILABLE_MODELS, COMPANIES
+from .response_cache import RESPONSE_CACHE
+from .session import ChatSession
+from .summarizer import RollingSummarizer
 
 
 class AIManager(QObject):
     api_key_is_valid_to_controller = Signal(bool)
+    api_key_status_to_controller = Signal(str, str)
+
+    # Written to storage/saved_settings.json the first time Gila starts
+    DEFAULT_SETTINGS = {
+        "llm_name": "GPT-4o mini",
+        "temperature": 1.0,
+        "max_tokens": 4096,
+        "system_message": "You are an helpful assistant.",
+        "image_size": "1024x1024",
+        "image_quality": "standard",
+        "image_quantity": 1,
+        "reasoning_effort": "medium",
+        "stream_responses": True,
+        "response_cache": False,
+        "rolling_summary": False,
+        "summary_window_turns": 6
+    }
 
     def __init__(self):
         super().__init__()
-        self.client = None
+        self.session = None
         self.stream_stopped = True
-        self.next_client = None
+        self.stream_responses = True
+        self.next_llm_name = None
         self.next_temperature = None
         self.next_max_tokens = None
         self.next_system_message = None
@@ -108,16 +50,55 @@ class AIManager(QObject):
         self.next_image_quality = None
         self.next_image_quantity = None
         self.next_reasoning_effort = None
+        self.summarizer = RollingSummarizer(self.create_client)
         self._get_saved_settings()
 
+    @property
+    def client(self):
+        """The client of the current session."""
+        return self.session.client
+
+    def new_session(self):
+        """Replace the current session with a new, empty one with the same
+        settings.
+
+        The previous session is dropped, so its history is released as soon
+        as no response is pending for it.
+        """
+        client = self.client
+        self.session = self.create_session(
+            client.llm_name,
+            temperature=client.temperature,
+            max_tokens=client.max_tokens,
+            system_message=client.system_message,
+            image_size=client.image_size,
+            image_quality=client.image_quality,
+            image_quantity=client.image_quantity,
+            reasoning_effort=client.reasoning_effort,
+        )
+
+    def apply_next_settings(self):
+        """Replace the current session with a new one with the settings
+        chosen by the user in the sidebar, set by set_new_settings_slot."""
+        self.session = self.create_session(
+            self.next_llm_name,
+            temperature=self.next_temperature,
+            max_tokens=self.next_max_tokens,
+            system_message=self.next_system_message,
+            image_size=self.next_image_size,
+            image_quality=self.next_image_quality,
+            image_quantity=self.next_image_quantity,
+            reasoning_effort=self.next_reasoning_effort,
+        )
+        self.next_llm_name = None
+
     def _get_saved_settings(self):
         """Load saved settings from a JSON file, creating default settings if
         the file does not exist.
 
         Checks for the existence of the settings file. If the file is not found,
         creates the file with default settings. Then reads the settings from the
-        file, initializes the client with the loaded parameters, and generates a
-        chat ID for the client.
+        file and starts a new session whose client has the loaded parameters.
 
         Attributes set on the client include:
             - llm_name: The name of the language model.
@@ -129,40 +110,46 @@ class AIManager(QObject):
             - image_quantity: The number of images to generate.
             - reasoning_effort: How many reasoning tokens model should generate
 
+        The stream_responses setting is kept on the manager, since it applies
+        to every client that supports streaming, while response_cache turns
+        the shared response cache on or off. rolling_summary and
+        summary_window_turns configure the summarizer of long chats.
+
         Raises:
             FileNotFoundError: If the settings file cannot be created.
             json.JSONDecodeError: If the settings file is not a valid JSON.
         """
         file_path = "storage/saved_settings.json"
+        with STARTUP_PROFILER.span("AIManager: read settings"):
+            data = self._read_saved_settings(file_path)
+        with STARTUP_PROFILER.span("AIManager: create session", llm_name=data.get("llm_name")):
+            self.session = self.create_session(
+                data.get("llm_name"),
+                temperature=data.get("temperature"),
+                max_tokens=data.get("max_tokens"),
+                system_message=data.get("system_message"),
+                image_size=data.get("image_size"),
+                image_quality=data.get("image_quality"),
+                image_quantity=data.get("image_quantity"),
+                reasoning_effort=data.get("reasoning_effort"),
+            )
+        # Know whether the provider can be reached before the first chat starts
+        CONNECTIVITY.refresh(self.client._get_endpoint())
+        self.stream_responses = data.get("stream_responses", True)
+        RESPONSE_CACHE.enabled = data.get("response_cache", False)
+        self.summarizer.enabled = data.get("rolling_summary", False)
+        self.summarizer.window_turns = data.get("summary_window_turns", 6)
+
+    def _read_saved_settings(self, file_path):
+        """Return the settings saved in file_path, writing the default ones
+        first if the file does not exist."""
         if not os.path.exists(file_path):
             os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            default_data = {
-                "llm_name": "GPT-4o mini",
-                "temperature": 1.0,
-                "max_tokens": 4096,
-                "system_message": "You are an helpful assistant.",
-                "image_size": "1024x1024",
-                "image_quality": "standard",
-                "image_quantity": 1,
-                "reasoning_effort": "medium"
-            }
             with open(file_path, "w") as f:
-                json.dump(default_data, f)
+                json.dump(AIManager.DEFAULT_SETTINGS, f)
 
         with open(file_path, "r") as f:
-            data = json.load(f)
-            llm_name = data.get("llm_name")
-            self.client = AVAILABLE_MODELS.get(llm_name)
-            self.client.llm_name = llm_name
-            self.client.temperature = data.get("temperature")
-            self.client.max_tokens = data.get("max_tokens")
-            self.client.system_message = data.get("system_message")
-            self.client.image_size = data.get("image_size")
-            self.client.image_quality = data.get("image_quality")
-            self.client.image_quantity = data.get("image_quantity")
-            self.client.reasoning_effort = data.get("reasoning_effort")
-
-        self.client.generate_chat_id()
+            return json.load(f)
 
     def update_saved_settings(self):
         """Update the saved settings in the JSON file with the current client
@@ -235,9 +222,9 @@ class AIManager(QObject):
         When triggered, takes new settings for the language model and updates
         the client configuration accordingly. It sets the new language model,
         adjusts the temperature, and updates other parameters related to the
-        client's settings. next_client is a tuple containing the selected client
-        instance and its name, which is utilized in the controller.chat_started_slot
-        method.
+        client's settings. They are kept until the next chat starts, when
+        controller.chat_started_slot calls apply_next_settings to create a
+        session with them.
 
         Parameters:
             new_llm (str): The name of the new language model to be used.
@@ -249,8 +236,11 @@ class AIManager(QObject):
             new_image_quantity (int): The new number of images to generate.
             new_reasoning_effort (str): The new amount of reasoning tokens to generate.
         """
+        # The registry's instance is only used to find the provider's host
         selected_llm = AVAILABLE_MODELS.get(new_llm)
-        self.next_client = selected_llm, new_llm
+        self.next_llm_name = new_llm if selected_llm is not None else None
+        if selected_llm is not None:
+            CONNECTIVITY.refresh(selected_llm._get_endpoint())
         self.next_temperature = new_temperature / 10
         self.next_max_tokens = new_max_tokens
         self.next_system_message = new_system_message
@@ -265,13 +255,13 @@ class AIManager(QObject):
         Connected to one signal:
         - controller.api_key_to_manager
 
-        When triggered, checks the validity of the provided API key. If 
-        company_name is None, it sends the new API key to the current client; 
-        otherwise, it sends it to the client associated with the specified
-        company name. Then emits a boolean signal indicating whether the API
-        key is valid. If the key is valid, it calls the _save_api_key method to
-        store it. If the company_name is not found, defaults to using the
-        currently selected client.
+        When triggered, checks the validity of the provided API key in the
+        background, so the GUI is never blocked by the request. If
+        company_name is found, the key is checked by the client associated
+        with it; otherwise, defaults to using the currently selected client.
+        When the result is known, emits a boolean signal indicating whether
+        the API key is valid and, if it is, calls the _save_api_key method to
+        store it.
 
         Parameters:
             api_key (str): The API key to validate.
@@ -280,25 +270,44 @@ class AIManager(QObject):
         client = COMPANIES.get(company_name.upper())
         if client is None:
             client = AVAILABLE_MODELS.get(self.client.llm_name)
-        validated = client.validate_api_key(api_key)
+        EVENT_LOOP.submit(self._validate_api_key_async(client, api_key, company_name))
+
+    async def _validate_api_key_async(self, client, api_key, company_name):
+        validated = await KEY_VALIDATOR.validate_async(client, api_key)
         if validated is True:
-            self.api_key_is_valid_to_controller.emit(True)
             self._save_api_key(api_key, company_name)
+            self.api_key_is_valid_to_controller.emit(True)
         else:
             self.api_key_is_valid_to_controller.emit(False)
 
+    @Slot()
+    def validate_api_keys_slot(self):
+        """Slot
+        Connected to one signal:
+        - controller.validate_api_keys_to_manager
+
+        When triggered, checks the stored API key of every company at once in
+        the background. Emits a signal with the status of each company as
+        soon as it's known: "valid", "invalid", "unverified" if the provider
+        couldn't be reached, or "missing" if no key is stored.
+        """
+        keys = {
+            company: (client, client.get_api_key() if client.check_if_api_key(company) else None)
+            for company, client in COMPANIES.items()
+        }
+        EVENT_LOOP.submit(KEY_VALIDATOR.validate_all_async(keys, self.api_key_status_to_controller.emit))
+
     @Slot(str)
     def restore_chat_from_id_slot(self, chat_id):
         """Slot
         Connected to one signal:
         - controller.loading_saved_chat_id_to_manager
 
-        When triggered, reads saved chat settings from a file and applies them
-        to the client. It loads the chat data associated with the provided
-        chat_id from a pickle file, updates the client's attributes with the
-        loaded data, and prepares the client for use with the restored chat.
-        The method retrieves the client based on the language model name
-        stored in the chat data.
+        When triggered, reads saved chat settings from a file and restores the
+        chat in a new session. It loads the chat data associated with the
+        provided chat_id from a pickle file and creates a new client, based on
+        the language model name stored in the chat data, whose attributes are
+        set to the loaded data. The previous session is dropped.
 
         Parameters:
             chat_id (str): The unique identifier for the chat to restore.
@@ -307,27 +316,31 @@ class AIManager(QObject):
             saved_data = pickle.load(file)
             chat = saved_data[chat_id]
         # Due to pickle limitation we have to get the client from its name
-        self.client = AVAILABLE_MODELS.get(chat["llm_name"])
-        self.client.chat_id = chat_id
-        self.client.is_loaded = True
-        self.client.chat_custom_name = chat["chat_custom_name"]
-        self.client.llm_name = chat["llm_name"]
-        self.client.temperature = chat["temperature"]
-        self.client.max_tokens = chat["max_tokens"]
-        self.client.chat_history = chat["chat_history"]
-        self.client.chat_date = chat["chat_date"]
-        self.client.system_message = chat["system_message"]
-        self.client.last_response_info = chat["last_response_info"]
-        self.client.image_size = chat["image_size"]
-        self.client.image_quality = chat["image_quality"]
-        self.client.image_quantity = chat["image_quantity"]
-        self.client.reasoning_effort = chat["reasoning_effort"]
+        client = self.create_client_or_default(
+            chat["llm_name"], chat["temperature"], chat["max_tokens"], chat["system_message"]
+        )
+        client.chat_history = chat["chat_history"]
+        client.pinned_messages = chat.get("pinned_messages", set())
+        client.chat_summary = chat.get("chat_summary")
+        client.summarized_until = chat.get("summarized_until", 0)
+        client.last_response_info = chat["last_response_info"]
+        client.image_size = chat["image_size"]
+        client.image_quality = chat["image_quality"]
+        client.image_quantity = chat["image_quantity"]
+        client.reasoning_effort = chat["reasoning_effort"]
+        self.session = ChatSession(
+            client,
+            chat_id=chat_id,
+            chat_date=chat["chat_date"],
+            chat_custom_name=chat["chat_custom_name"],
+            is_loaded=True,
+        )
 
     def get_current_settings(self):
         """Return the current settings of the client.
 
         Retrieves and returns a tuple containing various attributes of the
-        current client.
+        current session and its client.
 
         Returns:
             tuple: A tuple containing the current client's settings:
@@ -344,12 +357,12 @@ class AIManager(QObject):
                 - reasoning_effort (str): The amount of reasoning tokens generate.
         """
         return (
-            self.client.chat_id,
-            self.client.chat_custom_name,
+            self.session.chat_id,
+            self.session.chat_custom_name,
             self.client.llm_name,
             self.client.temperature,
             self.client.max_tokens,
-            self.client.chat_date,
+            self.session.chat_date,
             self.client.system_message,
             self.client.image_size,
             self.client.image_quality,
@@ -357,36 +370,140 @@ class AIManager(QObject):
             self.client.reasoning_effort,
         )
 
+    def create_compare_session(self, model_names):
+        """Create a session that sends the same prompt to several models.
+
+        Every model gets a new client instance, configured with the settings
+        of the current chat within the model's own limits, so that comparing
+        models doesn't alter the client of the chat nor its history.
+
+        Parameters:
+            model_names (list): Readable names of the models to compare.
+
+        Returns:
+            CompareSession: The session holding a client for each model.
+        """
+        clients = {}
+        for model_name in model_names:
+            client = self.create_client(
+                model_name,
+                temperature=self.client.temperature,
+                max_tokens=self.client.max_tokens,
+                system_message=self.client.system_message,
+            )
+            if client is not None:
+                client.reasoning_effort = self.client.reasoning_effort
+                clients[model_name] = client
+        return CompareSession(clients)
+
+    @staticmethod
+    def create_client(model_name, temperature, max_tokens, system_message=None):
+        """Create a new client instance for a model, independent from the
+        client of the chat.
+
+        It doesn't depend on the manager's state, so it can also be used
+        without a manager, as the headless runner does. The temperature and
+        max tokens are clamped to the model's limits and the API key is loaded
+        if there is one.
+
+        Parameters:
+            model_name (str): Readable name of the model.
+            temperature (float): The sampling temperature to use, the default
+                                 one if None.
+            max_tokens (int): The maximum number of tokens to generate, the
+                              default number if None.
+            system_message (str, optional): The system message to use.
+
+        Returns:
+            APIClient or None: The new client, or None if the model doesn't exist.
+        """
+        descriptor = AVAILABLE_MODELS.get_descriptor(model_name)
+        if descriptor is None:
+            return None
+        client = descriptor.create_client()
+        max_model_tokens, max_temperature = descriptor.limits
+        if temperature is None:
+            temperature = AIManager.DEFAULT_SETTINGS["temperature"]
+        if max_tokens is None:
+            max_tokens = AIManager.DEFAULT_SETTINGS["max_tokens"]
+        client.llm_name = model_name
+        client.temperature = min(temperature, max_temperature)
+        client.max_tokens = min(max_tokens, max_model_tokens)
+        client.system_message = system_message
+        client.check_if_api_key(client.company)
+        client.set_chat_history()
+        return client
+
+    @staticmethod
+    def create_client_or_default(model_name, temperature, max_tokens, system_message=None):
+        """Create a new client like create_client, with the default model if
+        model_name no longer exists, e.g. because it was saved in the settings
+        or in a chat before it was removed from models.json.
+
+        Returns:
+            APIClient: The new client.
+        """
+        client = AIManager.create_client(model_name, temperature, max_tokens, system_message)
+        if client is None:
+            default_model = AIManager.DEFAULT_SETTINGS["llm_name"]
+            print(f"Model {model_name} not found, using {default_model}.")
+            client = AIManager.create_client(default_model, temperature, max_tokens, system_message)
+        return client
+
+    @staticmethod
+    def create_session(
+        model_name, temperature, max_tokens, system_message=None, image_size=None,
+        image_quality=None, image_quantity=None, reasoning_effort=None
+    ):
+        """Create a new chat session with its own client, see
+        create_client_or_default.
+
+        Parameters:
+            model_name (str): Readable name of the model.
+            temperature (float): The sampling temperature to use.
+            max_tokens (int): The maximum number of tokens to generate.
+            system_message (str, optional): The system message to use.
+            image_size (str, optional): The size of generated images.
+            image_quality (str, optional): The quality of generated images.
+            image_quantity (int, optional): The number of images to generate.
+            reasoning_effort (str, optional): The amount of reasoning tokens to generate.
+
+        Returns:
+            ChatSession: The new session, with a new chat ID.
+        """
+        client = AIManager.create_client_or_default(model_name, temperature, max_tokens, system_message)
+        client.image_size = image_size
+        client.image_quality = image_quality
+        client.image_quantity = image_quantity
+        client.reasoning_effort = reasoning_effort
+        return ChatSession(client)
+
     def _save_api_key(self, api_key, company_name):
         """Save the validated API key to the .env file.
 
-        Appends the API key for the specified company name to the .env file
-        without overwriting existing data in the format:
-        COMPANY_NAME_api_key='API_KEY'.
+        Stores the API key for the specified company name in the credential
+        store, which rewrites the .env file replacing the company's previous
+        key, if any, in the format: COMPANY_NAME_API_KEY='API_KEY'.
         The company name is converted to uppercase.
 
         Parameters:
             api_key (str): The validated API key to be saved.
             company_name (str): The name of the company associated with the API key.
         """
-        with open(".env", "a") as file:
-            file.write(f"\n{company_name.upper()}_API_KEY='{api_key}'")
+        CREDENTIALS.set(company_name.upper(), api_key)
 
     def check_internet_connection(self):
-        """Check the availability of an internet connection.
+        """Check whether the provider of the current client can be reached.
 
-        Attempts to send a HEAD request to "http://www.google.com/" to verify
-        if a connection can be established. If the request is successful, it
-        returns True; otherwise, it catches a connection error and returns False.
+        Returns the last state known by the connectivity monitor without
+        waiting for the network: if it's stale, a new probe of the provider's
+        host runs in the background and its result is used next time.
 
         Returns:
-            bool: True if the internet connection is available, False otherwise.
+            bool: False if the provider's host couldn't be reached at the last
+                  check, True otherwise.
         """
-        try:
-            requests.head("http://www.google.com/", timeout=3)
-            return True
-        except requests.ConnectionError:
-            return False
+        return CONNECTIVITY.is_reachable(self.client._get_endpoint())
 
     def save_current_chat(self):
         """Save the current chat's settings and history to a pickle file.
@@ -398,13 +515,16 @@ class AIManager(QObject):
         """
         date = datetime.now().strftime("%d-%m-%y %H:%M:%S")
         data = {
-            self.client.chat_id: {
-                "chat_custom_name": self.client.chat_custom_name,
+            self.session.chat_id: {
+                "chat_custom_name": self.session.chat_custom_name,
                 "llm_name": self.client.llm_name,
                 "temperature": self.client.temperature,
                 "max_tokens": self.client.max_tokens,
                 "chat_date": date,
                 "chat_history": self.client.chat_history,
+                "pinned_messages": self.client.pinned_messages,
+                "chat_summary": self.client.chat_summary,
+                "summarized_until": self.client.summarized_until,
                 "chat_log": None,
                 "system_message": self.client.system_message,
                 "last_response_info": self.client.last_response_info,
@@ -414,5 +534,5 @@ class AIManager(QObject):
                 "reasoning_effort": self.client.reasoning_effort,
             }
         }
-        with open(f"storage/saved_data/{self.client.chat_id}.pk", "wb") as file:
+        with open(f"storage/saved_data/{self.session.chat_id}.pk", "wb") as file:
             pickle.dump(data, file)
@@ -0,0 +1,674 @@
+"""Local stand-in for the providers' APIs, to test and benchmark the client
+layer without API keys or network access.
+
+Run it with:
+
+    python -m gila.ai.mock_server --port 8089 --latency 0.3 --tokens-per-second 60
+
+and point Gila at it with GILA_BASE_URL=http://127.0.0.1:8089, or
+GILA_<COMPANY>_BASE_URL to mock a single provider.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua ut enim ad minim veniam quis"
+).split()
+
+
+class MockResponse:
+    """Text and token usage of a mocked completion.
+
+    A token is a word: the prompt tokens are the words of the request's
+    messages, and the completion is made of response_tokens words, fewer if
+    the request asks for less. The words are taken from text if given, to
+    answer with a realistic Markdown document, otherwise from WORDS.
+    """
+
+    def __init__(self, prompt_tokens, completion_tokens, text=None):
+        self.prompt_tokens = prompt_tokens
+        if text is not None:
+            self.tokens = re.findall(r"\s*\S+", text)[:completion_tokens]
+        else:
+            self.tokens = [WORDS[index % len(WORDS)] + " " for index in range(completion_tokens)]
+        self.completion_tokens = len(self.tokens)
+
+    @property
+    def text(self):
+        return "".join(self.tokens)
+
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.completion_tokens
+
+
+class WireFormat(ABC):
+    """Bodies and events of a provider's chat endpoint."""
+
+    @abstractmethod
+    def build_response(self, model, response):
+        """Return the body of a complete response."""
+        pass
+
+    @abstractmethod
+    def build_events(self, model, response):
+        """Return the (event, data) pairs of a streamed response, event is
+        None for data-only events. Tokens are sent by the "delta" pairs."""
+        pass
+
+    def build_error(self, status, message):
+        return {"error": {"message": message, "type": "mock_error", "code": status}}
+
+
+class OpenAIFormat(WireFormat):
+    """OpenAI chat completions, also spoken by Groq, Mistral, DeepSeek and
+    Arli AI."""
+
+    def build_response(self, model, response):
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": response.text},
+                "finish_reason": "stop",
+            }],
+            "usage": self._build_usage(response),
+        }
+
+    def build_events(self, model, response):
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+        for token in response.tokens:
+            yield "delta", {
+                "id": chunk_id,
+                "object": "chat.completion.chunk",
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+            }
+        yield None, {"id": chunk_id, "object": "chat.completion.chunk", "model": model,
+                     "choices": [], "usage": self._build_usage(response)}
+        yield None, "[DONE]"
+
+    def _build_usage(self, response):
+        return {
+            "prompt_tokens": response.prompt_tokens,
+            "completion_tokens": response.completion_tokens,
+            "total_tokens": response.total_tokens,
+        }
+
+
+class AnthropicFormat(WireFormat):
+    """Anthropic Messages API."""
+
+    def build_response(self, model, response):
+        return {
+            "id": f"msg_{uuid.uuid4().hex}",
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [{"type": "text", "text": response.text}],
+            "stop_reason": "end_turn",
+            "usage": {"input_tokens": response.prompt_tokens, "output_tokens": response.completion_tokens},
+        }
+
+    def build_events(self, model, response):
+        yield "message_start", {"type": "message_start", "message": {
+            "id": f"msg_{uuid.uuid4().hex}", "type": "message", "role": "assistant", "model": model,
+            "content": [], "usage": {"input_tokens": response.prompt_tokens, "output_tokens": 1},
+        }}
+        yield "content_block_start", {"type": "content_block_start", "index": 0,
+                                      "content_block": {"type": "text", "text": ""}}
+        for token in response.tokens:
+            yield "delta", ("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                                    "delta": {"type": "text_delta", "text": token}})
+        yield "content_block_stop", {"type": "content_block_stop", "index": 0}
+        yield "message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn"},
+                                "usage": {"output_tokens": response.completion_tokens}}
+        yield "message_stop", {"type": "message_stop"}
+
+    def build_error(self, status, message):
+        return {"type": "error", "error": {"type": "mock_error", "message": message}}
+
+
+class GoogleFormat(WireFormat):
+    """Gemini generateContent and streamGenerateContent."""
+
+    def build_response(self, model, response):
+        return {
+            "candidates": [{
+                "content": {"parts": [{"text": response.text}], "role": "model"},
+                "finishReason": "STOP",
+            }],
+            "usageMetadata": self._build_usage(response),
+            "modelVersion": model,
+        }
+
+    def build_events(self, model, response):
+        for token in response.tokens:
+            yield "delta", {"candidates": [{"content": {"parts": [{"text": token}], "role": "model"}}]}
+        yield None, {
+            "candidates": [{"content": {"parts": [{"text": ""}], "role": "model"}, "finishReason": "STOP"}],
+            "usageMetadata": self._build_usage(response),
+        }
+
+    def build_error(self, status, message):
+        return {"error": {"code": status, "message": message, "status": "MOCK_ERROR"}}
+
+    def _build_usage(self, response):
+        return {
+            "promptTokenCount": response.prompt_tokens,
+            "candidatesTokenCount": response.completion_tokens,
+            "totalTokenCount": response.total_tokens,
+        }
+
+
+class CohereFormat(WireFormat):
+    """Cohere Chat v2."""
+
+    def build_response(self, model, response):
+        return {
+            "id": uuid.uuid4().hex,
+            "finish_reason": "COMPLETE",
+            "message": {"role": "assistant", "content": [{"type": "text", "text": response.text}]},
+            "usage": self._build_usage(response),
+        }
+
+    def build_events(self, model, response):
+        yield "message-start", {"type": "message-start", "id": uuid.uuid4().hex,
+                                "delta": {"message": {"role": "assistant", "content": []}}}
+        yield "content-start", {"type": "content-start", "index": 0,
+                                "delta": {"message": {"content": {"type": "text", "text": ""}}}}
+        for token in response.tokens:
+            yield "delta", ("content-delta", {"type": "content-delta", "index": 0,
+                                              "delta": {"message": {"content": {"text": token}}}})
+        yield "content-end", {"type": "content-end", "index": 0}
+        yield "message-end", {"type": "message-end",
+                              "delta": {"finish_reason": "COMPLETE", "usage": self._build_usage(response)}}
+
+    def build_error(self, status, message):
+        return {"message": message}
+
+    def _build_usage(self, response):
+        tokens = {"input_tokens": response.prompt_tokens, "output_tokens": response.completion_tokens}
+        return {"billed_units": tokens, "tokens": tokens}
+
+
+class RateLimitWindow:
+    """Requests and tokens spent in the current minute, reset every minute."""
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._requests = 0
+        self._tokens = 0
+
+    def spend(self, tokens):
+        """Count a request, returning the seconds to wait if it's over the
+        limits, or 0 if it's allowed."""
+        with self._lock:
+            self._roll()
+            over_requests = self.requests_per_minute and self._requests >= self.requests_per_minute
+            over_tokens = self.tokens_per_minute and self._tokens + tokens > self.tokens_per_minute
+            if over_requests or over_tokens:
+                return self._get_reset()
+            self._requests += 1
+            self._tokens += tokens
+            return 0
+
+    def get_headers(self, anthropic=False):
+        """Return the headers announcing the limits and what is left."""
+        with self._lock:
+            self._roll()
+            reset = self._get_reset()
+            headers = {}
+            for kind, limit, spent in (
+                ("requests", self.requests_per_minute, self._requests),
+                ("tokens", self.tokens_per_minute, self._tokens),
+            ):
+                if not limit:
+                    continue
+                remaining = max(0, limit - spent)
+                if anthropic:
+                    reset_at = datetime.fromtimestamp(time.time() + reset, timezone.utc)
+                    headers[f"anthropic-ratelimit-{kind}-limit"] = str(limit)
+                    headers[f"anthropic-ratelimit-{kind}-remaining"] = str(remaining)
+                    headers[f"anthropic-ratelimit-{kind}-reset"] = reset_at.isoformat().replace("+00:00", "Z")
+                else:
+                    headers[f"x-ratelimit-limit-{kind}"] = str(limit)
+                    headers[f"x-ratelimit-remaining-{kind}"] = str(remaining)
+                    headers[f"x-ratelimit-reset-{kind}"] = f"{reset:.3f}s"
+            return headers
+
+    def _roll(self):
+        if time.monotonic() - self._start >= 60:
+            self._start = time.monotonic()
+            self._requests = 0
+            self._tokens = 0
+
+    def _get_reset(self):
+        return max(0.0, 60 - (time.monotonic() - self._start))
+
+
+class MockProviderServer:
+    """HTTP server answering like the providers' APIs, on a single port.
+
+    Every endpoint used by the clients is served, streaming or not: OpenAI
+    chat completions (also under the Groq and DeepSeek paths), image
+    generations and batches, Anthropic messages and message batches, Gemini
+    generateContent and Cohere Chat v2.
+
+    Parameters:
+        host (str): Address to listen on.
+        port (int): Port to listen on, 0 picks a free one.
+        latency (float): Seconds before the first byte of every response.
+        tokens_per_second (float): Generation speed, None for no delay.
+        response_tokens (int): Tokens of every completion, unless the request
+                               allows fewer.
+        response_text (str): Text of every completion, cut to response_tokens
+                             words, lorem ipsum if not given.
+        error_rate (float): Probability of answering with error_status.
+        error_status (int): Status of the injected errors.
+        requests_per_minute (int): Requests allowed per minute, None for no limit.
+        tokens_per_minute (int): Tokens allowed per minute, None for no limit.
+        api_key (str): If given, requests with another key are rejected with 401.
+        batch_polls (int): Status checks before a batch is completed.
+        seed (int): Seed of the error injection, for reproducible runs.
+    """
+
+    def __init__(
+        self, host="127.0.0.1", port=0, latency=0.0, tokens_per_second=None, response_tokens=64,
+        response_text=None, error_rate=0.0, error_status=500, requests_per_minute=None, tokens_per_minute=None,
+        api_key=None, batch_polls=1, seed=None
+    ):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.response_text = response_text
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.api_key = api_key
+        self.batch_polls = batch_polls
+        self.rate_limit = RateLimitWindow(requests_per_minute, tokens_per_minute)
+        self.random = random.Random(seed)
+        self.request_count = 0
+        # Uploaded files and created batches, keyed by id
+        self.files = {}
+        self.batches = {}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _MockRequestHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve requests from a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="gila-mock-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def should_fail(self):
+        with self._lock:
+            self.request_count += 1
+            return self.error_rate > 0 and self.random.random() < self.error_rate
+
+    def create_response(self, body, max_tokens=None):
+        """Return the MockResponse of a chat request body."""
+        prompt_tokens = len(_collect_text(body.get("messages") or body.get("contents") or []).split())
+        completion_tokens = self.response_tokens
+        if max_tokens:
+            completion_tokens = min(completion_tokens, max_tokens)
+        return MockResponse(prompt_tokens, completion_tokens, self.response_text)
+
+
+class _MockRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "GilaMock/1.0"
+
+    FORMATS = {
+        "openai": OpenAIFormat(),
+        "anthropic": AnthropicFormat(),
+        "google": GoogleFormat(),
+        "cohere": CohereFormat(),
+    }
+
+    @property
+    def mock(self):
+        return self.server.mock
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        path = parts.path
+        if path in ("/models", "/v1/models", "/openai/v1/models"):
+            return self._list_models("anthropic" if self.headers.get("x-api-key") else "openai")
+        if path == "/v1beta/models":
+            return self._list_models("google", parse_qs(parts.query).get("key", [None])[0])
+        if match := re.fullmatch(r"/v1/batches/([\w-]+)", path):
+            return self._get_openai_batch(match.group(1))
+        if match := re.fullmatch(r"/v1/files/([\w-]+)/content", path):
+            return self._send_text(self.mock.files.get(match.group(1), ""))
+        if match := re.fullmatch(r"/v1/messages/batches/([\w-]+)", path):
+            return self._get_anthropic_batch(match.group(1))
+        if match := re.fullmatch(r"/v1/messages/batches/([\w-]+)/results", path):
+            return self._send_text(self.mock.files.get(f"results-{match.group(1)}", ""))
+        if match := re.fullmatch(r"/mock-images/(\d+)\.png", path):
+            return self._send_text("", content_type="image/png")
+        self._send_json(404, {"error": {"message": f"Unknown path {path}"}})
+
+    def do_POST(self):
+        parts = urlsplit(self.path)
+        path = parts.path
+        raw_body = self.rfile.read(int(self.headers.get("content-length") or 0))
+        if path == "/v1/files":
+            return self._upload_file(raw_body)
+        try:
+            body = json.loads(raw_body or b"{}")
+        except ValueError:
+            return self._send_json(400, {"error": {"message": "Invalid JSON body."}})
+
+        if path.endswith("/chat/completions"):
+            return self._chat("openai", body, body.get("model"), body.get("stream"),
+                              body.get("max_completion_tokens") or body.get("max_tokens"))
+        if path == "/v1/messages":
+            return self._chat("anthropic", body, body.get("model"), body.get("stream"), body.get("max_tokens"))
+        if match := re.fullmatch(r"/v1beta/models/([^:]+):(generateContent|streamGenerateContent)", path):
+            config = body.get("generationConfig") or {}
+            stream = match.group(2) == "streamGenerateContent"
+            api_key = parse_qs(parts.query).get("key", [None])[0]
+            return self._chat("google", body, match.group(1), stream, config.get("maxOutputTokens"), api_key)
+        if path == "/v2/chat":
+            return self._chat("cohere", body, body.get("model"), body.get("stream"), body.get("max_tokens"))
+        if path == "/v1/images/generations":
+            return self._generate_images(body)
+        if path == "/v1/batches":
+            return self._create_openai_batch(body)
+        if match := re.fullmatch(r"/v1/batches/([\w-]+)/cancel", path):
+            return self._cancel_batch(match.group(1), "openai")
+        if path == "/v1/messages/batches":
+            return self._create_anthropic_batch(body)
+        if match := re.fullmatch(r"/v1/messages/batches/([\w-]+)/cancel", path):
+            return self._cancel_batch(match.group(1), "anthropic")
+        self._send_json(404, {"error": {"message": f"Unknown path {path}"}})
+
+    # Chat endpoints
+
+    def _chat(self, format_name, body, model, stream, max_tokens, api_key=None):
+        wire_format = self.FORMATS[format_name]
+        anthropic = format_name == "anthropic"
+        if error := self._check_request(wire_format, api_key, anthropic):
+            return error
+        response = self.mock.create_response(body, max_tokens)
+        if wait := self.mock.rate_limit.spend(response.total_tokens):
+            return self._send_json(
+                429, wire_format.build_error(429, "Rate limit exceeded."),
+                {"retry-after": f"{wait:.0f}", **self.mock.rate_limit.get_headers(anthropic)}
+            )
+        time.sleep(self.mock.latency)
+        if stream:
+            return self._stream(wire_format.build_events(model, response), anthropic)
+        if self.mock.tokens_per_second:
+            time.sleep(response.completion_tokens / self.mock.tokens_per_second)
+        self._send_json(200, wire_format.build_response(model, response), self.mock.rate_limit.get_headers(anthropic))
+
+    def _list_models(self, format_name, api_key=None):
+        """Answer a model listing, the request the clients use to check keys."""
+        if self._check_request(self.FORMATS[format_name], api_key, format_name == "anthropic"):
+            return
+        time.sleep(self.mock.latency)
+        models = [{"id": "mock-model", "name": "models/mock-model"}]
+        self._send_json(200, {"data": models, "models": models})
+
+    def _check_request(self, wire_format, api_key=None, anthropic=False):
+        """Reject the request if its API key is wrong or an error is injected.
+
+        Returns:
+            bool: True if an error response has been sent.
+        """
+        if self.mock.api_key is not None:
+            api_key = api_key or self.headers.get("x-api-key") or self.headers.get("x-goog-api-key")
+            authorization = self.headers.get("authorization", "")
+            if authorization.lower().startswith("bearer "):
+                api_key = authorization[7:]
+            if api_key != self.mock.api_key:
+                self._send_json(401, wire_format.build_error(401, "Invalid API key."))
+                return True
+        if self.mock.should_fail():
+            time.sleep(self.mock.latency)
+            status = self.mock.error_status
+            headers = {"retry-after": "1"} if status == 429 else {}
+            self._send_json(status, wire_format.build_error(status, "Injected error."), headers)
+            return True
+        return False
+
+    def _stream(self, events, anthropic):
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("cache-control", "no-cache")
+        self.send_header("transfer-encoding", "chunked")
+        for name, value in self.mock.rate_limit.get_headers(anthropic).items():
+            self.send_header(name, value)
+        self.end_headers()
+        delay = 1 / self.mock.tokens_per_second if self.mock.tokens_per_second else 0
+        try:
+            for event, data in events:
+                if event == "delta":
+                    if delay:
+                        time.sleep(delay)
+                    event, data = data if isinstance(data, tuple) else (None, data)
+                lines = f"event: {event}\n" if event else ""
+                lines += f"data: {data if isinstance(data, str) else json.dumps(data)}\n\n"
+                self._write_chunk(lines.encode("utf-8"))
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped the response
+            self.close_connection = True
+
+    def _generate_images(self, body):
+        wire_format = self.FORMATS["openai"]
+        if self._check_request(wire_format):
+            return
+        time.sleep(self.mock.latency)
+        images = [{"url": f"{self._get_own_url()}/mock-images/{index}.png"} for index in range(body.get("n") or 1)]
+        self._send_json(200, {"created": int(time.time()), "data": images})
+
+    # Batch endpoints
+
+    def _upload_file(self, raw_body):
+        match = re.search(r'boundary="?([^";]+)"?', self.headers.get("content-type", ""))
+        if not match:
+            return self._send_json(400, {"error": {"message": "Expected a multipart upload."}})
+        content = ""
+        for part in raw_body.split(b"--" + match.group(1).encode()):
+            head, _, data = part.partition(b"\r\n\r\n")
+            if b'name="file"' in head:
+                content = data.rsplit(b"\r\n", 1)[0].decode("utf-8")
+        file_id = f"file-{uuid.uuid4().hex}"
+        self.mock.files[file_id] = content
+        self._send_json(200, {"id": file_id, "object": "file", "bytes": len(content), "purpose": "batch"})
+
+    def _create_openai_batch(self, body):
+        lines = [json.loads(line) for line in self.mock.files.get(body.get("input_file_id"), "").splitlines() if line]
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        self.mock.batches[batch_id] = {"format": "openai", "lines": lines, "polls": 0, "cancelled": False}
+        self._send_json(200, self._build_openai_batch(batch_id))
+
+    def _get_openai_batch(self, batch_id):
+        if batch_id not in self.mock.batches:
+            return self._send_json(404, {"error": {"message": "Batch not found."}})
+        self._poll_batch(batch_id)
+        self._send_json(200, self._build_openai_batch(batch_id))
+
+    def _build_openai_batch(self, batch_id):
+        batch = self.mock.batches[batch_id]
+        finished = batch.get("output_file_id") is not None
+        status = "cancelled" if batch["cancelled"] else "completed" if finished else "in_progress"
+        return {
+            "id": batch_id,
+            "object": "batch",
+            "status": status,
+            "output_file_id": batch.get("output_file_id"),
+            "error_file_id": None,
+            "request_counts": {
+                "total": len(batch["lines"]),
+                "completed": len(batch["lines"]) if finished else 0,
+                "failed": 0,
+            },
+        }
+
+    def _create_anthropic_batch(self, body):
+        batch_id = f"msgbatch_{uuid.uuid4().hex}"
+        self.mock.batches[batch_id] = {
+            "format": "anthropic", "lines": body.get("requests", []), "polls": 0, "cancelled": False
+        }
+        self._send_json(200, self._build_anthropic_batch(batch_id))
+
+    def _get_anthropic_batch(self, batch_id):
+        if batch_id not in self.mock.batches:
+            return self._send_json(404, AnthropicFormat().build_error(404, "Batch not found."))
+        self._poll_batch(batch_id)
+        self._send_json(200, self._build_anthropic_batch(batch_id))
+
+    def _build_anthropic_batch(self, batch_id):
+        batch = self.mock.batches[batch_id]
+        finished = batch.get("output_file_id") is not None
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if finished or batch["cancelled"] else "in_progress",
+            "cancel_initiated_at": datetime.now(timezone.utc).isoformat() if batch["cancelled"] else None,
+            "results_url": f"{self._get_own_url()}/v1/messages/batches/{batch_id}/results" if finished else None,
+            "request_counts": {"processing": 0 if finished else len(batch["lines"]),
+                               "succeeded": len(batch["lines"]) if finished else 0},
+        }
+
+    def _cancel_batch(self, batch_id, format_name):
+        if batch_id not in self.mock.batches:
+            return self._send_json(404, {"error": {"message": "Batch not found."}})
+        self.mock.batches[batch_id]["cancelled"] = True
+        build = self._build_openai_batch if format_name == "openai" else self._build_anthropic_batch
+        self._send_json(200, build(batch_id))
+
+    def _poll_batch(self, batch_id):
+        """Complete the batch once it has been polled batch_polls times."""
+        batch = self.mock.batches[batch_id]
+        batch["polls"] += 1
+        if batch["cancelled"] or batch.get("output_file_id") or batch["polls"] < self.mock.batch_polls:
+            return
+        results = []
+        for line in batch["lines"]:
+            if batch["format"] == "openai":
+                body = line["body"]
+                response = self.mock.create_response(body, body.get("max_completion_tokens") or body.get("max_tokens"))
+                results.append({
+                    "id": f"req_{uuid.uuid4().hex}",
+                    "custom_id": line["custom_id"],
+                    "error": None,
+                    "response": {
+                        "status_code": 200,
+                        "body": OpenAIFormat().build_response(body.get("model"), response),
+                    },
+                })
+            else:
+                params = line["params"]
+                response = self.mock.create_response(params, params.get("max_tokens"))
+                results.append({"custom_id": line["custom_id"], "result": {
+                    "type": "succeeded", "message": AnthropicFormat().build_response(params.get("model"), response),
+                }})
+        file_id = batch_id if batch["format"] == "openai" else f"results-{batch_id}"
+        self.mock.files[file_id] = "".join(json.dumps(result) + "\n" for result in results)
+        batch["output_file_id"] = file_id
+
+    # Helpers
+
+    def _get_own_url(self):
+        return f"http://{self.headers.get('host')}"
+
+    def _send_json(self, status, payload, headers=None):
+        self._send_text(json.dumps(payload), status, "application/json", headers)
+
+    def _send_text(self, text, status=200, content_type="application/jsonl", headers=None):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("content-type", content_type)
+        self.send_header("content-length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+def _collect_text(value):
+    """Return every string found in a JSON value, joined by spaces."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return " ".join(_collect_text(item) for key, item in value.items() if key not in ("role", "type"))
+    if isinstance(value, list):
+        return " ".join(_collect_text(item) for item in value)
+    return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the providers' APIs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before the first byte")
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--response-tokens", type=int, default=64)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--requests-per-minute", type=int, default=None)
+    parser.add_argument("--tokens-per-minute", type=int, default=None)
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--batch-polls", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    args = vars(parser.parse_args())
+    server = MockProviderServer(**args)
+    print(f"Mock providers listening on {server.base_url}, set GILA_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
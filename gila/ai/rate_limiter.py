@@ -0,0 +1,193 @@
+import asyncio
+import time
+from datetime import datetime
+
+from .transport import parse_duration
+
+
+class TokenBucket:
+    """Budget of a single rate limit, refilled continuously over time.
+
+    The bucket starts unbounded and learns its capacity, level and refill rate
+    from what the provider reports, so that a limit is only enforced once it
+    is actually known.
+    """
+
+    # Window assumed for the refill rate until a reset time is observed
+    DEFAULT_WINDOW = 60
+
+    def __init__(self):
+        self.capacity = None
+        self.level = None
+        self.refill_rate = None
+        self._updated_at = time.monotonic()
+
+    def update(self, limit, remaining, reset=None):
+        """Synchronize the bucket with the state reported by the provider.
+
+        Parameters:
+            limit (float): The maximum size of the budget.
+            remaining (float): The part of the budget still available.
+            reset (float, optional): Seconds until the budget is full again.
+        """
+        self.capacity = limit
+        self.level = min(remaining, limit)
+        if reset and remaining < limit:
+            self.refill_rate = (limit - remaining) / reset
+        elif self.refill_rate is None:
+            self.refill_rate = limit / self.DEFAULT_WINDOW
+        self._updated_at = time.monotonic()
+
+    def get_wait(self, cost):
+        """Return how many seconds to wait before cost can be spent.
+
+        Parameters:
+            cost (float): The amount of budget the request will use.
+
+        Returns:
+            float: 0 if the budget is available now or the limit is unknown.
+        """
+        if self.capacity is None:
+            return 0
+        self._refill()
+        cost = min(cost, self.capacity)
+        if self.level >= cost:
+            return 0
+        return (cost - self.level) / self.refill_rate
+
+    def spend(self, cost):
+        """Remove cost from the budget, if the limit is known."""
+        if self.capacity is not None:
+            self._refill()
+            self.level -= min(cost, self.capacity)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated_at) * self.refill_rate)
+        self._updated_at = now
+
+
+class ProviderRateLimiter:
+    """Pace the requests sent to a single provider.
+
+    Requests and tokens have a bucket each, kept in sync with the
+    x-ratelimit-* (or anthropic-ratelimit-*) headers of every response. The
+    tokens a request will use aren't known in advance, so they are estimated
+    from the usage reported in response_info by the previous ones.
+
+    Requests wait their turn in acquire, in the order they arrived, instead of
+    being sent and rejected with a 429.
+    """
+
+    # Weight of the last request in the estimate of the tokens per request
+    ESTIMATE_WEIGHT = 0.3
+
+    def __init__(self, company):
+        self.company = company
+        self.requests = TokenBucket()
+        self.tokens = TokenBucket()
+        self.estimated_tokens = 0
+        self._blocked_until = 0
+        self._lock = None
+
+    async def acquire(self):
+        """Wait until the provider's budget allows sending another request,
+        then reserve it.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while wait := self._get_wait():
+                await asyncio.sleep(wait)
+            self.requests.spend(1)
+            self.tokens.spend(self.estimated_tokens)
+
+    def _get_wait(self):
+        return max(
+            self._blocked_until - time.monotonic(),
+            self.requests.get_wait(1),
+            self.tokens.get_wait(self.estimated_tokens),
+            0,
+        )
+
+    def block(self, delay):
+        """Hold every request to the provider for delay seconds, after the
+        provider rejected one for exceeding its limits.
+        """
+        self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+
+    def update_from_headers(self, headers):
+        """Learn the provider's limits from the headers of a response.
+
+        Parameters:
+            headers (httpx.Headers): The headers of the response.
+        """
+        for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            if state := self._read_limit(headers, kind):
+                bucket.update(*state)
+
+    def record_usage(self, response_info):
+        """Update the estimate of the tokens used by each request.
+
+        Parameters:
+            response_info (dict): The response info returned by the client.
+        """
+        if not response_info:
+            return
+        used = response_info.get("Total tokens") or (
+            (response_info.get("Prompt tokens") or 0) + (response_info.get("Completion tokens") or 0)
+        )
+        if not used:
+            return
+        if not self.estimated_tokens:
+            self.estimated_tokens = used
+        else:
+            self.estimated_tokens += self.ESTIMATE_WEIGHT * (used - self.estimated_tokens)
+
+    def _read_limit(self, headers, kind):
+        """Return the (limit, remaining, reset) triple reported for kind, or
+        None if the response doesn't include it.
+        """
+        for template in ("x-ratelimit-{field}-{kind}", "anthropic-ratelimit-{kind}-{field}"):
+            limit = headers.get(template.format(field="limit", kind=kind))
+            remaining = headers.get(template.format(field="remaining", kind=kind))
+            if limit is None or remaining is None:
+                continue
+            try:
+                limit, remaining = float(limit), float(remaining)
+            except ValueError:
+                return None
+            if limit <= 0:
+                return None
+            reset = headers.get(template.format(field="reset", kind=kind))
+            return limit, remaining, self._parse_reset(reset) if reset else None
+        return None
+
+    def _parse_reset(self, value):
+        """Parse a reset header, either a duration or an RFC 3339 timestamp."""
+        if (seconds := parse_duration(value)) is not None:
+            return seconds
+        try:
+            return max(0.0, datetime.fromisoformat(value).timestamp() - time.time())
+        except ValueError:
+            return None
+
+
+class RateLimiter:
+    """Registry of the rate limiters of each provider, keyed by company.
+
+    Every client of the same company shares its limiter, since providers
+    enforce limits per API key rather than per model or per chat.
+    """
+
+    def __init__(self):
+        self._limiters = {}
+
+    def get(self, company):
+        """Return the limiter of company, creating it on first use."""
+        if company not in self._limiters:
+            self._limiters[company] = ProviderRateLimiter(company)
+        return self._limiters[company]
+
+
+RATE_LIMITER = RateLimiter()
@@ -0,0 +1,156 @@
+import json
+import os
+import sys
+import threading
+from collections.abc import Mapping
+
+from . import clients
+from ..core.startup_profiler import STARTUP_PROFILER
+
+
+# Client used for each company when a model doesn't matter, e.g. to check keys
+COMPANY_MODELS = {
+    "ANTHROPIC": ("AnthropicClient", "claude-3-5-sonnet-latest"),
+    "ARLI": ("ArliClient", "Llama-3.3-70B-Instruct"),
+    "COHERE": ("CohereClient", "command"),
+    "DEEPSEEK": ("DeepSeekClient", "deepseek-chat"),
+    "GOOGLE": ("GoogleClient", "gemini-2.0-flash"),
+    "GROQ": ("GroqClient", "gemma2-9b-it"),
+    "MISTRAL": ("MistralClient", "mistral-small-latest"),
+    "OPENAI": ("GPTClient", "gpt-4o-mini"),
+}
+
+
+class ModelDescriptor:
+    """Catalog entry of a model: all that is needed to build its client,
+    without building it."""
+
+    def __init__(self, name, class_name, params, limits=None, context_window=None):
+        self.name = name
+        self.class_name = class_name
+        self.params = params
+        self.limits = limits or [4096, 1]
+        self.context_window = context_window
+
+    @property
+    def is_image_model(self):
+        """Whether the model generates images instead of chatting."""
+        return self.class_name == "ImageGenClient"
+
+    def create_client(self):
+        """Return a new instance of the model's client, importing its
+        provider module if it's the first one.
+
+        Raises:
+            AttributeError: If the client class doesn't exist.
+        """
+        client = getattr(clients, self.class_name)(*self.params)
+        client.context_window = self.context_window
+        return client
+
+
+class ClientRegistry(Mapping):
+    """Readable model names mapped to their clients, built on first use.
+
+    The descriptors are loaded the first time the registry is read, and the
+    client of a model is instantiated the first time it's looked up: later
+    lookups return the same instance. Since it's shared, that instance is
+    only meant for what doesn't depend on a chat, like the provider's
+    endpoints or checking API keys: chats get their own client from the
+    model's descriptor. Iterating over the names or reading descriptors
+    builds no client.
+    """
+
+    def __init__(self, load_descriptors):
+        self._load_descriptors = load_descriptors
+        self._descriptors = None
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def get_descriptor(self, name):
+        """Return the ModelDescriptor of name, or None if it doesn't exist."""
+        return self._get_descriptors().get(name)
+
+    def __getitem__(self, name):
+        with self._lock:
+            if (client := self._clients.get(name)) is None:
+                client = self._clients[name] = self._get_descriptors()[name].create_client()
+            return client
+
+    def __iter__(self):
+        return iter(self._get_descriptors())
+
+    def __len__(self):
+        return len(self._get_descriptors())
+
+    def __contains__(self, name):
+        return name in self._get_descriptors()
+
+    def _get_descriptors(self):
+        if self._descriptors is None:
+            self._descriptors = self._load_descriptors()
+        return self._descriptors
+
+
+def _read_models_json():
+    """Read storage/assets/json/models.json, also from the PyInstaller bundle."""
+    try:
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.abspath(".")
+    relative_path = "storage/assets/json/models.json"
+    file_path = os.path.join(base_path, relative_path)
+
+    with open(file_path, 'r') as file:
+        return json.load(file)
+
+
+def load_model_descriptors():
+    """Load the descriptors of the models from the JSON file.
+
+    The JSON file must have the following structure for each model:
+
+        {
+            "Readable Model Name": {
+                "limits": [max_tokens, max_temperature],
+                "context_window": context_window_tokens,
+                "client": {
+                    "class": "ClassName",
+                    "model": ["model-name"]
+                }
+            },
+            ...
+        }
+
+    Returns:
+        dict: A dictionary where the keys are the model names and the values
+        are the corresponding ModelDescriptor instances.
+    """
+    descriptors = {}
+    with STARTUP_PROFILER.span("load_model_descriptors") as args:
+        for model_name, data in _read_models_json().items():
+            if client_data := data.get("client"):
+                class_name = client_data.get("class")
+                if class_name in clients.__all__:
+                    descriptors[model_name] = ModelDescriptor(
+                        model_name, class_name, client_data.get("model", []),
+                        data.get("limits"), data.get("context_window")
+                    )
+                else:
+                    print(f"Class {class_name} not found for {model_name}.")
+            else:
+                print(f"Data not found for model {model_name}.")
+        args["models"] = len(descriptors)
+    return descriptors
+
+
+def load_company_descriptors():
+    """Return the descriptors of the clients in COMPANY_MODELS."""
+    return {
+        company: ModelDescriptor(company, class_name, [model])
+        for company, (class_name, model) in COMPANY_MODELS.items()
+    }
+
+
+AVAILABLE_MODELS = ClientRegistry(load_model_descriptors)
+COMPANIES = ClientRegistry(load_company_descriptors)
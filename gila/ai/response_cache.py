@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+class ResponseCache:
+    """Content-addressed cache of AI responses, stored on disk.
+
+    Entries are keyed by a hash of the request's endpoint and body, never of
+    its headers, so API keys are left out; a key passed in the endpoint's
+    query string, as Google's is, is removed before hashing. Only
+    deterministic requests, sent with temperature 0, are cached: with any
+    other temperature the same request is expected to produce a different
+    answer.
+
+    Each entry is a small JSON file. Reading an entry refreshes its
+    modification time, so when the cache grows over max_size the least
+    recently used entries are removed first. Entries older than ttl seconds
+    are ignored and deleted.
+    """
+
+    def __init__(self, directory="storage/response_cache", max_size=100 * 1024 * 1024, ttl=7 * 24 * 3600):
+        self.directory = directory
+        self.max_size = max_size
+        self.ttl = ttl
+        self.enabled = False
+
+    def get_key(self, params):
+        """Return the key of a request, or None if it must not be cached.
+
+        Parameters:
+            params (dict): The parameters returned by _get_request_params.
+
+        Returns:
+            str or None: The hex digest of the normalized request.
+        """
+        if not self.enabled or params["data"].get("temperature") != 0:
+            return None
+        normalized = json.dumps(
+            {"endpoint": self._strip_api_key(params["endpoint"]), "data": params["data"]},
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _strip_api_key(endpoint):
+        """Return endpoint without the key query parameter."""
+        parts = urlsplit(endpoint)
+        query = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True) if name != "key"]
+        return urlunsplit(parts._replace(query=urlencode(query)))
+
+    def get(self, key):
+        """Return the cached (ai_response, response_info) tuple of key, or
+        None if there is no valid entry."""
+        path = self._get_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("created", 0) > self.ttl:
+            self._remove(path)
+            return None
+        # Mark the entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["ai_response"], entry["response_info"]
+
+    def put(self, key, ai_response, response_info):
+        """Store a response and evict old entries if the cache is too big.
+
+        The file is written to a temporary name and then renamed, so a
+        concurrent get never reads a partial entry.
+        """
+        path = self._get_path(key)
+        entry = {"created": time.time(), "ai_response": ai_response, "response_info": response_info}
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError) as e:
+            print(f"Response not cached: {e}")
+            return
+        self._evict()
+
+    def clear(self):
+        """Remove every entry of the cache."""
+        for path, _ in self._iter_entries():
+            self._remove(path)
+
+    def _get_path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _iter_entries(self):
+        """Yield the path and stat result of every entry."""
+        if not os.path.isdir(self.directory):
+            return
+        for subdirectory in os.scandir(self.directory):
+            if not subdirectory.is_dir():
+                continue
+            for entry in os.scandir(subdirectory.path):
+                if entry.name.endswith(".json"):
+                    try:
+                        yield entry.path, entry.stat()
+                    except OSError:
+                        continue
+
+    def _evict(self):
+        """Remove expired entries, then the least recently used ones until
+        the cache fits in max_size."""
+        now = time.time()
+        entries = []
+        total_size = 0
+        for path, stat in self._iter_entries():
+            if now - stat.st_mtime > self.ttl:
+                self._remove(path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+        if total_size <= self.max_size:
+            return
+        for _, size, path in sorted(entries):
+            self._remove(path)
+            total_size -= size
+            if total_size <= self.max_size:
+                break
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+RESPONSE_CACHE = ResponseCache()
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import os
+import sys
+import time
+
+from .manager import AIManager
+
+
+class HeadlessRunner:
+    """Send every prompt of a JSONL file to the models and write the results
+    to another JSONL file, without the GUI.
+
+    Every input row is a JSON object with a "prompt" and optionally an "id",
+    a "model" and a "system_message", which override the runner's defaults.
+    Rows without an id are identified by their line number. Every prompt is
+    sent as a new chat, by a client of its own.
+
+    Up to concurrency requests per provider are in flight at the same time,
+    all on the client layer's event loop, and they still go through the
+    per-company rate limiters. Rows are taken one at a time by a bounded
+    pool of workers, so only the clients of the rows in flight exist at
+    once, and a row that fails for any reason is recorded as failed without
+    stopping the others. Each result is appended to the output file as
+    soon as it arrives, with its latency and token usage, so after a crash
+    the same command resumes where it stopped: rows that already have a
+    successful result are skipped, failed ones are sent again.
+    """
+
+    def __init__(self, model_name, concurrency=4, temperature=1.0, max_tokens=1024, system_message=None):
+        """
+        Parameters:
+            model_name (str): Readable name of the default model.
+            concurrency (int): Maximum number of concurrent requests per provider.
+            temperature (float): The sampling temperature to use.
+            max_tokens (int): The maximum number of tokens to generate.
+            system_message (str, optional): The default system message.
+        """
+        self.model_name = model_name
+        self.concurrency = concurrency
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.system_message = system_message
+        self._semaphores = {}
+        self._done = 0
+
+    async def run_async(self, input_path, output_path):
+        """Process every row of input_path not yet done in output_path.
+
+        Returns:
+            tuple: The number of successful and failed rows of this run.
+        """
+        rows = self.read_rows(input_path)
+        completed = self.read_completed_ids(output_path)
+        pending = [row for row in rows if row["id"] not in completed]
+        self._done = 0
+        self._log(f"{len(rows)} rows, {len(rows) - len(pending)} already done, {len(pending)} to send.")
+        # Enough workers to keep every provider busy, each taking the next row
+        model_names = {row.get("model", self.model_name) for row in pending}
+        worker_count = max(1, min(len(pending), self.concurrency * len(model_names)))
+        rows = iter(pending)
+        results = []
+        with open(output_path, "a", encoding="utf-8") as output:
+            await asyncio.gather(*(self._run_rows(rows, output, len(pending), results) for _ in range(worker_count)))
+        succeeded = sum(results)
+        return succeeded, len(results) - succeeded
+
+    async def _run_rows(self, rows, output, total, results):
+        """Run the rows left in the shared iterator rows, one at a time."""
+        for row in rows:
+            results.append(await self._run_row(row, output, total))
+
+    def read_rows(self, input_path):
+        """Return the rows of input_path, each with an id."""
+        rows = []
+        with open(input_path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                row.setdefault("id", line_number)
+                rows.append(row)
+        return rows
+
+    def read_completed_ids(self, output_path):
+        """Return the ids of the rows with a successful result in output_path.
+
+        A line cut short by a crash is ignored, so its row is sent again.
+        """
+        completed = set()
+        if not os.path.exists(output_path):
+            return completed
+        with open(output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    continue
+                if result.get("ok"):
+                    completed.add(result["id"])
+        return completed
+
+    async def _run_row(self, row, output, total):
+        """Send the prompt of row and append its result to output.
+
+        Any exception raised while doing so is written as the row's failure.
+
+        Returns:
+            bool: True if the model answered.
+        """
+        model_name = row.get("model", self.model_name)
+        result = {"id": row["id"], "model": model_name}
+        try:
+            result.update(await self._send_row(row, model_name))
+        except Exception as e:
+            result.update(ok=False, response=f"Unexpected error: {e!r}")
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        output.flush()
+        self._done += 1
+        self._log(f"[{self._done}/{total}] {row['id']}: {'ok' if result['ok'] else result['response']}")
+        return result["ok"]
+
+    async def _send_row(self, row, model_name):
+        """Return the fields of the result of row."""
+        if "prompt" not in row:
+            return {"ok": False, "response": "Missing prompt."}
+        client = AIManager.create_client(
+            model_name,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            system_message=row.get("system_message", self.system_message),
+        )
+        if client is None:
+            return {"ok": False, "response": f"Unknown model {model_name}."}
+        if client.api_key is None:
+            return {"ok": False, "response": f"Missing {client.company} API key."}
+        async with self._get_semaphore(client.company):
+            started = time.perf_counter()
+            no_errors, response, response_info = await client.submit_prompt_async(row["prompt"])
+            latency = time.perf_counter() - started
+        return {"ok": no_errors, "response": response, "response_info": response_info, "latency": round(latency, 3)}
+
+    def _get_semaphore(self, company):
+        if company not in self._semaphores:
+            self._semaphores[company] = asyncio.Semaphore(self.concurrency)
+        return self._semaphores[company]
+
+    @staticmethod
+    def _log(message):
+        print(message, file=sys.stderr, flush=True)
@@ -0,0 +1,27 @@
+import random
+import string
+
+
+class ChatSession:
+    """A chat: its identity and the client that holds its history and
+    settings.
+
+    Every session is given its own client instance, never one shared with
+    other chats, so that starting, switching or restoring a chat doesn't
+    alter another one. A response that arrives after its chat was closed is
+    added to that chat's history only, and the history is released together
+    with the session.
+    """
+
+    def __init__(self, client, chat_id=None, chat_date=None, chat_custom_name=None, is_loaded=False):
+        self.client = client
+        self.chat_id = chat_id or self.generate_chat_id()
+        self.chat_date = chat_date
+        self.chat_custom_name = chat_custom_name
+        # True if the chat was restored from storage/saved_data
+        self.is_loaded = is_loaded
+
+    @staticmethod
+    def generate_chat_id():
+        """Return a unique chat ID of 10 random alphanumeric characters."""
+        return ''.join(random.choices(string.ascii_letters + string.digits, k=10))
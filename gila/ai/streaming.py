@@ -0,0 +1,67 @@
+from collections import namedtuple
+
+
+ServerSentEvent = namedtuple("ServerSentEvent", ["event", "data"])
+
+
+class SSEDecoder:
+    """Incremental decoder for text/event-stream responses.
+
+    Lines are fed one at a time, as they arrive from the connection, and an
+    event is returned every time a blank line closes it. Comments and the
+    id/retry fields are ignored since no provider relies on them.
+    """
+
+    def __init__(self):
+        self._event = None
+        self._data = []
+
+    def feed(self, line):
+        """Process one line of the stream.
+
+        Parameters:
+            line (str): A line of the response body without its line ending.
+
+        Returns:
+            ServerSentEvent or None: The completed event if line terminates
+            one, None otherwise.
+        """
+        if line == "":
+            return self._flush()
+        if line.startswith(":"):
+            return None
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "event":
+            self._event = value
+        elif field == "data":
+            self._data.append(value)
+        return None
+
+    def _flush(self):
+        """Build the pending event and reset the decoder state."""
+        if self._event is None and not self._data:
+            return None
+        event = ServerSentEvent(self._event or "message", "\n".join(self._data))
+        self._event = None
+        self._data = []
+        return event
+
+
+async def aiter_sse_events(lines):
+    """Yield the events decoded from an asynchronous iterable of lines.
+
+    Parameters:
+        lines (async iterable): Lines of a text/event-stream body, as returned
+                                by httpx.Response.aiter_lines().
+
+    Yields:
+        ServerSentEvent: Each event as soon as it is complete.
+    """
+    decoder = SSEDecoder()
+    async for line in lines:
+        if event := decoder.feed(line.rstrip("\r")):
+            yield event
+    if event := decoder.feed(""):
+        yield event
@@ -0,0 +1,121 @@
+import asyncio
+
+from .context import CONTEXT_WINDOW, get_message_text
+
+
+class RollingSummarizer:
+    """Replace the old turns of long chats with a running summary.
+
+    After every answer, turns older than the last window_turns are folded
+    into the chat's summary by a cheap model of the catalog, in the
+    background. Summaries are made in batches of at least batch_turns turns,
+    so the beginning of the prompt stays the same for several turns and
+    providers can keep caching it.
+
+    The summary is stored on the client, and saved with the chat, while the
+    history is left whole: _get_context_messages puts the summary in place of
+    the summarized turns when the request is built.
+    """
+
+    # Cheap models, in order of preference: the first one with an API key is used
+    MODEL_NAMES = ("GPT-4.1 nano", "Gemini 2.0 Flash-Lite", "Llama 3.1 8B instant", "Claude 3.5 Haiku")
+    MAX_SUMMARY_TOKENS = 1024
+    INSTRUCTIONS = (
+        "You keep a running summary of a conversation between a user and an AI "
+        "assistant. Merge the new messages into the current summary. Keep facts, "
+        "decisions, names, numbers, code identifiers and open questions; drop "
+        "small talk. Write in the language of the conversation and answer with "
+        "the updated summary only."
+    )
+
+    def __init__(self, client_factory, window_turns=6, batch_turns=4):
+        """
+        Parameters:
+            client_factory (callable): Function creating a new client from a
+                                       model name, temperature, max tokens and
+                                       system message, like
+                                       AIManager.create_client.
+            window_turns (int): Number of recent turns always sent verbatim.
+            batch_turns (int): Minimum number of turns summarized at once.
+        """
+        self.client_factory = client_factory
+        self.window_turns = window_turns
+        self.batch_turns = batch_turns
+        self.enabled = False
+        # Running tasks by id of their client, which they keep alive until done
+        self._tasks = {}
+
+    def schedule(self, client):
+        """Start summarizing client's old turns in the background if needed.
+
+        Must be called from the event loop. A client is never summarized by
+        two tasks at once.
+        """
+        if not self.enabled or self._get_summary_end(client) is None:
+            return
+        key = id(client)
+        if key in self._tasks:
+            return
+        task = self._tasks[key] = asyncio.get_running_loop().create_task(self.summarize_async(client))
+        task.add_done_callback(lambda task: self._tasks.pop(key, None))
+
+    async def summarize_async(self, client):
+        """Fold the turns that left the window into client's summary.
+
+        The summary is applied only if the chat hasn't changed in the
+        meantime, i.e. the client still holds the same history.
+
+        Returns:
+            bool: True if the summary has been updated.
+        """
+        summary_end = self._get_summary_end(client)
+        summarizer_client = self._create_summarizer_client()
+        if summary_end is None or summarizer_client is None:
+            return False
+        chat_history = client.chat_history
+        # Pinned turns are sent verbatim anyway
+        begin = max(client.summarized_until, CONTEXT_WINDOW.get_system_end(chat_history))
+        new_messages = []
+        for turn in CONTEXT_WINDOW.split_turns(chat_history[:summary_end], begin):
+            if not CONTEXT_WINDOW.is_pinned(turn, client.pinned_messages):
+                new_messages.extend(chat_history[turn[0]:turn[1]])
+        no_errors, summary, _ = await summarizer_client.submit_prompt_async(
+            self._build_prompt(client.chat_summary, new_messages)
+        )
+        if not no_errors:
+            print(f"Chat not summarized: {summary}")
+            return False
+        if client.chat_history is not chat_history:
+            return False
+        client.chat_summary = summary.strip()
+        client.summarized_until = summary_end
+        client.context_start = 0
+        return True
+
+    def _get_summary_end(self, client):
+        """Return the index of chat_history up to which the turns should be
+        summarized, or None if there aren't enough old turns yet."""
+        begin = max(client.summarized_until, CONTEXT_WINDOW.get_system_end(client.chat_history))
+        turns = CONTEXT_WINDOW.split_turns(client.chat_history, begin)
+        # The last turn may still be waiting for its answer
+        if len(turns) < self.window_turns + self.batch_turns + 1:
+            return None
+        return turns[-self.window_turns - 1][1]
+
+    def _create_summarizer_client(self):
+        for model_name in self.MODEL_NAMES:
+            client = self.client_factory(model_name, 0, self.MAX_SUMMARY_TOKENS, self.INSTRUCTIONS)
+            if client is not None and client.api_key:
+                return client
+        return None
+
+    def _build_prompt(self, summary, messages):
+        lines = []
+        for message in messages:
+            role = "User" if message.get("role") == "user" else "Assistant"
+            lines.append(f"{role}: {get_message_text(message)}")
+        return (
+            f"Current summary:\n{summary or '(empty)'}\n\n"
+            "New messages:\n" + "\n\n".join(lines) + "\n\n"
+            "Write the updated summary."
+        )
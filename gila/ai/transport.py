@@ -0,0 +1,372 @@
+import asyncio
+import random
+import re
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import httpx
+
+from .event_loop import EVENT_LOOP
+
+
+# Errors raised before the request reached the provider, or when a pooled
+# connection was closed by the server before answering: resending is safe
+RETRYABLE_ERRORS = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.PoolTimeout,
+    httpx.RemoteProtocolError,
+)
+
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value):
+    """Parse durations such as "20ms", "1.5s" or "6m0s" into seconds.
+
+    Parameters:
+        value (str): A plain number of seconds or a duration string as sent in
+                     the x-ratelimit-reset-* headers.
+
+    Returns:
+        float or None: The duration in seconds, or None if value can't be parsed.
+    """
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    matches = _DURATION_PATTERN.findall(value)
+    if not matches:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in matches)
+
+
+class RetryPolicy:
+    """Decide whether and when a failed request should be sent again.
+
+    Rate limited and overloaded responses are retried after the delay asked
+    by the provider through the Retry-After, retry-after-ms or
+    x-ratelimit-reset-* headers. When the provider gives no hint, the delay
+    grows exponentially with full jitter, so that concurrent requests don't
+    retry in lockstep.
+    """
+
+    RETRY_STATUSES = {408, 429, 500, 502, 503, 504, 529}
+    RESET_HEADERS = ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+
+    def __init__(self, max_retries=3, backoff_base=1.0, backoff_max=30.0, max_retry_after=60.0):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+
+    def get_backoff(self, attempt):
+        """Return a jittered exponential delay for the given attempt.
+
+        Parameters:
+            attempt (int): Number of attempts already failed, starting from 0.
+
+        Returns:
+            float: Seconds to wait before the next attempt.
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def get_retry_delay(self, attempt, response):
+        """Return how long to wait before retrying the request that produced
+        response, or None if it must not be retried.
+
+        Parameters:
+            attempt (int): Number of attempts already failed, starting from 0.
+            response (httpx.Response): The response of the last attempt.
+
+        Returns:
+            float or None: Seconds to wait, or None if the response is final.
+        """
+        if response.status_code not in self.RETRY_STATUSES or attempt >= self.max_retries:
+            return None
+        requested_delay = self._get_requested_delay(response.headers)
+        if requested_delay is None:
+            return self.get_backoff(attempt)
+        # Waiting longer than this would look like a hang: show the error instead
+        if requested_delay > self.max_retry_after:
+            return None
+        return requested_delay
+
+    def _get_requested_delay(self, headers):
+        """Read the delay asked by the provider, if any, from the headers."""
+        if retry_after_ms := headers.get("retry-after-ms"):
+            try:
+                return max(0.0, float(retry_after_ms) / 1000)
+            except ValueError:
+                pass
+        if retry_after := headers.get("retry-after"):
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                try:
+                    return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+        resets = [parse_duration(headers[name]) for name in self.RESET_HEADERS if name in headers]
+        resets = [reset for reset in resets if reset is not None]
+        return max(resets) if resets else None
+
+
+class _HostPool:
+    """Pooled client of a single host and its bookkeeping."""
+
+    def __init__(self, client):
+        self.client = client
+        self.last_used = time.monotonic()
+        self.active_requests = 0
+
+
+class AsyncHTTPTransport:
+    """Shared asynchronous HTTP layer used by every API client.
+
+    Keeps one pooled httpx.AsyncClient per provider host, so the TCP and TLS
+    handshakes are paid only on the first request of a chat: later turns reuse
+    the kept-alive connection. Clients that stay unused for longer than
+    idle_timeout seconds are closed, since providers drop idle connections on
+    their side anyway.
+
+    Failed requests are sent again according to retry_policy, which is the
+    only place where retries happen for every client. Requests given a
+    rate_limit wait for it before every attempt and report back the limits
+    announced by the provider.
+
+    All the methods are coroutines and must run on EVENT_LOOP, which owns the
+    pooled connections.
+    """
+
+    def __init__(self, pool_connections=4, pool_maxsize=10, idle_timeout=90, retry_policy=None):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.idle_timeout = idle_timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._pools = {}
+        # Clients being closed in the background, referenced until they're done
+        self._closing = set()
+
+    def configure(self, pool_connections=None, pool_maxsize=None, idle_timeout=None):
+        """Change pool settings and drop existing clients so that the next
+        request opens a pool with the new sizes.
+
+        Called outside the event loop, it waits for the clients to be closed.
+        Called from a coroutine on the loop, where waiting would block the
+        loop on itself, the clients are closed in the background instead.
+
+        Parameters:
+            pool_connections (int): Number of connections kept alive per host.
+            pool_maxsize (int): Maximum number of concurrent connections per host.
+            idle_timeout (float): Seconds after which an unused connection is closed.
+        """
+        if pool_connections is not None:
+            self.pool_connections = pool_connections
+        if pool_maxsize is not None:
+            self.pool_maxsize = pool_maxsize
+        if idle_timeout is not None:
+            self.idle_timeout = idle_timeout
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self.close()
+            return
+        for pool in self._pools.values():
+            self._close_client_later(pool.client)
+        self._pools.clear()
+
+    async def post(self, url, headers=None, json=None, timeout=None, rate_limit=None):
+        """Send a POST request through the pooled client of the url's host.
+
+        Parameters:
+            url (str): The full URL of the endpoint.
+            headers (dict): HTTP headers to include in the request.
+            json (dict): The body of the request, serialized as JSON.
+            timeout (httpx.Timeout, optional): Connect and read timeouts, no
+                                               timeout if not given.
+            rate_limit (ProviderRateLimiter, optional): Limiter of the provider
+                                                        the request is sent to.
+
+        Returns:
+            httpx.Response: The final response returned by the server, already read.
+        """
+        return await self.request("POST", url, headers=headers, json=json, timeout=timeout, rate_limit=rate_limit)
+
+    async def request(
+        self, method, url, headers=None, json=None, data=None, files=None, timeout=None, rate_limit=None,
+        max_retries=None
+    ):
+        """Send a request of any method through the pooled client of the
+        url's host, with the same retries as post.
+
+        Parameters:
+            method (str): The HTTP method, such as "GET" or "POST".
+            url (str): The full URL of the endpoint.
+            headers (dict): HTTP headers to include in the request.
+            json (dict): The body of the request, serialized as JSON.
+            data (dict): Form fields, sent together with files.
+            files (dict): Files to upload as multipart/form-data.
+            timeout (httpx.Timeout, optional): Connect and read timeouts, no
+                                               timeout if not given.
+            rate_limit (ProviderRateLimiter, optional): Limiter of the provider
+                                                        the request is sent to.
+            max_retries (int, optional): Retries allowed instead of the
+                                         retry policy's, 0 for a single attempt.
+
+        Returns:
+            httpx.Response: The final response returned by the server, already read.
+        """
+        async with self._use_client(url) as client:
+            request = lambda: client.build_request(
+                method, url, headers=headers, json=json, data=data, files=files, timeout=timeout
+            )
+            return await self._send_with_retries(
+                client, request, stream=False, rate_limit=rate_limit, max_retries=max_retries
+            )
+
+    @asynccontextmanager
+    async def stream(self, url, headers=None, json=None, timeout=None, rate_limit=None):
+        """Send a POST request and give access to the response before its
+        body has been read.
+
+        Retries happen only before the response is handed over, so a stream
+        is never restarted after part of it has been delivered. Leaving the
+        context, or cancelling the task using it, closes the response.
+
+        Parameters:
+            url (str): The full URL of the endpoint.
+            headers (dict): HTTP headers to include in the request.
+            json (dict): The body of the request, serialized as JSON.
+            timeout (httpx.Timeout, optional): Connect and read timeouts, no
+                                               timeout if not given.
+            rate_limit (ProviderRateLimiter, optional): Limiter of the provider
+                                                        the request is sent to.
+
+        Yields:
+            httpx.Response: The response, whose body can be iterated.
+        """
+        async with self._use_client(url) as client:
+            request = lambda: client.build_request("POST", url, headers=headers, json=json, timeout=timeout)
+            response = await self._send_with_retries(client, request, stream=True, rate_limit=rate_limit)
+            try:
+                yield response
+            finally:
+                await response.aclose()
+
+    async def _send_with_retries(self, client, build_request, stream, rate_limit=None, max_retries=None):
+        """Send the request built by build_request until it succeeds, fails
+        with a final response, or retry_policy gives up.
+
+        Parameters:
+            client (httpx.AsyncClient): The pooled client of the host.
+            build_request (callable): Function returning a new httpx.Request.
+            stream (bool): Whether the body of the response must be left unread.
+            rate_limit (ProviderRateLimiter, optional): Limiter to wait for
+                                                        before each attempt.
+            max_retries (int, optional): Overrides retry_policy.max_retries.
+
+        Returns:
+            httpx.Response: The last response received.
+
+        Raises:
+            httpx.HTTPError: If the last attempt failed without a response.
+        """
+        if max_retries is None:
+            max_retries = self.retry_policy.max_retries
+        attempt = 0
+        while True:
+            if rate_limit is not None:
+                await rate_limit.acquire()
+            try:
+                response = await client.send(build_request(), stream=stream)
+            except RETRYABLE_ERRORS:
+                if attempt >= max_retries:
+                    raise
+                await asyncio.sleep(self.retry_policy.get_backoff(attempt))
+                attempt += 1
+                continue
+            delay = self.retry_policy.get_retry_delay(attempt, response) if attempt < max_retries else None
+            if rate_limit is not None:
+                rate_limit.update_from_headers(response.headers)
+                if response.status_code == 429 and delay is not None:
+                    rate_limit.block(delay)
+            if delay is None:
+                return response
+            await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self):
+        """Close every pooled client and release its connections."""
+        pools = list(self._pools.values())
+        self._pools.clear()
+        for pool in pools:
+            await pool.client.aclose()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+    def close(self):
+        """Close the pooled clients from outside the event loop.
+
+        Connected to QApplication.aboutToQuit.
+        """
+        if self._pools or self._closing:
+            EVENT_LOOP.run(self.aclose())
+
+    @asynccontextmanager
+    async def _use_client(self, url):
+        """Lend the client of the url's host for the duration of a request,
+        creating it on first use and evicting clients that have been idle for
+        too long.
+        """
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        self._evict_idle_pools(time.monotonic())
+        pool = self._pools.get(host)
+        if pool is None:
+            pool = self._pools[host] = _HostPool(self._build_client())
+        pool.active_requests += 1
+        try:
+            yield pool.client
+        finally:
+            pool.active_requests -= 1
+            pool.last_used = time.monotonic()
+
+    def _evict_idle_pools(self, now):
+        """Close clients with no request in flight that weren't used in the
+        last idle_timeout seconds.
+        """
+        expired = [
+            host for host, pool in self._pools.items()
+            if pool.active_requests == 0 and now - pool.last_used > self.idle_timeout
+        ]
+        for host in expired:
+            self._close_client_later(self._pools.pop(host).client)
+
+    def _close_client_later(self, client):
+        """Close client in a task of the running loop, keeping a reference to
+        the task until it's done and reporting its failure, if any."""
+        task = asyncio.get_running_loop().create_task(client.aclose())
+        self._closing.add(task)
+        task.add_done_callback(self._on_client_closed)
+
+    def _on_client_closed(self, task):
+        self._closing.discard(task)
+        if not task.cancelled() and (error := task.exception()) is not None:
+            print(f"An idle HTTP client could not be closed: {error}")
+
+    def _build_client(self):
+        """Create a keep-alive client with a sized connection pool."""
+        limits = httpx.Limits(
+            max_connections=self.pool_maxsize,
+            max_keepalive_connections=self.pool_connections,
+            keepalive_expiry=self.idle_timeout,
+        )
+        return httpx.AsyncClient(limits=limits, timeout=None)
+
+
+TRANSPORT = AsyncHTTPTransport()
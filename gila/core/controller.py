@@ -5,7 +5,11 @@ from .updater import Updater
 
 class Controller(QObject):
     user_prompt_to_model = Signal(str)
+    stop_response_to_model = Signal()
+    discard_response_to_model = Signal()
+    response_cancelled_to_chatlog = Signal(str)
     response_message_to_chatlog = Signal(str)
+    response_delta_to_chatlog = Signal(str)
     response_info_to_chatlog = Signal(dict)
     new_settings_to_manager = Signal(str, float, int, str, str, str, int, str)
     new_chat_started_to_model = Signal()
@@ -13,12 +17,18 @@ class Controller(QObject):
     missing_api_key_to_view = Signal(str)
     api_key_to_manager = Signal(str, str)
     api_key_is_valid_to_view = Signal(bool)
+    validate_api_keys_to_manager = Signal()
+    api_key_status_to_view = Signal(str, str)
     loading_saved_chat_id_to_manager = Signal(str)
     download_progress_to_view = Signal(int)
     download_finished_to_view = Signal()
     updater_error_to_view = Signal(str)
     cancel_download_to_updater = Signal()
     install_update_to_updater = Signal()
+    compare_prompt_to_model = Signal(str, list)
+    reset_comparison_to_model = Signal()
+    compare_result_to_view = Signal(str, bool, str, dict, float)
+    compare_finished_to_view = Signal(float)
 
     def __init__(self, model, view):
         super().__init__()
@@ -37,20 +47,38 @@ class Controller(QObject):
         self.user_prompt_to_model.connect(
             self.model.get_user_prompt_slot
         )
+        self.stop_response_to_model.connect(
+            self.model.stop_response_slot
+        )
+        self.discard_response_to_model.connect(
+            self.model.discard_response_slot
+        )
         self.new_settings_to_manager.connect(
             self.model.manager.set_new_settings_slot
         )
         self.api_key_to_manager.connect(
             self.model.manager.api_key_slot
         )
+        self.validate_api_keys_to_manager.connect(
+            self.model.manager.validate_api_keys_slot
+        )
         self.loading_saved_chat_id_to_manager.connect(
             self.model.manager.restore_chat_from_id_slot
         )
+        self.compare_prompt_to_model.connect(
+            self.model.get_compare_prompt_slot
+        )
+        self.reset_comparison_to_model.connect(
+            self.model.reset_comparison_slot
+        )
 
         # Connect MODEL's signals to CONTROLLER's slots
         self.model.response_message_to_controller.connect(
             self.response_message_slot
         )
+        self.model.response_delta_to_controller.connect(
+            self.response_delta_slot
+        )
         self.model.response_info_to_controller.connect(
             self.response_info_slot
         )
@@ -60,9 +88,21 @@ class Controller(QObject):
         self.model.generic_error_to_controller.connect(
             self.generic_error_slot
         )
+        self.model.response_cancelled_to_controller.connect(
+            self.response_cancelled_slot
+        )
         self.model.manager.api_key_is_valid_to_controller.connect(
             self.api_key_is_valid_slot
         )
+        self.model.manager.api_key_status_to_controller.connect(
+            self.api_key_status_slot
+        )
+        self.model.compare_result_to_controller.connect(
+            self.compare_result_slot
+        )
+        self.model.compare_finished_to_controller.connect(
+            self.compare_finished_slot
+        )
 
     def _connect_view(self):
         """Connect the controller's signals to the view's slots and vice versa.
@@ -71,27 +111,21 @@ class Controller(QObject):
         self.response_message_to_chatlog.connect(
             self.view.chat.get_response_message_slot
         )
+        self.response_delta_to_chatlog.connect(
+            self.view.chat.get_response_delta_slot
+        )
         self.response_info_to_chatlog.connect(
             self.view.chat.get_response_info_slot
         )
+        self.response_cancelled_to_chatlog.connect(
+            self.view.chat.get_response_cancelled_slot
+        )
         self.update_status_bar.connect(
             self.view.status_bar.update_msg_slot
         )
         self.missing_api_key_to_view.connect(
             self.view.add_api_key_modal_slot
         )
-        self.api_key_is_valid_to_view.connect(
-            self.view.add_api_key_modal.check_api_key_validation_slot
-        )
-        self.download_progress_to_view.connect(
-            self.view.download_update_modal.show_download_progress_slot
-        )
-        self.download_finished_to_view.connect(
-            self.view.download_update_modal.show_download_finished_slot
-        )
-        self.updater_error_to_view.connect(
-            self.view.download_update_modal.show_updater_error_slot
-        )
 
         # Connect VIEW's signals to CONTROLLER's slots
         self.view.window_closed_signal_to_controller.connect(
@@ -115,22 +149,85 @@ class Controller(QObject):
         self.view.chat.start_new_chat_to_controller.connect(
             self.chat_started_slot
         )
-        self.view.add_api_key_modal.api_key_to_controller.connect(
+        self.view.chat.stop_response_to_controller.connect(
+            self.stop_response_slot
+        )
+        # Modals are connected when they're built, see modal_built_slot
+        self.view.modal_built_to_controller.connect(
+            self.modal_built_slot
+        )
+
+        # Connect ChatLog to Status Bar
+        self.view.chat.update_status_bar_from_chatlog.connect(
+            self.view.status_bar.update_msg_slot
+        )
+
+    @Slot(str, object)
+    def modal_built_slot(self, name, modal):
+        """Slot
+        Connected to one signal:
+        - view.modal_built_to_controller
+
+        Connect the signals of a modal that has just been built, by calling
+        the _connect_<name> method of the controller, if there is one.
+
+        Parameters:
+            name (str): The name of the modal's attribute on the view.
+            modal (Modal): The modal.
+        """
+        if connect := getattr(self, f"_connect_{name}", None):
+            connect(modal)
+
+    def _connect_add_api_key_modal(self, modal):
+        self.api_key_is_valid_to_view.connect(
+            modal.check_api_key_validation_slot
+        )
+        modal.api_key_to_controller.connect(
             self.api_key_from_modal_slot
         )
-        self.view.update_found_modal.download_update_requested.connect(
+
+    def _connect_manage_api_keys_modal(self, modal):
+        self.api_key_status_to_view.connect(
+            modal.show_api_key_status_slot
+        )
+        modal.validate_api_keys_to_controller.connect(
+            self.validate_api_keys_slot
+        )
+
+    def _connect_update_found_modal(self, modal):
+        modal.download_update_requested.connect(
             self.download_update_requested_slot
         )
-        self.view.download_update_modal.cancel_download_requested_to_controller.connect(
+
+    def _connect_download_update_modal(self, modal):
+        self.download_progress_to_view.connect(
+            modal.show_download_progress_slot
+        )
+        self.download_finished_to_view.connect(
+            modal.show_download_finished_slot
+        )
+        self.updater_error_to_view.connect(
+            modal.show_updater_error_slot
+        )
+        modal.cancel_download_requested_to_controller.connect(
             self.cancel_download_requested_slot
         )
-        self.view.download_update_modal.install_update_requested_to_controller.connect(
+        modal.install_update_requested_to_controller.connect(
             self.install_update_requested_slot
         )
 
-        # Connect ChatLog to Status Bar
-        self.view.chat.update_status_bar_from_chatlog.connect(
-            self.view.status_bar.update_msg_slot
+    def _connect_compare_models_modal(self, modal):
+        self.compare_result_to_view.connect(
+            modal.show_compare_result_slot
+        )
+        self.compare_finished_to_view.connect(
+            modal.show_compare_finished_slot
+        )
+        modal.compare_prompt_to_controller.connect(
+            self.compare_prompt_slot
+        )
+        modal.reset_comparison_to_controller.connect(
+            self.reset_comparison_slot
         )
 
     def _connect_updater(self):
@@ -181,6 +278,26 @@ class Controller(QObject):
             "Response received. Waiting for a new message..."
         )
 
+    @Slot(str)
+    def response_delta_slot(self, delta):
+        """Slot
+        Connected to one signal:
+        - model.response_delta_to_controller
+        Emits:
+        - response_delta_to_chatlog (view.chat.get_response_delta_slot)
+
+        Handle a piece of a streamed response from the model.
+
+        The first delta replaces the waiting message on the status bar, the
+        following ones are only forwarded to the chat log.
+
+        Parameters:
+            delta (str): The new piece of the AI response.
+        """
+        if not self.view.chat.streaming_response:
+            self.update_status_bar.emit("Receiving response...")
+        self.response_delta_to_chatlog.emit(delta)
+
     @Slot(dict)
     def response_info_slot(self, response_info):
         """Slot
@@ -220,6 +337,35 @@ class Controller(QObject):
         """
         self.user_prompt_to_model.emit(user_prompt)
 
+    @Slot()
+    def stop_response_slot(self):
+        """Slot
+        Connected to one signal:
+        - view.chat.stop_response_to_controller
+        Emits:
+        - stop_response_to_model (model.stop_response_slot)
+
+        Handle the Stop button, cancelling the response being received.
+        """
+        self.stop_response_to_model.emit()
+
+    @Slot(str)
+    def response_cancelled_slot(self, prompt):
+        """Slot
+        Connected to one signal:
+        - model.response_cancelled_to_controller
+        Emits:
+        - response_cancelled_to_chatlog (view.chat.get_response_cancelled_slot)
+        - update_status_bar (view.status_bar.update_msg_slot)
+
+        Handle a response that has been stopped before it was complete.
+
+        Parameters:
+            prompt (str): The prompt whose response has been stopped.
+        """
+        self.response_cancelled_to_chatlog.emit(prompt)
+        self.update_status_bar.emit("Response stopped. Waiting for a new message...")
+
     @Slot(str, float, int, str, str, str, int, str)
     def settings_changed_from_sidebar_slot(self, *args):
         """Slot
@@ -250,30 +396,35 @@ class Controller(QObject):
         Connected to stopping signal from Sidebar:
         - view.sidebar.stop_chat_to_controller
         Saves current chat, cleans log, resets chat and emits two signals:
-        - chat_stopped_to_model (model.chat_stopped_slot)
+        - discard_response_to_model (model.discard_response_slot)
         - update_status_bar (view.status_bar.update_msg_slot)
 
         Handle the stopping of a chat from the sidebar.
 
-        When triggered, it saves the current chat if necessary, cleans the chat
-        log, resets the chat state, and emits signals to indicate that the chat
-        has stopped. Updates the status bar to warn that the conversation has
-        been closed. The chat is saved only if there are changes in the chat log
-        and there is text.
+        When triggered, it first discards the response being received, if
+        any, even if it has already arrived, so that it can't be written into
+        the chat being closed nor into the new one. Then it saves
+        the current chat if necessary, cleans the chat log, resets the chat
+        state, and emits signals to indicate that the chat has stopped.
+        Updates the status bar to warn that the conversation has been closed.
+        The chat is saved only if there are changes in the chat log and there
+        is text.
         """
+        self.view.chat.discard_pending_prompt()
+        self.discard_response_to_model.emit()
         # Chat must be saved only if it's not empty and date must not be changed if chatlog is not changed
-        if self.view.chat.chatlog_has_changed(self.model.manager.client.chat_id) and self.view.chat.chatlog_has_text():
+        if self.view.chat.chatlog_has_changed(self.model.manager.session.chat_id) and self.view.chat.chatlog_has_text():
             self.model.manager.save_current_chat()
             # Adds a new saved_chat_button passing chat_id as argument
             self.view.sidebar.stored_chats.add_stored_chat_button(
-                self.model.manager.client.chat_id
+                self.model.manager.session.chat_id
             )
             self.view.chat.add_log_to_saved_chat_data(
-                self.model.manager.client.chat_id
+                self.model.manager.session.chat_id
             )
         self.view.chat.chat_html_logs = []
         self.view.chat.generate_chat_html()
-        self.model.manager.client.reset_chat()
+        self.model.manager.new_session()
         # Starts a new chat
         self.update_status_bar.emit("New conversation started.")
         self.chat_started_slot()
@@ -299,7 +450,7 @@ class Controller(QObject):
         user The UI elements related to the chat are shown or hidden based on
         the connection status.
         """
-        if self.model.manager.client.is_loaded:
+        if self.model.manager.session.is_loaded:
             self._chat_loaded()
         else:
             self._initialize_new_chat()
@@ -315,7 +466,7 @@ class Controller(QObject):
         # Update chat title
         self.view.chat.update_chat_title()
         # Set the current chat id
-        self.view.sidebar.stored_chats.current_chat_id = self.model.manager.client.chat_id
+        self.view.sidebar.stored_chats.current_chat_id = self.model.manager.session.chat_id
         # If there is connection, start a new conversation
         if self.model.manager.check_internet_connection():
             self.model.manager.stream_stopped = False
@@ -348,25 +499,15 @@ class Controller(QObject):
         info labels in the chat view. If the user has selected a new client,
         it updates the model's client settings accordingly.
 
-        If a new client is set, the method updates various parameters and resets
-        the chat state for the new client. Finally, it sets the chat history to
-        include the system message.
+        If new settings are set, the manager replaces the current session with
+        a new one that uses them. Finally, it sets the chat history to include
+        the system message.
         """
         # Get saved response info to show them if chat is loaded
         self.view.chat.reset_response_info_labels()
         # Set the new client, if user has chosen a new one
-        if self.model.manager.next_client:
-            self.model.manager.client = self.model.manager.next_client[0]
-            self.model.manager.client.llm_name = self.model.manager.next_client[1]
-            self.model.manager.client.temperature = self.model.manager.next_temperature
-            self.model.manager.client.max_tokens = self.model.manager.next_max_tokens
-            self.model.manager.client.system_message = self.model.manager.next_system_message
-            self.model.manager.client.image_size = self.model.manager.next_image_size
-            self.model.manager.client.image_quality = self.model.manager.next_image_quality
-            self.model.manager.client.image_quantity = self.model.manager.next_image_quantity
-            self.model.manager.client.reasoning_effort = self.model.manager.next_reasoning_effort
-            self.model.manager.client.reset_chat()
-            self.model.manager.next_client = None
+        if self.model.manager.next_llm_name:
+            self.model.manager.apply_next_settings()
         # If chat is new we need to call set_chat_history to set system message
         self.model.manager.client.set_chat_history()
 
@@ -412,6 +553,34 @@ class Controller(QObject):
         """
         self.api_key_is_valid_to_view.emit(is_key_valid)
 
+    @Slot()
+    def validate_api_keys_slot(self):
+        """Slot
+        Connected to one signal:
+        - view.manage_api_keys_modal.validate_api_keys_to_controller
+        Emits one signal:
+        - validate_api_keys_to_manager (model.manager.validate_api_keys_slot)
+
+        Ask the manager to check every stored API key.
+        """
+        self.validate_api_keys_to_manager.emit()
+
+    @Slot(str, str)
+    def api_key_status_slot(self, company, status):
+        """Slot
+        Connected to one signal:
+        - model.manager.api_key_status_to_controller
+        Emits one signal:
+        - api_key_status_to_view (view.manage_api_keys_modal.show_api_key_status_slot)
+
+        Forward the status of the stored key of a company to the view.
+
+        Parameters:
+            company (str): The name of the company, in uppercase.
+            status (str): "valid", "invalid", "unverified" or "missing".
+        """
+        self.api_key_status_to_view.emit(company, status)
+
     @Slot()
     def connection_error_slot(self):
         """Slot
@@ -456,6 +625,68 @@ class Controller(QObject):
         self.view.warning_modal.on_label(error)
         self.view.warning_modal.exec_()
 
+    @Slot(str, list)
+    def compare_prompt_slot(self, prompt, model_names):
+        """Slot
+        Connected to one signal:
+        - view.compare_models_modal.compare_prompt_to_controller
+        Emits:
+        - compare_prompt_to_model (model.get_compare_prompt_slot)
+        - update_status_bar (view.status_bar.update_msg_slot)
+
+        Handle a prompt to be sent to several models at once.
+
+        Parameters:
+            prompt (str): The prompt written in the compare modal.
+            model_names (list): Readable names of the selected models.
+        """
+        self.compare_prompt_to_model.emit(prompt, model_names)
+        self.update_status_bar.emit(f"Comparing {len(model_names)} models...")
+
+    @Slot()
+    def reset_comparison_slot(self):
+        """Slot
+        Connected to one signal:
+        - view.compare_models_modal.reset_comparison_to_controller
+        Emits:
+        - reset_comparison_to_model (model.reset_comparison_slot)
+        """
+        self.reset_comparison_to_model.emit()
+
+    @Slot(str, bool, str, dict, float)
+    def compare_result_slot(self, *args):
+        """Slot
+        Connected to one signal:
+        - model.compare_result_to_controller
+        Emits:
+        - compare_result_to_view (view.compare_models_modal.show_compare_result_slot)
+
+        Forward the result of a single model of a comparison to the view.
+
+        Parameters:
+            model_name (str): The readable name of the model.
+            no_errors (bool): Whether the model answered without errors.
+            response_message (str): The answer or the error message.
+            response_info (dict): Token usage of the answer.
+            latency (float): Seconds the model took to answer.
+        """
+        self.compare_result_to_view.emit(*args)
+
+    @Slot(float)
+    def compare_finished_slot(self, wall_time):
+        """Slot
+        Connected to one signal:
+        - model.compare_finished_to_controller
+        Emits:
+        - compare_finished_to_view (view.compare_models_modal.show_compare_finished_slot)
+        - update_status_bar (view.status_bar.update_msg_slot)
+
+        Parameters:
+            wall_time (float): Seconds taken by the whole comparison.
+        """
+        self.compare_finished_to_view.emit(wall_time)
+        self.update_status_bar.emit(f"Comparison completed in {wall_time:.2f} s.")
+
     @Slot(str)
     def loading_saved_chat_id_slot(self, chat_id):
         """Slot
@@ -495,7 +726,7 @@ class Controller(QObject):
         """
         if self.view.chat.chatlog_has_text():
             self.model.manager.save_current_chat()
-            self.view.chat.add_log_to_saved_chat_data(self.model.manager.client.chat_id)
+            self.view.chat.add_log_to_saved_chat_data(self.model.manager.session.chat_id)
 
     @Slot()
     def requested_update_check_slot(self):
@@ -0,0 +1,121 @@
+import importlib._bootstrap as _bootstrap
+import os
+import sys
+import threading
+import time
+
+
+class ImportRecord:
+    """Time spent importing a module, in seconds.
+
+    cumulative includes the modules imported by this one while it was being
+    executed, self_time doesn't. started is a time.perf_counter value and
+    thread the identifier of the thread that imported the module.
+    """
+
+    def __init__(self, name, depth, started=0.0, thread=None):
+        self.name = name
+        self.depth = depth
+        self.started = started
+        self.thread = thread
+        self.cumulative = 0.0
+        self.children = 0.0
+
+    @property
+    def self_time(self):
+        return self.cumulative - self.children
+
+
+class ImportTracer:
+    """Time the import of every module from within the app, like
+    python -X importtime.
+
+    While installed, it wraps the function of importlib that both import
+    statements and importlib.import_module go through to load a module, so
+    the modules imported on first use are traced as well. Only modules that
+    weren't imported yet are recorded.
+
+    It's enabled by the --import-trace argument or the GILA_IMPORT_TRACE
+    environment variable, see is_import_trace_enabled, and reports the
+    slowest imports once the window is shown.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.installed_at = None
+        self._original = None
+        self._local = threading.local()
+
+    @property
+    def is_installed(self):
+        return self._original is not None
+
+    def install(self):
+        """Start tracing imports and return the tracer."""
+        if self._original is None:
+            self._original = _bootstrap._find_and_load
+            _bootstrap._find_and_load = self._find_and_load
+            self.installed_at = time.perf_counter()
+        return self
+
+    def uninstall(self):
+        """Stop tracing imports, keeping the records."""
+        if self._original is not None:
+            _bootstrap._find_and_load = self._original
+            self._original = None
+
+    def get_total(self):
+        """Return the seconds spent importing since the tracer was installed."""
+        return sum(record.cumulative for record in self.records if record.depth == 0)
+
+    def get_report(self, limit=25):
+        """Return a table of the slowest imports, by cumulative time.
+
+        Parameters:
+            limit (int): The number of modules to list.
+
+        Returns:
+            str: The report, one module per line.
+        """
+        top_level = [record for record in self.records if record.depth == 0]
+        lines = [
+            f"{len(self.records)} modules imported in {self.get_total() * 1000:.1f} ms "
+            f"({len(top_level)} imported directly)",
+            f"{'self [ms]':>10} | {'cumulative [ms]':>15} | module",
+        ]
+        for record in sorted(self.records, key=lambda record: record.cumulative, reverse=True)[:limit]:
+            lines.append(f"{record.self_time * 1000:>10.1f} | {record.cumulative * 1000:>15.1f} | {record.name}")
+        return "\n".join(lines)
+
+    def write_report(self, message=None, file=None, limit=25):
+        """Write the report to file, stderr by default, after an optional
+        message."""
+        file = file or sys.stderr
+        if message:
+            print(message, file=file)
+        print(self.get_report(limit), file=file)
+
+    def _find_and_load(self, name, import_):
+        if name in sys.modules:
+            return self._original(name, import_)
+        stack = self._local.__dict__.setdefault("stack", [])
+        record = ImportRecord(name, len(stack), time.perf_counter(), threading.get_ident())
+        stack.append(record)
+        try:
+            return self._original(name, import_)
+        finally:
+            record.cumulative = time.perf_counter() - record.started
+            stack.pop()
+            if stack:
+                stack[-1].children += record.cumulative
+            self.records.append(record)
+
+
+def is_import_trace_enabled(argv=None):
+    """Return whether the import trace was requested, by the --import-trace
+    argument or the GILA_IMPORT_TRACE environment variable."""
+    argv = sys.argv if argv is None else argv
+    return "--import-trace" in argv or os.getenv("GILA_IMPORT_TRACE", "") not in ("", "0")
+
+
+IMPORT_TRACER = ImportTracer()
@@ -1,23 +1,73 @@
-from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+import asyncio
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+from gila.ai.event_loop import EVENT_LOOP
 
 
 class WorkerSignals(QObject):
-    """Signals for worker threads to communicate with the main thread."""
+    """Signals for workers to communicate with the main thread."""
     finished = Signal(bool, str, dict)
+    delta = Signal(str)
     error = Signal(str)
 
 
-class PromptWorker(QRunnable):
+class CompareWorkerSignals(QObject):
+    """Signals for compare workers to communicate with the main thread."""
+    result = Signal(str, bool, str, dict, float)
+    finished = Signal(float)
+
+
+class PromptWorker:
+    """Submit a prompt as a coroutine on the client layer's event loop.
+
+    The worker doesn't own a thread: while the response is awaited it costs
+    a single task on EVENT_LOOP, and its signals are delivered to the main
+    thread through queued connections.
+    """
 
     def __init__(self, manager, prompt):
-        super().__init__()
         self.manager = manager
         self.prompt = prompt
         self.signals = WorkerSignals()
+        self.future = None
+        self.task = None
 
-    @Slot()
-    def run(self):
-        """Execute the prompt submission in a separate thread.
+    def start(self):
+        """Schedule run on the event loop."""
+        self.future = EVENT_LOOP.submit(self.run())
+
+    def cancel(self):
+        """Cancel the submission and wait until it has stopped.
+
+        Cancelling the task closes the connection, or the stream, the response
+        was coming from, and makes the client remove the unanswered user
+        message from the chat history. Waiting for it guarantees that nothing
+        is written to the history after this method returns.
+
+        Returns:
+            bool: True if the submission was cancelled, False if it had
+                  already finished and its result is on the way.
+        """
+        if self.future is None or self.future.done():
+            return False
+        return EVENT_LOOP.run(self._cancel_task())
+
+    async def _cancel_task(self):
+        # run may not have started yet, in which case the future is enough
+        if self.task is None:
+            return self.future.cancel()
+        if self.task.done():
+            return False
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            return True
+        return False
+
+    async def run(self):
+        """Execute the prompt submission on the event loop.
         
         Processes the assigned prompt by submitting it to the manager's client
         and emit the result through signals expecting a response in the format
@@ -27,9 +77,14 @@ class PromptWorker(QRunnable):
         - A message with the response content.
         - A dictionary with additional information about the response.
 
+        If the manager has response streaming enabled, every text delta of the
+        response is emitted through the `delta` signal while it arrives.
+
         If the processing completes successfully, the `finished` signal is
-        emitted with the results. If an exception occurs during processing,
-        the `error` signal is emitted with the error message.
+        emitted with the results and the manager's summarizer is given the
+        chance to summarize the older turns in the background. If an exception
+        occurs during processing, the `error` signal is emitted with the error
+        message.
 
         Raises:
             ConnectionError: If there is a network connection issue.
@@ -37,11 +92,15 @@ class PromptWorker(QRunnable):
             Exception: I there is an unexpected error raised during the prompt
                        submission.
         """
+        self.task = asyncio.current_task()
         try:
             client = self.manager.client
-            ai_response = client.submit_prompt(self.prompt)
+            on_delta = self.signals.delta.emit if self.manager.stream_responses else None
+            ai_response = await client.submit_prompt_async(self.prompt, on_delta=on_delta)
             no_errors, response_message, response_info = ai_response
             self.signals.finished.emit(no_errors, response_message, response_info)
+            if no_errors:
+                self.manager.summarizer.schedule(client)
         except (ConnectionError, TimeoutError) as e:
             self.signals.error.emit(f"Network error: {str(e)}")
         except Exception as e:
@@ -50,16 +109,51 @@ class PromptWorker(QRunnable):
             print(traceback.format_exc())
 
 
+class CompareWorker:
+    """Submit a prompt to every model of a CompareSession on the event loop.
+
+    Results are emitted one by one as each model answers, so they can be
+    shown before the slowest model is done.
+    """
+
+    def __init__(self, session, prompt):
+        self.session = session
+        self.prompt = prompt
+        self.signals = CompareWorkerSignals()
+        self.future = None
+
+    def start(self):
+        """Schedule run on the event loop."""
+        self.future = EVENT_LOOP.submit(self.run())
+
+    async def run(self):
+        """Submit the prompt to the compared models.
+
+        The `result` signal is emitted for each model with its name, the
+        success flag, the response or error message, the response info and
+        its latency; the `finished` signal is emitted with the total wall time
+        once every model has answered.
+        """
+        wall_time = await self.session.submit_prompt_async(self.prompt, self.signals.result.emit)
+        self.signals.finished.emit(wall_time)
+
+
 class Model(QObject):
     response_message_to_controller = Signal(str)
+    response_delta_to_controller = Signal(str)
     response_info_to_controller = Signal(dict)
     connection_error_to_controller = Signal()
     generic_error_to_controller = Signal(str)
+    response_cancelled_to_controller = Signal(str)
+    compare_result_to_controller = Signal(str, bool, str, dict, float)
+    compare_finished_to_controller = Signal(float)
 
     def __init__(self, manager):
         super().__init__()
         self.manager = manager
-        self.thread_pool = QThreadPool.globalInstance()
+        self.current_worker = None
+        self.compare_session = None
+        self.compare_worker = None
 
     @Slot(bool, str, dict)
     def handle_worker_finished(self, no_errors, response_message, response_info):
@@ -74,6 +168,9 @@ class Model(QObject):
             response_info (dict): Additional information from the worker about
                                   the response.
         """
+        if not self._is_from_current_worker():
+            return
+        self.current_worker = None
         if no_errors:
             self.response_message_to_controller.emit(response_message)
             self.response_info_to_controller.emit(response_info)
@@ -83,22 +180,34 @@ class Model(QObject):
             else:
                 self.generic_error_to_controller.emit(response_message)
 
+    @Slot(str)
+    def handle_worker_delta(self, delta):
+        """Forward a text delta of a streamed response to the controller.
+
+        Parameters:
+            delta (str): The new piece of the AI response.
+        """
+        if self._is_from_current_worker():
+            self.response_delta_to_controller.emit(delta)
+
     @Slot(str)
     def get_user_prompt_slot(self, prompt):
-        """Handle the reception of the user prompt and initiates processing in
-        a separate worker thread.
+        """Handle the reception of the user prompt and initiates processing on
+        the event loop.
 
         Initialize a PromptWorker with the provided prompt and connects its
         signals to the corresponding slot methods for handling the results and
-        errors. The worker is then started in the thread pool.
+        errors. The worker is then started on the event loop.
 
         Parameters:
             prompt (str): The user prompt to process.
         """
         worker = PromptWorker(self.manager, prompt)
         worker.signals.finished.connect(self.handle_worker_finished)
+        worker.signals.delta.connect(self.handle_worker_delta)
         worker.signals.error.connect(self.handle_worker_error)
-        self.thread_pool.start(worker)
+        worker.start()
+        self.current_worker = worker
 
     @Slot(str)
     def handle_worker_error(self, error_message):
@@ -108,4 +217,76 @@ class Model(QObject):
         Parameters:
             error_message (str): The message detailing the error encountered during worker processing.
         """
+        if not self._is_from_current_worker():
+            return
+        self.current_worker = None
         self.generic_error_to_controller.emit(error_message)
+
+    def _is_from_current_worker(self):
+        """Return True if the signal being handled comes from the running worker.
+
+        Signals of a cancelled worker may have been queued before it stopped,
+        and must not reach the chat anymore.
+        """
+        return self.current_worker is not None and self.sender() is self.current_worker.signals
+
+    @Slot()
+    def stop_response_slot(self):
+        """Cancel the prompt being processed, if any.
+
+        The worker is cancelled synchronously, so when this returns the
+        connection is closed and the user message has been removed from the
+        chat history. The prompt is then sent back to the controller, so that
+        the chat log can drop it too. If the response arrived in the meantime,
+        nothing is cancelled and it is shown as usual.
+        """
+        worker = self.current_worker
+        if worker is not None and worker.cancel():
+            self.current_worker = None
+            self.response_cancelled_to_controller.emit(worker.prompt)
+
+    @Slot()
+    def discard_response_slot(self):
+        """Drop the prompt being processed, if any, because its chat is being
+        closed.
+
+        Unlike stop_response_slot, the worker is forgotten even if its
+        response has already arrived, so that its queued result or error
+        can't reach the chat that replaces the closed one, and nothing is
+        sent back to the controller.
+        """
+        worker, self.current_worker = self.current_worker, None
+        if worker is not None:
+            worker.cancel()
+
+    @Slot(str, list)
+    def get_compare_prompt_slot(self, prompt, model_names):
+        """Send a prompt to several models at once in a CompareWorker.
+
+        The compare session is kept while the same models are compared, so
+        that each model can see its own previous answers; selecting different
+        models starts a new one.
+
+        Parameters:
+            prompt (str): The user prompt to send to every model.
+            model_names (list): Readable names of the models to compare.
+        """
+        if self.compare_session is None or self.compare_session.get_model_names() != model_names:
+            self.compare_session = self.manager.create_compare_session(model_names)
+        worker = CompareWorker(self.compare_session, prompt)
+        worker.signals.result.connect(self.compare_result_to_controller)
+        worker.signals.finished.connect(self.compare_finished_to_controller)
+        worker.start()
+        self.compare_worker = worker
+
+    @Slot()
+    def reset_comparison_slot(self):
+        """Forget the compare session, so the next comparison starts over.
+
+        A comparison still running is cancelled, since its results would be
+        discarded anyway.
+        """
+        if self.compare_worker is not None:
+            self.compare_worker.future.cancel()
+            self.compare_worker = None
+        self.compare_session = None
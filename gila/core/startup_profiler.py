@@ -0,0 +1,171 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from .import_trace import IMPORT_TRACER
+
+
+class StartupProfiler:
+    """Timeline of the start of the app, written as a Chrome trace.
+
+    Spans and marks are only recorded between start and the first time the
+    window is interactive, so the calls left in the code cost a check of
+    is_started otherwise. The trace is a JSON file in the Trace Event
+    Format, that chrome://tracing and https://ui.perfetto.dev can open; if
+    the import trace is installed, every import is added to it as well.
+
+    It's enabled by the --startup-trace argument or the GILA_STARTUP_TRACE
+    environment variable, see get_startup_trace_path, and is written when
+    the event loop is first idle after the window is painted.
+    """
+
+    def __init__(self):
+        # (name, phase, started, duration, args, thread, category) tuples
+        self.events = []
+        self.path = None
+        self.started_at = None
+        self.is_started = False
+        self._paint_filter = None
+        self._lock = threading.Lock()
+
+    def start(self, path):
+        """Start recording the timeline that will be written to path, and
+        return the profiler."""
+        self.path = path
+        self.events = []
+        self.started_at = time.perf_counter()
+        self.is_started = True
+        return self
+
+    def stop(self):
+        """Stop recording, keeping the events."""
+        self.is_started = False
+
+    @contextmanager
+    def span(self, name, **args):
+        """Record the time spent in the with block as a span of the timeline.
+
+        Parameters:
+            name (str): The name of the span.
+            **args: Details shown with the span.
+
+        Yields:
+            dict: The details of the span, the block can add more to it, like
+            the number of items it loaded.
+        """
+        if not self.is_started:
+            yield args
+            return
+        started = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self._add_event(name, "X", started, time.perf_counter() - started, args)
+
+    def mark(self, name, **args):
+        """Record an instant of the timeline."""
+        if self.is_started:
+            self._add_event(name, "i", time.perf_counter(), None, args)
+
+    def watch_first_paint(self, widget):
+        """Mark the first paint of widget, then the first time the event loop
+        is idle after it, when the window is interactive, and write the trace.
+        """
+        # Imported here, so that the profiler can be started before Qt
+        from PySide6.QtCore import QEvent, QObject, QTimer
+
+        profiler = self
+
+        class FirstPaintFilter(QObject):
+            def eventFilter(self, watched, event):
+                if event.type() == QEvent.Type.Paint:
+                    watched.removeEventFilter(self)
+                    profiler.mark("first paint")
+                    QTimer.singleShot(0, profiler._finish)
+                return False
+
+        self._paint_filter = FirstPaintFilter(widget)
+        widget.installEventFilter(self._paint_filter)
+
+    def get_trace(self, import_tracer=None):
+        """Return the timeline in the Trace Event Format.
+
+        Parameters:
+            import_tracer (ImportTracer): The import trace whose records are
+                added to the timeline, if it's installed.
+
+        Returns:
+            dict: The trace, ready to be saved as JSON.
+        """
+        with self._lock:
+            events = list(self.events)
+        if import_tracer is not None and import_tracer.is_installed:
+            events.extend(
+                (f"import {record.name}", "X", record.started, record.cumulative,
+                 {"self_ms": round(record.self_time * 1000, 3)}, record.thread, "import")
+                for record in import_tracer.records
+            )
+        pid = os.getpid()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        trace_events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": names.get(tid, str(tid))}}
+            for tid in sorted({event[5] for event in events})
+        ]
+        for name, phase, started, duration, args, thread, category in events:
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": phase,
+                "ts": round((started - self.started_at) * 1_000_000, 1),
+                "pid": pid,
+                "tid": thread,
+                "args": args,
+            }
+            if duration is None:
+                event["s"] = "p"
+            else:
+                event["dur"] = round(duration * 1_000_000, 1)
+            trace_events.append(event)
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def write(self, path=None, import_tracer=None):
+        """Write the trace as JSON to path, the one given to start by default.
+        """
+        with open(path or self.path, "w", encoding="utf-8") as file:
+            json.dump(self.get_trace(import_tracer), file)
+
+    def _finish(self):
+        self.mark("interactive")
+        self.stop()
+        self.write(import_tracer=IMPORT_TRACER)
+        print(f"Startup trace written to {os.path.abspath(self.path)}", file=sys.stderr)
+
+    def _add_event(self, name, phase, started, duration, args):
+        with self._lock:
+            self.events.append((name, phase, started, duration, args, threading.get_ident(), "startup"))
+
+
+def get_startup_trace_path(argv=None):
+    """Return the path the startup trace should be written to, or None if it
+    wasn't requested.
+
+    The trace is requested by the --startup-trace[=PATH] argument or the
+    GILA_STARTUP_TRACE environment variable, whose value is the path unless
+    it's 1. The default path is startup_trace.json.
+    """
+    argv = sys.argv if argv is None else argv
+    for argument in argv:
+        if argument == "--startup-trace":
+            return "startup_trace.json"
+        if argument.startswith("--startup-trace="):
+            return argument.split("=", 1)[1] or "startup_trace.json"
+    value = os.getenv("GILA_STARTUP_TRACE", "")
+    if value in ("", "0"):
+        return None
+    return "startup_trace.json" if value == "1" else value
+
+
+STARTUP_PROFILER = StartupProfiler()
@@ -1,6 +1,5 @@
 import json
 import os
-import requests
 import subprocess
 import sys
 import tempfile
@@ -28,6 +27,8 @@ class DownloadWorker(QRunnable):
 
     @Slot()
     def run(self):
+        import requests
+
         try:
             response = requests.get(self.url, stream=True, timeout=10)
             response.raise_for_status()
@@ -82,6 +83,9 @@ class Updater(QObject):
         version, compare the two and emit update_found_to_controller signal if
         they're different.
         """
+        # Imported on first use, not to slow down the start of the app
+        import requests
+
         # Get the latest release from GitHub
         try:
             self.latest_version = self._get_latest_release()
@@ -131,6 +135,8 @@ class Updater(QObject):
         QThreadPool.globalInstance().start(self.worker)
 
     def _get_latest_release(self):
+        import requests
+
         response = requests.get(self.api_url, timeout=5)
         response.raise_for_status()
         data = response.json()
@@ -1,9 +1,7 @@
 import os
+import json
 import pickle
 import html
-import bleach
-
-import markdown
 
 from PySide6.QtCore import QObject, QSize, Signal, Slot, QTimer
 from PySide6.QtGui import QIcon, QPixmap, Qt
@@ -23,6 +21,7 @@ class Chat(QObject):
     user_prompt_signal_to_controller = Signal(str)
     update_status_bar_from_chatlog = Signal(str)
     start_new_chat_to_controller = Signal()
+    stop_response_to_controller = Signal()
 
     def __init__(self, window):
         super().__init__()
@@ -30,7 +29,15 @@ class Chat(QObject):
         self.widget_container = QWidget(objectName="chat_container")
 
         self.log_widget = CustomWebView()
+        self.page_assets = None
+        # Pages set by generate_chat_html that haven't finished loading yet
+        self.pending_page_loads = 0
+        self.log_widget.loadFinished.connect(self.page_loaded_slot)
         self.chat_html_logs = []
+        self.streaming_response = ""
+        # Timer that sends the last prompt, and that prompt until it's sent
+        self.timer = None
+        self.pending_prompt = None
         self.prompt_layout = Prompt(self)
         self.tokenizer = Tokenizer()
 
@@ -49,9 +56,7 @@ class Chat(QObject):
         chat_content = "".join(self.chat_html_logs)
         start_msg = "<div class='start_msg'>Send a message to start the chat.</div>" if not chat_content else ""
 
-        css_content = FH.load_file("storage/assets/css/chatlog-styles.css", encoding="utf-8")
-        spinner_css = FH.load_file("storage/assets/css/spinner.css", encoding="utf-8")
-        js_content = FH.load_file("storage/assets/js/scroller.js", encoding="utf-8")
+        css_content, spinner_css, js_content = self._get_page_assets()
 
         html_template = f"""
             <html>
@@ -73,8 +78,52 @@ class Chat(QObject):
                 </body>
             </html>
         """
+        self.pending_page_loads += 1
         self.log_widget.setHtml(html_template)
 
+    @Slot(bool)
+    def page_loaded_slot(self, ok):
+        """ Slot
+        Connected to one signal:
+        - log_widget.loadFinished
+
+        Show the part of the streamed response received while the page was
+        loading.
+
+        setHtml loads the page asynchronously, so deltas that arrive before
+        the load finishes aren't sent to the page, which may still be the old
+        one, but only kept in streaming_response: once the last pending load
+        finishes, that text is written to the page at once.
+
+        Args:
+            ok (bool): Whether the page loaded successfully.
+        """
+        self.pending_page_loads = max(0, self.pending_page_loads - 1)
+        if self.pending_page_loads == 0 and self.streaming_response:
+            self.log_widget.page().runJavaScript(self._build_streaming_js(self.streaming_response, replace=True))
+
+    def _get_page_assets(self):
+        """Return the CSS and the JavaScript of the chat page, read from the
+        assets directory the first time only."""
+        if self.page_assets is None:
+            self.page_assets = (
+                FH.load_file("storage/assets/css/chatlog-styles.css", encoding="utf-8"),
+                FH.load_file("storage/assets/css/spinner.css", encoding="utf-8"),
+                FH.load_file("storage/assets/js/scroller.js", encoding="utf-8"),
+            )
+        return self.page_assets
+
+    def prewarm(self):
+        """Load the empty chat page in the hidden chat log.
+
+        The first page loaded by a web view starts Chromium's render process
+        and downloads the highlight library, which takes much longer than any
+        later load. Called at startup, while the splash screen is shown, so
+        that it happens in the background instead of when the first chat is
+        shown.
+        """
+        self.generate_chat_html()
+
     def _build_chat_container(self):
         """Create the chat layout and adds various widgets to the chat interface."""
         chat_layout = QVBoxLayout(self.widget_container)
@@ -121,19 +170,25 @@ class Chat(QObject):
         return self.prompt_info_layout
 
     def _build_chatlog_info_layout(self):
-        """Create a horizontal layout for displaying chat log information labels."""
+        """Create a horizontal layout for displaying chat log information labels.
+
+        Three labels are created up front, more are added by
+        get_response_info_slot when a client reports more information.
+        """
         self.chatlog_info_layout = QHBoxLayout()
-        self.first_label = QLabel("")
-        self.second_label = QLabel("")
-        self.third_label = QLabel("")
-        self.chatlog_info_labels = [self.first_label, self.second_label, self.third_label]
-        for label in self.chatlog_info_labels:
-            self.window.assign_css_class(label, "chatlog_info_labels")
-        self.chatlog_info_layout.addWidget(self.first_label)
-        self.chatlog_info_layout.addWidget(self.second_label)
-        self.chatlog_info_layout.addWidget(self.third_label)
+        self.chatlog_info_labels = []
+        for _ in range(3):
+            self._add_chatlog_info_label()
         return self.chatlog_info_layout
 
+    def _add_chatlog_info_label(self):
+        """Add an empty label to the chat log information layout."""
+        label = QLabel("")
+        self.window.assign_css_class(label, "chatlog_info_labels")
+        self.chatlog_info_layout.addWidget(label)
+        self.chatlog_info_labels.append(label)
+        return label
+
     def words_counter(self):
         """Count the number of words in the prompt box and updates the display."""
         text = self.prompt_layout.prompt_box.toPlainText()
@@ -154,7 +209,8 @@ class Chat(QObject):
         - Sanitizes the prompt using html.escape and bleach library.
         - Appends the sanitized prompt to the chat log in HTML format.
         - Updates the HTML page to reflect the new user prompt.
-        - Disables the send button to prevent multiple submissions.
+        - Replaces the send button with the stop button to prevent multiple
+          submissions.
         - Changes the cursor to a wait cursor while processing the prompt.
         - Displays a message in the status bar indicating that the message is being sent.
         - Sends the user prompt as a signal after a delay of 0.1 seconds using a timer.
@@ -166,6 +222,8 @@ class Chat(QObject):
             prompt (str): The user input prompt to be processed.
         """
         if prompt != "":
+            import bleach
+
             escaped_prompt = html.escape(prompt)
             sanitized_prompt = bleach.clean(escaped_prompt)
             sanitized_prompt = sanitized_prompt.replace(" ", "&nbsp;")
@@ -189,11 +247,12 @@ class Chat(QObject):
             # Update html page with new user prompt
             self.generate_chat_html()
             # Disable button and return key to send prompts
-            self.prompt_layout.send_button.setEnabled(False)
+            self.prompt_layout.show_stop_button()
             self.prompt_layout.prompt_box.set_return_blocked(True)
             # Shows a message in the status bar
             self.update_status_bar_from_chatlog.emit("I'm sending the message...")
             # Send the signal with user prompt with a delay of 0.1 seconds
+            self.pending_prompt = prompt
             self.timer = QTimer()
             self.timer.setSingleShot(True)
             self.timer.timeout.connect(lambda: self.send_delayed_prompt_signal(prompt))
@@ -211,6 +270,7 @@ class Chat(QObject):
         Args:
             prompt (str): The user input prompt to be sent to the controller.
         """
+        self.pending_prompt = None
         self.user_prompt_signal_to_controller.emit(prompt)
 
     def add_log_to_saved_chat_data(self, chat_id):
@@ -275,10 +335,78 @@ class Chat(QObject):
         Returns:
             str: The converted HTML representation of the Markdown text.
         """
+        # Imported on first use, not to slow down the start of the app
+        import markdown
+
         return markdown.markdown(
             md_text, extensions=["fenced_code", "codehilite", "tables"]
         )
 
+    def _sanitize_response_html(self, formatted_response):
+        """Sanitize the HTML of a response to allow only certain tags and
+        attributes.
+
+        Args:
+            formatted_response (str): The HTML converted from the response.
+
+        Returns:
+            str: The sanitized HTML.
+        """
+        import bleach
+
+        allowed_tags = [
+            'b', 'i', 'u', 'em', 'strong', 'p', 'br', 'ul', 'ol', 'li',
+            'span', 'div', 'code', 'pre', 'table', 'tr', 'th', 'td', 'thead',
+            'tbody', 'tfoot', 'caption'
+        ]
+        allowed_attributes = {'a': ['href', 'title']}
+        return bleach.clean(formatted_response, tags=allowed_tags, attributes=allowed_attributes, strip=True)
+
+    @Slot(str)
+    def get_response_delta_slot(self, delta):
+        """ Slot
+        Connected to one signal:
+        - controller.response_delta_to_chatlog
+
+        Append a piece of a streamed response to the chat log.
+
+        Instead of regenerating the whole HTML page, the delta is added as
+        plain text to a temporary response paragraph through JavaScript: the
+        first delta replaces the spinner with that paragraph. While a page is
+        loading, the delta is only kept, see page_loaded_slot. The complete
+        response is rendered as Markdown by get_response_message_slot when the
+        stream ends.
+
+        Args:
+            delta (str): The new piece of the AI response.
+        """
+        self.streaming_response += delta
+        if self.pending_page_loads == 0:
+            self.log_widget.page().runJavaScript(self._build_streaming_js(delta))
+
+    def _build_streaming_js(self, text, replace=False):
+        """Return the JavaScript that adds text to the streamed response
+        paragraph, creating it in place of the spinner if needed, or that
+        replaces the paragraph's text if replace is True."""
+        operator = "=" if replace else "+="
+        return f"""
+        (() => {{
+            let target = document.getElementById('streaming-response');
+            if (!target) {{
+                document.querySelectorAll('.spinner-wrapper').forEach(el => el.remove());
+                const wrapper = document.createElement('div');
+                wrapper.className = 'ai-wrapper';
+                target = document.createElement('p');
+                target.className = 'response';
+                target.id = 'streaming-response';
+                target.style.whiteSpace = 'pre-wrap';
+                wrapper.appendChild(target);
+                document.body.appendChild(wrapper);
+            }}
+            target.textContent {operator} {json.dumps(text)};
+        }})();
+        """
+
     @Slot(str)
     def get_response_message_slot(self, response):
         """ Slot
@@ -303,8 +431,10 @@ class Chat(QObject):
                             and displayed.
         """
         # Enable button and return key to send prompts
-        self.prompt_layout.send_button.setEnabled(True)
+        self.prompt_layout.show_send_button()
         self.prompt_layout.prompt_box.set_return_blocked(False)
+        # The streamed text is replaced by the fully rendered response
+        self.streaming_response = ""
 
         self.chat_html_logs = [msg for msg in self.chat_html_logs if "spinner-wrapper" not in msg]
         formatted_response = self._convert_markdown_to_html(response)
@@ -317,13 +447,7 @@ class Chat(QObject):
             else:
                 formatted_response = f"<div class='img-wrapper'><img src='{response}' class='img'></div>"
 
-        allowed_tags = [
-            'b', 'i', 'u', 'em', 'strong', 'p', 'br', 'ul', 'ol', 'li',
-            'span', 'div', 'code', 'pre', 'table', 'tr', 'th', 'td', 'thead',
-            'tbody', 'tfoot', 'caption'
-        ]
-        allowed_attributes = {'a': ['href', 'title']}
-        sanitized_response = bleach.clean(formatted_response, tags=allowed_tags, attributes=allowed_attributes, strip=True)
+        sanitized_response = self._sanitize_response_html(formatted_response)
 
         self.chat_html_logs.append(f"""
             <div class='ai-wrapper'>
@@ -332,6 +456,60 @@ class Chat(QObject):
         """)
         self.generate_chat_html()
 
+    @Slot(str)
+    def get_response_cancelled_slot(self, prompt):
+        """ Slot
+        Connected to one signal:
+        - controller.response_cancelled_to_chatlog
+
+        Roll back the chat log after the response to prompt has been stopped.
+
+        The spinner, the partially streamed response and the unanswered user
+        prompt are removed from the chat log, and the prompt is put back in
+        the prompt box so that it can be edited and sent again.
+
+        Args:
+            prompt (str): The prompt whose response has been stopped.
+        """
+        self.prompt_layout.show_send_button()
+        self.prompt_layout.prompt_box.set_return_blocked(False)
+        self.streaming_response = ""
+        self.chat_html_logs = [msg for msg in self.chat_html_logs if "spinner-wrapper" not in msg]
+        if self.chat_html_logs and "user-wrapper" in self.chat_html_logs[-1]:
+            self.chat_html_logs.pop()
+        self.generate_chat_html()
+        self.prompt_layout.prompt_box.setPlainText(prompt)
+
+    def stop_response(self):
+        """Send a signal to controller to stop the response being received.
+
+        If the prompt hasn't been sent yet, its timer is stopped instead and
+        the chat log is rolled back as if the response had been cancelled.
+        """
+        if prompt := self._stop_pending_prompt():
+            self.get_response_cancelled_slot(prompt)
+            self.update_status_bar_from_chatlog.emit("Message not sent. Waiting for a new message...")
+            return
+        self.stop_response_to_controller.emit()
+
+    def discard_pending_prompt(self):
+        """Forget the prompt being sent or answered, because the chat is being
+        closed: the prompt isn't sent if it's still waiting, and the prompt
+        box accepts new prompts again."""
+        self._stop_pending_prompt()
+        self.streaming_response = ""
+        self.prompt_layout.show_send_button()
+        self.prompt_layout.prompt_box.set_return_blocked(False)
+
+    def _stop_pending_prompt(self):
+        """Stop the timer of the prompt not sent yet, if any, and return that
+        prompt."""
+        prompt, self.pending_prompt = self.pending_prompt, None
+        if self.timer is not None and self.timer.isActive():
+            self.timer.stop()
+            return prompt
+        return None
+
     @Slot(dict)
     def get_response_info_slot(self, response_info):
         """Slot
@@ -345,13 +523,19 @@ class Chat(QObject):
         through the items in the dictionary and sets the text of each label 
         to display the key-value pairs.
 
+        Labels are added when the dictionary has more items than labels, and
+        the ones left over from a previous response are emptied.
+
         Args:
             response_info (dict): A dictionary containing response information 
                                   where keys represent the label names and values
                                   represent the corresponding data.
         """
-        for i, (key, value) in enumerate(response_info.items()):
-            self.chatlog_info_labels[i].setText(f"{key}: {value}")
+        while len(self.chatlog_info_labels) < len(response_info):
+            self._add_chatlog_info_label().setVisible(self.log_widget.isVisible())
+        info_texts = [f"{key}: {value}" for key, value in response_info.items()]
+        for i, label in enumerate(self.chatlog_info_labels):
+            label.setText(info_texts[i] if i < len(info_texts) else "")
 
     def reset_response_info_labels(self):
         """Reset the chat log information labels to empty text.
@@ -410,7 +594,8 @@ class Prompt:
         This method initializes a horizontal box layout that contains a prompt
         box for user input (focused on initialization and connected to handle
         the return key press) and a send button that triggers the handling of
-        the user prompt when clicked.
+        the user prompt when clicked. The send button is replaced by a stop
+        button while a response is awaited.
         """
         prompt_layout = QHBoxLayout(objectName="prompt_layout")
         # Adds prompt box
@@ -430,6 +615,13 @@ class Prompt:
         self.send_button.clicked.connect(
             lambda: self.handle_user_prompt("none"))
         prompt_layout.addWidget(self.send_button)
+        # Adds stop button
+        self.stop_button = QPushButton("Stop", objectName="stop_button")
+        self.stop_button.setFixedWidth(50)
+        self.stop_button.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.stop_button.clicked.connect(self.chatlog.stop_response)
+        self.stop_button.hide()
+        prompt_layout.addWidget(self.stop_button)
         return prompt_layout
 
     def handle_user_prompt(self, user_prompt):
@@ -462,12 +654,23 @@ class Prompt:
         self.prompt_box.clear()
         self.prompt_box.setFocus()
 
+    def show_send_button(self):
+        """Show send button in place of stop button"""
+        self.stop_button.hide()
+        self.send_button.show()
+
+    def show_stop_button(self):
+        """Show stop button in place of send button"""
+        self.send_button.hide()
+        self.stop_button.show()
+
     def show_prompt_layout(self):
         """Show prompt layout and send button"""
         self.prompt_box.show()
-        self.send_button.show()
+        self.show_send_button()
 
     def hide_prompt_layout(self):
-        """Hide prompt layout and send button"""
+        """Hide prompt layout, send and stop buttons"""
         self.prompt_box.hide()
         self.send_button.hide()
+        self.stop_button.hide()
@@ -1,5 +1,6 @@
 from .about_gila_modal import AboutGilaModal
 from .add_api_key_modal import AddAPIKeyModal
+from .compare_models_modal import CompareModelsModal
 from .confirm_chat_deletion_modal import ConfirmChatDeletionModal
 from .download_update_modal import DownloadUpdateModal
 from .manage_api_keys_modal import ManageAPIKeysModal
@@ -0,0 +1,175 @@
+import html
+
+from PySide6.QtCore import Slot, Qt
+from PySide6.QtWidgets import (
+    QHBoxLayout,
+    QLabel,
+    QListWidget,
+    QListWidgetItem,
+    QPushButton,
+    QScrollArea,
+    QTextBrowser,
+    QTextEdit,
+    QVBoxLayout,
+    QWidget,
+)
+
+from .parent_modal import Modal
+from ...ai.registry import AVAILABLE_MODELS
+
+
+class CompareModelsModal(Modal):
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.setWindowTitle("Compare Models")
+        self.resize(1000, 700)
+        self.result_panels = {}
+        self.pending_models = set()
+        self._build_modal_layout()
+
+    def _build_modal_layout(self):
+        """ Creates modal layout and calls methods that adds widgets """
+        self.modal_layout = QVBoxLayout(self)
+        self._build_modal_text_label()
+        self.modal_text.setMaximumWidth(16777215)
+        self.modal_text.setText(
+            "Select the models to compare and send them the same prompt. "
+            "Each model keeps its own conversation until the selection changes."
+        )
+        self.add_line_separator(self.modal_layout)
+        self._build_models_list()
+        self._build_prompt_box()
+        self._build_results_area()
+        self.window.set_cursor_pointer_for_buttons(self)
+
+    def _build_models_list(self):
+        """ Add a list of checkable models, image generation models excluded """
+        self.models_list = QListWidget()
+        self.models_list.setMaximumHeight(150)
+        for model_name in AVAILABLE_MODELS:
+            if AVAILABLE_MODELS.get_descriptor(model_name).is_image_model:
+                continue
+            item = QListWidgetItem(model_name)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Unchecked)
+            self.models_list.addItem(item)
+        self.modal_layout.addWidget(self.models_list)
+
+    def _build_prompt_box(self):
+        """ Add the prompt box with the send and clear buttons """
+        self.prompt_box = QTextEdit(objectName="prompt_box_widget")
+        self.prompt_box.setMaximumHeight(80)
+        self.modal_layout.addWidget(self.prompt_box)
+
+        buttons_layout = QHBoxLayout()
+        self.send_button = QPushButton("Send to selected models")
+        self.send_button.clicked.connect(self._send_prompt)
+        self.clear_button = QPushButton("New comparison")
+        self.clear_button.clicked.connect(self._reset_comparison)
+        buttons_layout.addWidget(self.send_button)
+        buttons_layout.addWidget(self.clear_button)
+        self.modal_layout.addLayout(buttons_layout)
+
+        self.wait_label = QLabel("")
+        self.modal_layout.addWidget(self.wait_label)
+
+    def _build_results_area(self):
+        """ Add an horizontal scroll area where results are shown side by side """
+        self.results_widget = QWidget()
+        self.results_layout = QHBoxLayout(self.results_widget)
+        self.results_layout.setAlignment(Qt.AlignLeft)
+        scroll_area = QScrollArea()
+        scroll_area.setWidget(self.results_widget)
+        scroll_area.setWidgetResizable(True)
+        self.modal_layout.addWidget(scroll_area, stretch=1)
+
+    def _build_result_panel(self, model_name):
+        """ Add the panel that shows the answers of a model """
+        panel = QWidget()
+        panel.setMinimumWidth(300)
+        panel_layout = QVBoxLayout(panel)
+        title = QLabel(model_name)
+        self.window.assign_css_class(title, "setting_name")
+        stats = QLabel("Waiting...")
+        self.window.assign_css_class(stats, "current_value_lbl")
+        response = QTextBrowser()
+        response.setOpenExternalLinks(True)
+        panel_layout.addWidget(title)
+        panel_layout.addWidget(stats)
+        panel_layout.addWidget(response)
+        self.results_layout.addWidget(panel)
+        self.result_panels[model_name] = (stats, response)
+
+    def _get_selected_models(self):
+        return [
+            self.models_list.item(i).text()
+            for i in range(self.models_list.count())
+            if self.models_list.item(i).checkState() == Qt.Checked
+        ]
+
+    def _send_prompt(self):
+        """ Gets prompt and selected models and sends them as a Signal """
+        prompt = self.prompt_box.toPlainText().strip()
+        model_names = self._get_selected_models()
+        if not prompt or not model_names:
+            self.wait_label.setText("Write a prompt and select at least one model.")
+            return
+        if list(self.result_panels.keys()) != model_names:
+            self._clear_result_panels()
+            for model_name in model_names:
+                self._build_result_panel(model_name)
+        for stats, response in self.result_panels.values():
+            stats.setText("Waiting...")
+            response.append(f"<p><b>You:</b> {html.escape(prompt)}</p>")
+        self.pending_models = set(model_names)
+        self.send_button.setEnabled(False)
+        self.wait_label.setText(f"Waiting for {len(model_names)} models...")
+        self.prompt_box.clear()
+        self.compare_prompt_to_controller.emit(prompt, model_names)
+
+    def _reset_comparison(self):
+        self._clear_result_panels()
+        self.pending_models = set()
+        self.send_button.setEnabled(True)
+        self.wait_label.setText("")
+        self.reset_comparison_to_controller.emit()
+
+    def _clear_result_panels(self):
+        while self.results_layout.count():
+            if widget := self.results_layout.takeAt(0).widget():
+                widget.deleteLater()
+        self.result_panels = {}
+
+    @Slot(str, bool, str, dict, float)
+    def show_compare_result_slot(self, model_name, no_errors, response_message, response_info, latency):
+        """ Slot
+        Connected to one signal:
+            - controller.compare_result_to_view
+        Shows the answer of a model in its panel, with latency and token usage
+        """
+        if model_name not in self.result_panels:
+            return
+        stats, response = self.result_panels[model_name]
+        self.pending_models.discard(model_name)
+        if no_errors:
+            usage = [f"{key}: {value}" for key, value in response_info.items() if value is not None]
+            stats.setText(" | ".join([f"Latency: {latency:.2f} s", *usage]))
+            response.append(f"<p><b>{html.escape(model_name)}:</b></p>")
+            cursor = response.textCursor()
+            cursor.movePosition(cursor.MoveOperation.End)
+            cursor.insertMarkdown(f"{response_message}\n")
+        else:
+            stats.setText("Error")
+            response.append(f"<p style='color:#f00'>{html.escape(response_message)}</p>")
+        if self.pending_models:
+            self.wait_label.setText(f"Waiting for {len(self.pending_models)} models...")
+
+    @Slot(float)
+    def show_compare_finished_slot(self, wall_time):
+        """ Slot
+        Connected to one signal:
+            - controller.compare_finished_to_view
+        """
+        self.send_button.setEnabled(True)
+        self.wait_label.setText(f"All models answered in {wall_time:.2f} s.")
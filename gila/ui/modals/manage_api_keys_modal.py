@@ -1,14 +1,21 @@
-import os
-
-from dotenv import load_dotenv
+from PySide6.QtCore import Slot
 from PySide6.QtGui import Qt, QPixmap
 from PySide6.QtWidgets import QVBoxLayout, QHBoxLayout, QLabel, QPushButton
 
 from .parent_modal import Modal
 from ..utils import FileHandler as FH
+from ...ai.credentials import CREDENTIALS
 
 
 class ManageAPIKeysModal(Modal):
+    # Text shown next to each company for the statuses of its stored key
+    STATUS_TEXTS = {
+        "checking": "Checking...",
+        "valid": "Valid",
+        "invalid": "Invalid",
+        "unverified": "Couldn't verify",
+        "missing": "",
+    }
 
     def __init__(self, window):
         super().__init__(window)
@@ -37,9 +44,8 @@ class ManageAPIKeysModal(Modal):
         self.window.set_cursor_pointer_for_buttons(self)
 
     def get_stored_api_keys(self):
-        load_dotenv()
         for key in self.api_keys.keys():
-            self.api_keys[f"{key}"] = bool(os.getenv(f"{key.upper()}_API_KEY"))
+            self.api_keys[f"{key}"] = bool(CREDENTIALS.get(key.upper()))
 
     def _build_client_list_row(self, client_name):
         row_layout = QHBoxLayout()
@@ -54,6 +60,8 @@ class ManageAPIKeysModal(Modal):
         green_icon_label.setAlignment(Qt.Alignment.AlignCenter)
         row_layout.addWidget(red_icon_label)
         row_layout.addWidget(green_icon_label)
+        status_label = QLabel(objectName=f"status_{client_name}_label")
+        row_layout.addWidget(status_label)
 
         modify_button = QPushButton("Update")
         modify_button.clicked.connect(lambda: self.window.add_api_key_modal_slot(client_name))
@@ -76,3 +84,32 @@ class ManageAPIKeysModal(Modal):
             else:
                 red_label.hide()
                 green_label.show()
+
+    def validate_api_keys(self):
+        """Ask the controller to check every stored key in the background;
+        each status is shown by show_api_key_status_slot as it arrives."""
+        for key, is_stored in self.api_keys.items():
+            status = "checking" if is_stored else "missing"
+            self.findChild(QLabel, f"status_{key}_label").setText(self.STATUS_TEXTS[status])
+        self.validate_api_keys_to_controller.emit()
+
+    @Slot(str, str)
+    def show_api_key_status_slot(self, company, status):
+        """Slot
+        Connected to one signal:
+        - controller.api_key_status_to_view
+
+        Show the status of the stored key of a company. An invalid key is
+        marked with the red dot, like a missing one.
+
+        Parameters:
+            company (str): The name of the company, in uppercase.
+            status (str): One of the keys of STATUS_TEXTS.
+        """
+        key = next((key for key in self.api_keys if key.upper() == company), None)
+        if key is None:
+            return
+        self.findChild(QLabel, f"status_{key}_label").setText(self.STATUS_TEXTS.get(status, ""))
+        if status == "invalid":
+            self.findChild(QLabel, f"red_{key}_label").show()
+            self.findChild(QLabel, f"green_{key}_label").hide()
@@ -6,9 +6,12 @@ from ..utils import FileHandler as FH
 
 class Modal(QDialog):
     api_key_to_controller = Signal(str, str)
+    validate_api_keys_to_controller = Signal()
     download_update_requested = Signal()
     cancel_download_requested_to_controller = Signal()
     install_update_requested_to_controller = Signal()
+    compare_prompt_to_controller = Signal(str, list)
+    reset_comparison_to_controller = Signal()
 
     def __init__(self, window):
         super().__init__()
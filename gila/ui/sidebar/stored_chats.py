@@ -13,6 +13,7 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
+from ...core.startup_profiler import STARTUP_PROFILER
 from ..modals import RenameChatModal
 from ..modals import ConfirmChatDeletionModal
 from ..utils import FileHandler as FH
@@ -27,12 +28,26 @@ class StoredChats(QObject):
         self.widget_container = QWidget(objectName="stored_chats_widget")
         self.chatlog = None
         self.current_chat_id = None
-        self.rename_modal = RenameChatModal(self.parent_cls.window, self)
-        self.confirm_modal = ConfirmChatDeletionModal(self.parent_cls.window, self)
+        self._rename_modal = None
+        self._confirm_modal = None
         self.chat_marked_for_renaming = None
         self.chat_marked_for_deletion = None
         self._build_stored_chats_layout()
 
+    @property
+    def rename_modal(self):
+        """The modal asking for a new chat name, built on first use."""
+        if self._rename_modal is None:
+            self._rename_modal = RenameChatModal(self.parent_cls.window, self)
+        return self._rename_modal
+
+    @property
+    def confirm_modal(self):
+        """The modal confirming the deletion of a chat, built on first use."""
+        if self._confirm_modal is None:
+            self._confirm_modal = ConfirmChatDeletionModal(self.parent_cls.window, self)
+        return self._confirm_modal
+
     def _build_stored_chats_layout(self):
         self.stored_chats_layout = QVBoxLayout(self.widget_container)
         self.stored_chats_layout.setAlignment(Qt.Alignment.AlignTop)
@@ -41,7 +56,8 @@ class StoredChats(QObject):
         self.scroll_area = QScrollArea()
         self.scroll_area.setWidget(self.widget_container)
         self.scroll_area.setWidgetResizable(True)
-        self._create_chats_list()
+        with STARTUP_PROFILER.span("StoredChats._create_chats_list") as args:
+            args["chats"] = self._create_chats_list()
 
     def on_placeholder_label(self):
         chats = os.listdir("storage/saved_data")
@@ -68,6 +84,7 @@ class StoredChats(QObject):
             saved_data = FH.load_file(f'storage/saved_data/{chat_file}', mode="rb")
             custom_name = saved_data[chat_id]["chat_custom_name"]
             self.add_stored_chat_button(chat_id, custom_name)
+        return len(chats)
  
     def add_stored_chat_button(self, chat_id, custom_name=None):
         """ Adds an horizzontal layout with a button to delete a stored chat,
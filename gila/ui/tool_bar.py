@@ -1,9 +1,6 @@
 from PySide6.QtGui import QAction, QIcon
 from PySide6.QtWidgets import QToolBar, QFileDialog
 
-from bs4 import BeautifulSoup
-from docx import Document
-
 from .utils import FileHandler as FH
 
 
@@ -15,6 +12,7 @@ class ToolBar(QToolBar):
         self._set_icons()
         self._build_save_chatlog_action()
         self._build_manage_api_keys_action()
+        self._build_compare_models_action()
         self._build_update_check_action()
         self._build_open_info_modal_action()
 
@@ -31,6 +29,12 @@ class ToolBar(QToolBar):
         api_keys_action.triggered.connect(self.open_api_keys_modal)
         self.addAction(api_keys_action)
 
+    def _build_compare_models_action(self):
+        compare_action = QAction(self.compare_icon, "&Compare Models", self)
+        compare_action.setStatusTip('Compare Models')
+        compare_action.triggered.connect(self.open_compare_models_modal)
+        self.addAction(compare_action)
+
     def _build_update_check_action(self):
         update_action = QAction(self.update_icon, "&Update Check", self)
         update_action.setStatusTip('Update Check')
@@ -50,6 +54,9 @@ class ToolBar(QToolBar):
         key_icon_path = FH.build_asset_path("storage/assets/icons/key.svg")
         self.key_icon = QIcon()
         self.key_icon.addFile(key_icon_path)
+        compare_icon_path = FH.build_asset_path("storage/assets/icons/compare.svg")
+        self.compare_icon = QIcon()
+        self.compare_icon.addFile(compare_icon_path)
         update_icon_path = FH.build_asset_path("storage/assets/icons/update.svg")
         self.update_icon = QIcon()
         self.update_icon.addFile(update_icon_path)
@@ -77,6 +84,10 @@ class ToolBar(QToolBar):
         )
 
     def _convert_html_to_text(self):
+        # Export libraries are imported on first use, not to slow down the
+        # start of the app
+        from bs4 import BeautifulSoup
+
         html_content = ''.join(self.window.chat.chat_html_logs)
         soup = BeautifulSoup(html_content, "html.parser")
         prompts = soup.find_all("p", class_="prompt")
@@ -96,6 +107,8 @@ class ToolBar(QToolBar):
         )
 
     def _save_docx(self, file_path):
+        from docx import Document
+
         formatted_text = self._convert_html_to_text()
         doc = Document()
         for line in formatted_text:
@@ -108,8 +121,12 @@ class ToolBar(QToolBar):
     def open_api_keys_modal(self):
         self.window.manage_api_keys_modal.get_stored_api_keys()
         self.window.manage_api_keys_modal.update_labels()
+        self.window.manage_api_keys_modal.validate_api_keys()
         self.window.manage_api_keys_modal.exec_()
 
+    def open_compare_models_modal(self):
+        self.window.compare_models_modal.show()
+
     def open_info_modal(self):
         self.window.about_gila_modal.exec_()
 
@@ -1,3 +1,3 @@
 from .custom_qt import CustomTextEdit, CustomWebView
 from .file_handler import FileHandler
-from .tokenizer import Tokenizer
\ No newline at end of file
+from ...ai.tokenizer import Tokenizer
\ No newline at end of file
@@ -15,6 +15,7 @@ from .sidebar.parent_sidebar import Sidebar
 from .modals import (
     AboutGilaModal,
     AddAPIKeyModal,
+    CompareModelsModal,
     DownloadUpdateModal,
     ManageAPIKeysModal,
     UpdateFoundModal,
@@ -26,9 +27,22 @@ from .utils import FileHandler as FH
 class View(QMainWindow):
     window_closed_signal_to_controller = Signal()
     request_update_check_to_controller = Signal()
+    modal_built_to_controller = Signal(str, object)
+
+    # Modals are built the first time they're used, see _get_modal
+    MODALS = {
+        "add_api_key_modal": AddAPIKeyModal,
+        "manage_api_keys_modal": ManageAPIKeysModal,
+        "compare_models_modal": CompareModelsModal,
+        "warning_modal": WarningModal,
+        "about_gila_modal": AboutGilaModal,
+        "update_found_modal": UpdateFoundModal,
+        "download_update_modal": DownloadUpdateModal,
+    }
 
     def __init__(self):
         super().__init__()
+        self._modals = {}
         self.setWindowTitle("Gila")
         self.setWindowIcon(QIcon(FH.build_asset_path("storage/assets/icons/gila_logo.svg")))
         self.resize(1024, 768)
@@ -40,8 +54,9 @@ class View(QMainWindow):
         """Create the layout for the main window and composes the user interface.
 
         This method initializes the central widget and sets up various UI components 
-        such as the status bar, toolbar, sidebar, chat area, and modals. It arranges 
+        such as the status bar, toolbar, sidebar and chat area. It arranges 
         these components in a grid layout within the central widget of the main window.
+        Modals are not built here but on first use.
 
         Notes:
             - The chat log and prompt line are initially hidden.
@@ -52,12 +67,6 @@ class View(QMainWindow):
         self.toolbar = ToolBar(self)
         self.sidebar = Sidebar(self)
         self.chat = Chat(self)
-        self.add_api_key_modal = AddAPIKeyModal(self)
-        self.manage_api_keys_modal = ManageAPIKeysModal(self)
-        self.warning_modal = WarningModal(self)
-        self.about_gila_modal = AboutGilaModal(self)
-        self.update_found_modal = UpdateFoundModal(self)
-        self.download_update_modal = DownloadUpdateModal(self)
         self.addToolBar(self.toolbar)
         self.setStatusBar(self.status_bar)
         main_layout = QGridLayout(central_widget)
@@ -67,6 +76,59 @@ class View(QMainWindow):
         self.set_cursor_pointer_for_buttons(self)
         self.hide_chatlog_and_prompt_line()
 
+    @property
+    def add_api_key_modal(self):
+        return self._get_modal("add_api_key_modal")
+
+    @property
+    def manage_api_keys_modal(self):
+        return self._get_modal("manage_api_keys_modal")
+
+    @property
+    def compare_models_modal(self):
+        return self._get_modal("compare_models_modal")
+
+    @property
+    def warning_modal(self):
+        return self._get_modal("warning_modal")
+
+    @property
+    def about_gila_modal(self):
+        return self._get_modal("about_gila_modal")
+
+    @property
+    def update_found_modal(self):
+        return self._get_modal("update_found_modal")
+
+    @property
+    def download_update_modal(self):
+        return self._get_modal("download_update_modal")
+
+    def _get_modal(self, name):
+        """Return the modal called name, building it the first time.
+
+        Most sessions open few modals or none, so they are built on first use
+        instead of with the window. A new modal is announced to the
+        controller with modal_built_to_controller, which connects its signals
+        before the modal is returned; signals emitted for a modal before it
+        was ever built are not delivered to it.
+
+        Parameters:
+            name (str): One of the keys of MODALS.
+
+        Returns:
+            Modal: The modal.
+        """
+        if (modal := self._modals.get(name)) is None:
+            modal = self._modals[name] = self.MODALS[name](self)
+            self.modal_built_to_controller.emit(name, modal)
+        return modal
+
+    def get_built_modal(self, name):
+        """Return the modal called name if it was already built, None
+        otherwise, without building it."""
+        return self._modals.get(name)
+
     def _build_toggle_sidebar_button(self):
         """Create and configure the button for toggling the sidebar.
 
@@ -0,0 +1,42 @@
+import json
+import os
+
+import pytest
+
+from gila.ai.batches import BatchManager
+from gila.ai.event_loop import EVENT_LOOP
+from gila.ai.manager import AIManager
+from gila.ai.mock_server import MockProviderServer
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+
+@pytest.fixture
+def server(monkeypatch):
+    # The model catalog is read from the root of the repository
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    with MockProviderServer(batch_polls=2) as server:
+        yield server
+
+
+@pytest.mark.parametrize("model_name", ["GPT-4o mini", "Claude 3.5 Haiku"])
+def test_batch_results_follow_input_order(server, tmp_path, model_name):
+    client = AIManager.create_client(model_name, 0.5, 64)
+    company = client.company
+    manager = BatchManager(
+        directory=str(tmp_path), poll_interval=0.01, max_poll_interval=0.05,
+        base_urls={company: server.base_url},
+    )
+    rows = [{"id": f"prompt-{index}", "prompt": f"Question number {index}"} for index in range(5)]
+
+    job = EVENT_LOOP.run(manager.run_async(client, rows), timeout=30)
+
+    assert job.status == "completed"
+    with open(job.results_path, "r", encoding="utf-8") as f:
+        results = [json.loads(line) for line in f]
+    assert [result["id"] for result in results] == [row["id"] for row in rows]
+    assert all(result["ok"] and result["response"] for result in results)
+    assert manager.load_job(job.job_id).status == "completed"